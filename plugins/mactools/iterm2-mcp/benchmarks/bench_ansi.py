@@ -0,0 +1,74 @@
+"""Benchmark ANSI normalization throughput on raw terminal output.
+
+Usage:
+    python -m benchmarks.bench_ansi [RAW_LOG ...]
+
+Without arguments a synthetic colored build log with progress-bar rewrites is
+generated. Pass raw captures (e.g. from ``script -q build.typescript make`` or
+``tmux pipe-pane``) for representative numbers. Input is fed in 4 KB chunks,
+the size of a typical control-mode burst, so partial sequences at chunk
+boundaries are exercised.
+"""
+
+import random
+import sys
+import time
+
+from src.ansi import AnsiNormalizer
+
+CHUNK = 4096
+
+
+def synthetic_log(lines: int = 200_000) -> bytes:
+    """Generate a colored build log with carriage-return progress lines."""
+    rng = random.Random(0)
+    out = []
+    for i in range(lines):
+        kind = rng.random()
+        path = f"src/module_{rng.randint(0, 39)}/file_{rng.randint(0, 24)}.c"
+        if kind < 0.5:
+            out.append(f"\x1b[32m[{i * 100 // lines:3d}%]\x1b[0m Building C object {path}.o\r\n")
+        elif kind < 0.7:
+            bar = "".join(
+                f"\r\x1b[2K{'#' * step}{'.' * (20 - step)} {step * 5}%" for step in range(0, 21, 4)
+            )
+            out.append(f"{bar}\r\n")
+        elif kind < 0.95:
+            test = f"tests/test_{rng.randint(0, 999)}.py::test_case_{i}"
+            out.append(f"{test} \x1b[1;32mPASSED\x1b[0m\r\n")
+        else:
+            out.append(
+                f"\x1b[1m{path}:{rng.randint(1, 2000)}:\x1b[0m \x1b[1;35mwarning:\x1b[0m "
+                f"unused variable 'tmp{rng.randint(0, 99)}'\r\n"
+            )
+    return "".join(out).encode("utf-8")
+
+
+def bench(name: str, data: bytes) -> None:
+    """Report throughput with styles dropped and preserved."""
+    print(f"\n{name}: {len(data) / 1e6:.1f} MB")
+    print(f"{'mode':<10} {'lines':>8} {'seconds':>8} {'MB/s':>7}")
+    for preserve in (False, True):
+        normalizer = AnsiNormalizer(preserve_styles=preserve)
+        start = time.perf_counter()
+        lines = 0
+        for offset in range(0, len(data), CHUNK):
+            lines += len(normalizer.feed(data[offset : offset + CHUNK]))
+        elapsed = time.perf_counter() - start
+        mode = "preserve" if preserve else "strip"
+        print(f"{mode:<10} {lines:8d} {elapsed:8.2f} {len(data) / 1e6 / elapsed:7.1f}")
+
+
+def main() -> None:
+    """Run the benchmark on the given logs or a synthetic one."""
+    paths = sys.argv[1:]
+    if not paths:
+        bench("synthetic colored build log", synthetic_log())
+        return
+    for path in paths:
+        with open(path, "rb") as f:
+            bench(path, f.read())
+
+
+if __name__ == "__main__":
+    main()
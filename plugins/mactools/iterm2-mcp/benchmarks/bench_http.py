@@ -0,0 +1,191 @@
+"""Load test the HTTP transport with many concurrent clients.
+
+Usage:
+    python -m benchmarks.bench_http [CLIENTS] [REQUESTS] [--unix]
+
+Starts the server with ``ITERM2_MCP_TRANSPORT=http`` on a free local port (or a
+Unix socket with ``--unix``), connects CLIENTS streamable HTTP clients (default
+50), and has each of them make REQUESTS ``list_sessions`` calls (default 40)
+back to back once all are initialized. ``list_sessions`` goes through the
+shared session manager but does not need iTerm2, so the numbers measure the
+transport and dispatch. Reported:
+
+- connect: MCP initialize latency per client
+- throughput: completed calls per second across all clients
+- latency: per-call percentiles
+
+Exits with status 1 if any call fails.
+"""
+
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+CLIENTS = 50
+REQUESTS = 40
+
+# Seconds to wait for the server to accept connections
+STARTUP_TIMEOUT = 30.0
+
+
+def free_port() -> int:
+    """Pick an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, unix_socket: Optional[str]) -> subprocess.Popen:
+    """Start the server with the HTTP transport and no session registry."""
+    env = dict(
+        os.environ,
+        ITERM2_MCP_TRANSPORT="http",
+        ITERM2_MCP_HTTP_PORT=str(port),
+        ITERM2_MCP_HTTP_SOCKET=unix_socket or "none",
+        ITERM2_MCP_REGISTRY="none",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "src.server"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def http_client(
+    unix_socket: Optional[str],
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[httpx.Timeout] = None,
+    auth: Optional[httpx.Auth] = None,
+) -> httpx.AsyncClient:
+    """HTTP client for one MCP client, over TCP or the Unix socket."""
+    transport = httpx.AsyncHTTPTransport(uds=unix_socket) if unix_socket else None
+    return httpx.AsyncClient(
+        transport=transport,
+        headers=headers,
+        timeout=timeout or httpx.Timeout(30.0, read=300.0),
+        auth=auth,
+        follow_redirects=True,
+    )
+
+
+async def wait_ready(url: str, unix_socket: Optional[str]) -> None:
+    """Poll the endpoint until the server answers."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    async with http_client(unix_socket) as client:
+        while True:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("server did not start")
+                await asyncio.sleep(0.1)
+
+
+async def run_client(
+    url: str,
+    unix_socket: Optional[str],
+    requests: int,
+    start: asyncio.Event,
+    ready: List[float],
+) -> Tuple[List[float], int]:
+    """Initialize, wait for the others, then time each call; return latencies and failures."""
+    latencies: List[float] = []
+    failures = 0
+    factory = partial(http_client, unix_socket)
+    async with streamablehttp_client(url, httpx_client_factory=factory) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            begin = time.perf_counter()
+            await session.initialize()
+            ready.append(time.perf_counter() - begin)
+            await start.wait()
+            for _ in range(requests):
+                begin = time.perf_counter()
+                result = await session.call_tool("list_sessions", {})
+                latencies.append(time.perf_counter() - begin)
+                if result.isError or result.content[0].text.startswith("Error"):
+                    failures += 1
+    return latencies, failures
+
+
+async def run_load(
+    url: str, unix_socket: Optional[str], clients: int, requests: int
+) -> Tuple[List[float], List[float], float, int]:
+    """Run all clients; return connect and call latencies, wall time and failures."""
+    start = asyncio.Event()
+    ready: List[float] = []
+    tasks = [
+        asyncio.create_task(run_client(url, unix_socket, requests, start, ready))
+        for _ in range(clients)
+    ]
+    while len(ready) < clients:
+        if any(task.done() for task in tasks):
+            break
+        await asyncio.sleep(0.01)
+
+    begin = time.perf_counter()
+    start.set()
+    results = await asyncio.gather(*tasks)
+    wall = time.perf_counter() - begin
+
+    latencies = [latency for client_latencies, _ in results for latency in client_latencies]
+    failures = sum(client_failures for _, client_failures in results)
+    return ready, latencies, wall, failures
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> None:
+    """Run the load test and print a summary."""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    clients = int(args[0]) if args else CLIENTS
+    requests = int(args[1]) if len(args) > 1 else REQUESTS
+
+    unix_socket: Optional[str] = None
+    if "--unix" in sys.argv:
+        unix_socket = os.path.join(tempfile.mkdtemp(), "iterm2-mcp.sock")
+    port = free_port()
+    url = f"http://{'localhost' if unix_socket else '127.0.0.1'}:{port}/mcp"
+
+    server = start_server(port, unix_socket)
+    try:
+        asyncio.run(wait_ready(url, unix_socket))
+        ready, latencies, wall, failures = asyncio.run(
+            run_load(url, unix_socket, clients, requests)
+        )
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    ms = [latency * 1000 for latency in latencies]
+    print(f"transport: {'unix socket' if unix_socket else 'tcp'}")
+    print(f"clients {clients}, calls {len(ms)}, failures {failures}")
+    print(f"connect p50 {statistics.median(ready) * 1000:.1f} ms")
+    print(f"throughput {len(ms) / wall:.0f} calls/s over {wall:.2f} s")
+    print(
+        f"latency ms: p50 {percentile(ms, 0.5):.1f}  p95 {percentile(ms, 0.95):.1f}  "
+        f"p99 {percentile(ms, 0.99):.1f}  max {max(ms):.1f}"
+    )
+    if failures or len(ms) < clients * requests:
+        print("FAIL: some calls failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark event loop lag while heavy tools run over a large session buffer.
+
+Usage:
+    python -m benchmarks.bench_loop_lag [MEGABYTES]
+
+A synthetic build log (100 MB by default) is loaded into a session without a
+terminal, then a full-buffer regex search, an output summary and a condensed
+read of the whole buffer run with output processing done inline, in worker
+threads and in worker processes. Meanwhile a probe sleeps 1 ms at a time and
+records how late it wakes up: that lateness is how long any other tool call
+(or an MCP ping) would have waited for the loop. Reported per operation:
+wall time, and the maximum and 99th percentile loop lag.
+"""
+
+import asyncio
+import sys
+import time
+from typing import Awaitable, Callable, List, Tuple
+
+from benchmarks.bench_output_buffer import synthetic_log
+from src.config import ServerConfig
+from src.models import SessionState
+from src.session_manager import SessionManager
+
+# Interval the lag probe asks to sleep for
+PROBE_SECONDS = 0.001
+
+# Lines generated per batch while building the log
+BATCH_LINES = 100_000
+
+# Worker settings compared: (label, threads, processes)
+MODES = [("inline", 0, 0), ("threads", 4, 0), ("processes", 4, 2)]
+
+
+def build_session(megabytes: int) -> SessionState:
+    """Fill a session buffer with about ``megabytes`` of synthetic build log."""
+    session = SessionState()
+    batch = synthetic_log(BATCH_LINES)
+    batch_size = sum(len(line.encode("utf-8")) + 1 for line in batch)
+    for _ in range(max(1, megabytes * 1_000_000 // batch_size)):
+        session.output_buffer.extend(batch)
+    return session
+
+
+async def measure(operation: Callable[[], Awaitable[object]]) -> Tuple[float, List[float]]:
+    """Run an operation next to the lag probe; return its wall time and the lags seen."""
+    lags: List[float] = []
+    done = False
+
+    async def probe() -> None:
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(PROBE_SECONDS)
+            lags.append(time.perf_counter() - start - PROBE_SECONDS)
+
+    task = asyncio.ensure_future(probe())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await operation()
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return elapsed, lags
+
+
+def report(label: str, elapsed: float, lags: List[float]) -> None:
+    """Print wall time and loop lag statistics in milliseconds."""
+    lags = sorted(lags) or [0.0]
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(
+        f"  {label:<16} {elapsed * 1000:8.0f} ms   "
+        f"max lag {lags[-1] * 1000:7.1f} ms   p99 lag {p99 * 1000:7.1f} ms"
+    )
+
+
+async def bench(label: str, session: SessionState, threads: int, processes: int) -> None:
+    """Time the heavy operations with one worker setup."""
+    config = ServerConfig(
+        reap_interval_seconds=0,
+        registry_path="",
+        offload_threads=threads,
+        offload_processes=processes,
+    )
+    manager = SessionManager(config)
+    manager.sessions[session.session_id] = session
+    total = len(session.output_buffer)
+
+    async def search() -> None:
+        # Matches nothing, so the whole buffer is scanned
+        await manager.search_session_output(session.session_id, r"segmentation fault")
+
+    async def summary() -> None:
+        session.summarizer = None
+        await manager.get_output_summary(session.session_id)
+
+    async def condensed() -> None:
+        await manager.read_session_output(session.session_id, offset=-total, max_bytes=64_000)
+
+    print(f" {label}")
+    try:
+        for name, operation in (
+            ("regex search", search),
+            ("output summary", summary),
+            ("condensed read", condensed),
+        ):
+            # The first run starts worker pools; measure the second
+            await operation()
+            elapsed, lags = await measure(operation)
+            report(name, elapsed, lags)
+    finally:
+        manager.sessions.pop(session.session_id, None)
+        manager.offloader.shutdown()
+
+
+def main() -> None:
+    """Run the benchmark for each worker setup."""
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    start = time.perf_counter()
+    session = build_session(megabytes)
+    buffer = session.output_buffer
+    print(
+        f"{len(buffer)} lines ({megabytes} MB of log) loaded in "
+        f"{time.perf_counter() - start:.1f} s, {buffer.nbytes / 1e6:.1f} MB in memory"
+    )
+    for label, threads, processes in MODES:
+        asyncio.run(bench(label, session, threads, processes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark OutputBuffer memory savings against read latency.
+
+Usage:
+    python -m benchmarks.bench_output_buffer [BUILD_LOG ...]
+
+Without arguments a synthetic compiler/test log is generated. Pass real build
+logs (e.g. ``make 2>&1 | tee build.log``) for representative numbers.
+"""
+
+import random
+import sys
+import time
+from typing import List
+
+from src.output_buffer import OutputBuffer
+
+PAGE = 1000
+
+
+def synthetic_log(lines: int = 200_000) -> List[str]:
+    """Generate build-log-like output with realistic repetition."""
+    rng = random.Random(0)
+    modules = [f"src/module_{i}/file_{j}.c" for i in range(40) for j in range(25)]
+    out = []
+    for i in range(lines):
+        kind = rng.random()
+        path = rng.choice(modules)
+        if kind < 0.6:
+            out.append(f"gcc -O2 -Wall -Iinclude -c {path} -o build/{path[:-2]}.o")
+        elif kind < 0.8:
+            out.append(f"[{i * 100 // lines:3d}%] Building C object {path}.o")
+        elif kind < 0.95:
+            out.append(f"tests/test_{rng.randint(0, 999)}.py::test_case_{i} PASSED")
+        else:
+            out.append(
+                f"{path}:{rng.randint(1, 2000)}:{rng.randint(1, 80)}: warning: "
+                f"unused variable 'tmp{rng.randint(0, 99)}' [-Wunused-variable]"
+            )
+    return out
+
+
+def raw_size(lines: List[str]) -> int:
+    """Resident size of the lines as a plain list of strings."""
+    return sys.getsizeof(lines) + sum(sys.getsizeof(line) for line in lines)
+
+
+def timed(fn, repeat: int) -> float:  # type: ignore[no-untyped-def]
+    """Average wall time of fn() in microseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def bench(name: str, lines: List[str]) -> None:
+    """Report memory and latency for each codec."""
+    baseline = raw_size(lines)
+    print(f"\n{name}: {len(lines)} lines, {baseline / 1e6:.1f} MB as list[str]")
+    print(f"{'codec':<6} {'MB':>7} {'saved':>6} {'fill ms':>8} "
+          f"{'tail us':>8} {'cold page us':>13} {'seq page us':>12}")
+
+    rng = random.Random(1)
+    for codec in ("none", "zlib", "lzma"):
+        buffer = OutputBuffer(hot_lines=5000, segment_lines=1000, codec=codec)
+        start = time.perf_counter()
+        for i in range(0, len(lines), PAGE):
+            buffer.extend(lines[i : i + PAGE])
+        fill_ms = (time.perf_counter() - start) * 1e3
+
+        size = buffer.nbytes
+        total = len(buffer)
+        tail = timed(lambda: buffer[-100:], 200)
+
+        def cold_page() -> None:
+            buffer._cache.clear()
+            offset = rng.randrange(0, max(1, total - PAGE))
+            buffer.read_range(offset, offset + PAGE)
+
+        cold = timed(cold_page, 50)
+        pages = total // PAGE
+        start = time.perf_counter()
+        for offset in range(0, total, PAGE):
+            buffer.read_range(offset, offset + PAGE)
+        seq = (time.perf_counter() - start) / max(1, pages) * 1e6
+
+        print(f"{codec:<6} {size / 1e6:7.1f} {1 - size / baseline:6.0%} {fill_ms:8.0f} "
+              f"{tail:8.1f} {cold:13.1f} {seq:12.1f}")
+
+
+def main() -> None:
+    """Run the benchmark on the given logs or a synthetic one."""
+    paths = sys.argv[1:]
+    if not paths:
+        bench("synthetic build log", synthetic_log())
+        return
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            bench(path, f.read().split("\n"))
+
+
+if __name__ == "__main__":
+    main()
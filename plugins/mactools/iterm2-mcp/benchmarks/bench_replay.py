@@ -0,0 +1,131 @@
+"""Benchmark the output pipeline by replaying recordings through SessionManager.
+
+Usage:
+    python -m benchmarks.bench_replay [RECORDING.cast ...]
+
+Without arguments a synthetic recording is generated: the colored build log of
+``bench_ansi`` in 4 KB output events, split into commands by OSC 133 prompt
+marks. Pass recordings made with ``record: true`` (or by ``asciinema rec``) to
+measure real sessions. Each recording is replayed twice as fast as possible,
+without iTerm2 or tmux, and the buffers must come out identical. Reported:
+
+- replay: events and MB per second through the screen model, prompt-mark
+  parser and ANSI normalization, plus the sync into the output buffer
+- per-tool latency on the replayed session: tail read, regex search, output
+  of the last command and output summary
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+from benchmarks.bench_ansi import CHUNK, synthetic_log
+from src.config import ServerConfig
+from src.session_manager import SessionManager
+
+# Output lines per synthetic command, and recorded seconds between events
+COMMAND_LINES = 20_000
+EVENT_INTERVAL = 0.01
+
+
+def synthetic_recording(path: str) -> None:
+    """Write the synthetic build log as an asciicast recording."""
+    # Split on newlines only; progress bars rewrite their line with bare CRs
+    lines = synthetic_log().decode("utf-8").split("\n")[:-1]
+    chunks: List[str] = []
+    for start in range(0, len(lines), COMMAND_LINES):
+        chunks.append("\x1b]133;A\x07$ \x1b]133;B\x07make test\r\n\x1b]133;C\x07")
+        body = "".join(line + "\n" for line in lines[start : start + COMMAND_LINES])
+        chunks.extend(body[i : i + CHUNK] for i in range(0, len(body), CHUNK))
+        chunks.append("\x1b]133;D;0\x07")
+
+    with open(path, "w", encoding="utf-8") as f:
+        header = {"version": 2, "width": 120, "height": 40, "timestamp": 1700000000}
+        f.write(json.dumps(header) + "\n")
+        for i, chunk in enumerate(chunks):
+            f.write(json.dumps([round(i * EVENT_INTERVAL, 6), "o", chunk]) + "\n")
+
+
+def timed(label: str, start: float) -> None:
+    """Print the milliseconds since ``start``."""
+    print(f"  {label:<16} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+async def replay(path: str) -> Tuple[str, int]:
+    """Replay a recording to the end; return a digest of the buffer and its line count."""
+    manager = SessionManager(ServerConfig(reap_interval_seconds=0, registry_path=""))
+    session = manager.create_replay_session(path)
+    if session is None or session.replay is None:
+        raise SystemExit(f"cannot replay {path}")
+    player = session.replay
+
+    start = time.perf_counter()
+    while not player.finished:
+        await asyncio.sleep(0.01)
+    await manager.refresh_output(session)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path)
+    buffer = session.output_buffer
+    print(
+        f"  {'replay':<16} {elapsed * 1000:8.1f} ms  {player.events_played} events, "
+        f"{len(buffer)} lines, {player.events_played / elapsed:.0f} events/s, "
+        f"{size / 1e6 / elapsed:.1f} MB/s"
+    )
+
+    start = time.perf_counter()
+    await manager.read_session_output(session.session_id, offset=-1000)
+    timed("tail read", start)
+    start = time.perf_counter()
+    await manager.search_session_output(session.session_id, r"warning: unused variable")
+    timed("regex search", start)
+    commands = list(session.commands.commands)
+    if commands:
+        start = time.perf_counter()
+        await manager.get_command_output(session, commands[-1])
+        timed("command output", start)
+    start = time.perf_counter()
+    await manager.get_output_summary(session.session_id)
+    timed("output summary", start)
+    print(f"  commands tracked: {len(commands)}")
+
+    digest = hashlib.sha256()
+    for line in buffer.read_range(0, len(buffer)):
+        digest.update(line.encode("utf-8") + b"\n")
+    digest.update(repr(buffer.read_times(0, buffer.committed_count)).encode())
+    await manager.terminate_session(session.session_id)
+    return digest.hexdigest(), len(buffer)
+
+
+def bench(name: str, path: str) -> None:
+    """Replay a recording twice and check that both runs agree."""
+    print(f"\n{name}: {os.path.getsize(path) / 1e6:.1f} MB")
+    digests = []
+    for run in (1, 2):
+        print(f" run {run}")
+        digests.append(asyncio.run(replay(path)))
+    if digests[0] != digests[1]:
+        print("FAIL: replays produced different buffers")
+        sys.exit(1)
+    print(" deterministic: both runs produced the same buffer and timestamps")
+
+
+def main() -> None:
+    """Run the benchmark on the given recordings or a synthetic one."""
+    paths = sys.argv[1:]
+    if paths:
+        for path in paths:
+            bench(path, path)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "synthetic.cast")
+        synthetic_recording(path)
+        bench("synthetic build recording", path)
+
+
+if __name__ == "__main__":
+    main()
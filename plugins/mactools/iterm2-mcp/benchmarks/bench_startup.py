@@ -0,0 +1,99 @@
+"""Benchmark server cold start and fail on regressions.
+
+Usage:
+    python -m benchmarks.bench_startup [MAX_OWN_MS]
+
+Each run starts a fresh interpreter that imports ``src.server`` and answers a
+tools/list request, timed with ``-X importtime``. Reported per run (median of
+RUNS):
+
+- total: wall time until the tool list is built
+- deps: the rest, mostly importing ``mcp`` and ``pydantic``
+- own: self time of this server's modules, the part this code controls
+
+Exits with status 1 if the median own time exceeds MAX_OWN_MS (default
+OWN_BUDGET_MS) or if a deferred module such as ``iterm2`` or the session
+manager was imported before the first tool call.
+"""
+
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+RUNS = 7
+
+# Budget for the server's own import-time work, in milliseconds
+OWN_BUDGET_MS = 60.0
+
+# Imported on first use only; must not appear during startup
+DEFERRED = ("iterm2", "src.session_manager", "src.tools.iterm_tools")
+
+_CHILD = """
+import asyncio, sys, time
+start = time.perf_counter()
+from src import server
+asyncio.run(server.list_tools())
+print(f"total {(time.perf_counter() - start) * 1000:.3f}")
+print("loaded " + " ".join(name for name in sys.argv[1:] if name in sys.modules))
+"""
+
+
+def run_once() -> Tuple[float, float, float, List[str]]:
+    """Start one server process; return total, dependency and own ms, and deferred imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, *DEFERRED],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    own = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        module = fields[-1].strip()
+        if (module == "src" or module.startswith("src.")) and fields[0].strip().isdigit():
+            own += int(fields[0]) / 1000
+
+    total = 0.0
+    loaded: List[str] = []
+    for line in result.stdout.splitlines():
+        if line.startswith("total "):
+            total = float(line.split()[1])
+        elif line.startswith("loaded"):
+            loaded = line.split()[1:]
+    return total, total - own, own, loaded
+
+
+def main() -> None:
+    """Run the benchmark and enforce the own-time budget."""
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else OWN_BUDGET_MS
+    totals, deps, owns = [], [], []
+    loaded = set()
+    for _ in range(RUNS):
+        total, dep, own, deferred = run_once()
+        totals.append(total)
+        deps.append(dep)
+        owns.append(own)
+        loaded.update(deferred)
+
+    print(f"{'runs':<6} {'total ms':>9} {'deps ms':>8} {'own ms':>7} {'budget':>7}")
+    print(
+        f"{RUNS:<6d} {statistics.median(totals):9.1f} {statistics.median(deps):8.1f} "
+        f"{statistics.median(owns):7.1f} {budget:7.1f}"
+    )
+
+    failed = False
+    if statistics.median(owns) > budget:
+        print(f"FAIL: own import time over budget ({budget:.0f} ms)")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported during startup: {', '.join(sorted(loaded))}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
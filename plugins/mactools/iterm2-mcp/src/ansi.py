@@ -0,0 +1,418 @@
+"""Streaming normalization of raw terminal output: escape sequences, CR and backspace."""
+
+import codecs
+import re
+from dataclasses import dataclass, field, replace
+from itertools import groupby
+from typing import Dict, List, Optional, Tuple, Union
+
+# Longest unterminated escape sequence carried over between chunks before it is dropped
+MAX_PENDING = 4096
+
+# Columns between tab stops
+TAB_WIDTH = 8
+
+# Distinct (style, SGR parameters) transitions remembered per normalizer
+SGR_CACHE_SIZE = 1024
+
+# Token kinds produced by AnsiTokenizer
+TEXT = 0
+CONTROL = 1
+CSI = 2
+ESCAPE = 3
+
+Token = Tuple[int, str, str]
+
+_TOKEN = re.compile(
+    # Printable text
+    r"([^\x00-\x1f\x7f]+)"
+    # CSI: parameters, intermediates, final byte
+    r"|\x1b\[([0-?]*)[ -/]*([@-~])"
+    # C0 controls except ESC
+    r"|([\x00-\x1a\x1c-\x1f\x7f])"
+    # OSC (titles, shell-integration marks, hyperlinks), BEL or ST terminated
+    r"|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    # DCS, SOS, PM, APC strings
+    r"|\x1b[PX^_][^\x1b]*\x1b\\"
+    # Other escapes (charset selection, keypad modes); introducers above excluded
+    r"|\x1b[ -/]*[0-9:;<=>?@A-OQ-WYZ\\`a-~]"
+)
+
+# SGR sequences, removed up front when attributes are not wanted
+_SGR = re.compile(r"\x1b\[[0-9;:]*m")
+
+# An escape sequence cut off by the end of the text
+_PARTIAL = re.compile(
+    r"\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[PX^_][^\x1b]*\x1b?|[ -/]*)\Z"
+)
+
+_COLORS = ("black", "red", "green", "yellow", "blue", "magenta", "cyan", "white")
+
+
+class AnsiTokenizer:
+    """
+    Splits a raw output stream into text, control characters and escape sequences.
+
+    Bytes are decoded incrementally, and a sequence cut off at the end of a
+    chunk is held back until the next one, so chunk boundaries never leak
+    escape fragments into the text. Stray ESC characters that start no valid
+    sequence are dropped.
+    """
+
+    def __init__(self, drop_sgr: bool = False) -> None:
+        self.drop_sgr = drop_sgr
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+
+    def feed(self, data: Union[bytes, str]) -> List[Token]:
+        """
+        Tokenize a chunk.
+
+        Args:
+            data: Raw output, as bytes or already decoded text.
+
+        Returns:
+            Tokens as ``(kind, a, b)``: ``(TEXT, text, "")``, ``(CONTROL, char, "")``,
+            ``(CSI, params, final)`` or ``(ESCAPE, sequence, "")``.
+        """
+        text = self._decoder.decode(data) if isinstance(data, bytes) else data
+        if self._pending:
+            text = self._pending + text
+            self._pending = ""
+        if "\x1b" in text:
+            text = self._hold_back_partial(text)
+            if self.drop_sgr:
+                text = _SGR.sub("", text)
+
+        tokens: List[Token] = []
+        append = tokens.append
+        for match in _TOKEN.finditer(text):
+            group = match.lastindex
+            if group == 1:
+                append((TEXT, match.group(1), ""))
+            elif group == 3:
+                append((CSI, match.group(2), match.group(3)))
+            elif group == 4:
+                append((CONTROL, match.group(4), ""))
+            else:
+                append((ESCAPE, match.group(0), ""))
+        return tokens
+
+    def _hold_back_partial(self, text: str) -> str:
+        """Keep an unterminated sequence at the end of the text for the next chunk."""
+        window = max(0, len(text) - MAX_PENDING)
+        escape = text.rfind("\x1b", window)
+        if escape < 0 or _TOKEN.match(text, escape):
+            return text
+        # A lone ESC may be the first half of the string terminator of an earlier OSC/DCS
+        earlier = text.rfind("\x1b", window, escape)
+        if earlier >= 0 and _PARTIAL.match(text, earlier):
+            escape = earlier
+        elif not _PARTIAL.match(text, escape):
+            return text
+        self._pending = text[escape:]
+        return text[:escape]
+
+
+@dataclass(frozen=True)
+class Style:
+    """Character attributes set by SGR sequences."""
+
+    fg: Optional[str] = None
+    bg: Optional[str] = None
+    bold: bool = False
+    dim: bool = False
+    italic: bool = False
+    underline: bool = False
+    inverse: bool = False
+    strikethrough: bool = False
+
+
+DEFAULT_STYLE = Style()
+
+
+@dataclass
+class StyleSpan:
+    """A run of characters ``[start, end)`` sharing a non-default style."""
+
+    start: int
+    end: int
+    style: Style
+
+
+@dataclass
+class NormalizedLine:
+    """A finished output line as it would appear on screen."""
+
+    text: str
+    spans: List[StyleSpan] = field(default_factory=list)
+
+
+def _color(params: List[int], index: int) -> Tuple[Optional[str], int]:
+    """Parse an extended color after 38/48; return it and the parameters consumed."""
+    if index < len(params) and params[index] == 5 and index + 1 < len(params):
+        return f"color({params[index + 1]})", 2
+    if index < len(params) and params[index] == 2 and index + 3 < len(params):
+        r, g, b = params[index + 1 : index + 4]
+        return f"#{r:02x}{g:02x}{b:02x}", 4
+    return None, len(params) - index
+
+
+def apply_sgr(style: Style, params: str) -> Style:
+    """
+    Apply an SGR parameter string (the part of ``ESC [ ... m`` before ``m``).
+
+    Args:
+        style: Style before the sequence.
+        params: Semicolon-separated parameters; colon sub-parameters are accepted.
+
+    Returns:
+        The resulting style.
+    """
+    values: List[int] = []
+    for group in params.split(";"):
+        if ":" in group:
+            # Colon form (38:2::r:g:b, 4:3) keeps one attribute per group
+            parts = [int(p) if p.isdigit() else 0 for p in group.split(":")]
+            if parts[0] in (38, 48, 58) and len(parts) > 2 and parts[1] == 2:
+                parts = parts[:2] + parts[-3:]
+            if parts[0] == 4:
+                style = replace(style, underline=parts[1] != 0 if len(parts) > 1 else True)
+                continue
+            values.extend(parts)
+        else:
+            values.append(int(group) if group.isdigit() else 0)
+
+    index = 0
+    while index < len(values):
+        code = values[index]
+        index += 1
+        if code == 0:
+            style = DEFAULT_STYLE
+        elif code == 1:
+            style = replace(style, bold=True)
+        elif code == 2:
+            style = replace(style, dim=True)
+        elif code == 3:
+            style = replace(style, italic=True)
+        elif code == 4:
+            style = replace(style, underline=True)
+        elif code == 7:
+            style = replace(style, inverse=True)
+        elif code == 9:
+            style = replace(style, strikethrough=True)
+        elif code == 22:
+            style = replace(style, bold=False, dim=False)
+        elif code == 23:
+            style = replace(style, italic=False)
+        elif code == 24:
+            style = replace(style, underline=False)
+        elif code == 27:
+            style = replace(style, inverse=False)
+        elif code == 29:
+            style = replace(style, strikethrough=False)
+        elif 30 <= code <= 37:
+            style = replace(style, fg=_COLORS[code - 30])
+        elif 40 <= code <= 47:
+            style = replace(style, bg=_COLORS[code - 40])
+        elif 90 <= code <= 97:
+            style = replace(style, fg=f"bright_{_COLORS[code - 90]}")
+        elif 100 <= code <= 107:
+            style = replace(style, bg=f"bright_{_COLORS[code - 100]}")
+        elif code == 39:
+            style = replace(style, fg=None)
+        elif code == 49:
+            style = replace(style, bg=None)
+        elif code in (38, 48, 58):
+            color, used = _color(values, index)
+            index += used
+            if code == 38:
+                style = replace(style, fg=color)
+            elif code == 48:
+                style = replace(style, bg=color)
+    return style
+
+
+def csi_param(params: str, index: int = 0, default: int = 1) -> int:
+    """Numeric CSI parameter, with the terminal's default for missing or zero values."""
+    fields = params.lstrip("<=>?").split(";")
+    if index < len(fields) and fields[index].isdigit():
+        value = int(fields[index])
+        return value if value else default
+    return default
+
+
+class AnsiNormalizer:
+    """
+    Turns a raw output stream into the lines a terminal would show.
+
+    Carriage returns, backspaces, tabs and in-line cursor movement and erasure
+    are applied to the current line, so progress bars and spinners resolve to
+    their final state. SGR attributes are either dropped or, with
+    ``preserve_styles``, kept as per-line style spans. Vertical cursor
+    movement is ignored; a full screen model is the VT emulator's job.
+    """
+
+    def __init__(self, preserve_styles: bool = False) -> None:
+        self.preserve_styles = preserve_styles
+        self.style = DEFAULT_STYLE
+        self._tokenizer = AnsiTokenizer(drop_sgr=not preserve_styles)
+        self._line = ""
+        self._styles: List[Style] = []
+        self._column = 0
+        self._sgr_cache: Dict[Tuple[Style, str], Style] = {}
+        self._interned: Dict[Style, Style] = {DEFAULT_STYLE: DEFAULT_STYLE}
+
+    @property
+    def current_line(self) -> str:
+        """The unfinished line, as shown so far."""
+        return self._line.rstrip(" ")
+
+    def feed(self, data: Union[bytes, str]) -> List[NormalizedLine]:
+        """
+        Normalize a chunk of raw output.
+
+        Args:
+            data: Raw output, as bytes or already decoded text.
+
+        Returns:
+            Lines finished by this chunk, in order.
+        """
+        lines: List[NormalizedLine] = []
+        for kind, a, b in self._tokenizer.feed(data):
+            if kind == TEXT:
+                self._write(a)
+            elif kind == CONTROL:
+                if a in "\n\x0b\x0c":
+                    lines.append(self._finish_line())
+                elif a == "\r":
+                    self._column = 0
+                elif a == "\b":
+                    self._column = max(0, self._column - 1)
+                elif a == "\t":
+                    self._column += TAB_WIDTH - self._column % TAB_WIDTH
+            elif kind == CSI:
+                self._csi(a, b)
+        return lines
+
+    def flush(self) -> Optional[NormalizedLine]:
+        """Finish and return the current line, or None if it is empty."""
+        if not self._line:
+            self._column = 0
+            return None
+        return self._finish_line()
+
+    def _write(self, text: str) -> None:
+        """Write text at the cursor, overwriting what is there."""
+        line, column, count = self._line, self._column, len(text)
+        if column == len(line):
+            self._line = line + text
+        elif column > len(line):
+            self._line = line + " " * (column - len(line)) + text
+        else:
+            self._line = line[:column] + text + line[column + count :]
+
+        if self.preserve_styles:
+            styles = self._styles
+            if column > len(styles):
+                styles.extend([DEFAULT_STYLE] * (column - len(styles)))
+            styles[column : column + count] = [self.style] * count
+        self._column = column + count
+
+    def _csi(self, params: str, final: str) -> None:
+        """Apply an in-line CSI sequence."""
+        if final == "m":
+            if self.preserve_styles:
+                self._apply_sgr(params)
+        elif final == "K":
+            mode = csi_param(params, default=0)
+            column = self._column
+            if mode == 0:
+                self._line = self._line[:column]
+                del self._styles[column:]
+            elif mode == 1:
+                self._erase(0, column + 1)
+            elif mode == 2:
+                self._line = ""
+                self._styles.clear()
+        elif final == "C":
+            self._column += csi_param(params)
+        elif final == "D":
+            self._column = max(0, self._column - csi_param(params))
+        elif final == "G":
+            self._column = csi_param(params) - 1
+        elif final == "X":
+            self._erase(self._column, self._column + csi_param(params))
+        elif final == "P":
+            count = csi_param(params)
+            self._line = self._line[: self._column] + self._line[self._column + count :]
+            del self._styles[self._column : self._column + count]
+        elif final == "@":
+            count = csi_param(params)
+            if self._column < len(self._line):
+                line = self._line
+                self._line = line[: self._column] + " " * count + line[self._column :]
+                self._styles[self._column : self._column] = [DEFAULT_STYLE] * count
+
+    def _apply_sgr(self, params: str) -> None:
+        """Update the current style, reusing results for repeated sequences."""
+        key = (self.style, params)
+        style = self._sgr_cache.get(key)
+        if style is None:
+            if len(self._sgr_cache) >= SGR_CACHE_SIZE:
+                self._sgr_cache.clear()
+            style = apply_sgr(self.style, params)
+            style = self._interned.setdefault(style, style)
+            self._sgr_cache[key] = style
+        self.style = style
+
+    def _erase(self, start: int, stop: int) -> None:
+        """Blank columns ``[start, stop)`` of the current line."""
+        line = self._line
+        stop = min(stop, len(line))
+        if start < stop:
+            self._line = line[:start] + " " * (stop - start) + line[stop:]
+            self._styles[start:stop] = [DEFAULT_STYLE] * (stop - start)
+
+    def _finish_line(self) -> NormalizedLine:
+        """Emit the current line and start a new one."""
+        text = self._line.rstrip(" ")
+        spans: List[StyleSpan] = []
+        if self.preserve_styles:
+            # Styles are interned, so runs can be grouped by identity
+            start = 0
+            for _, group in groupby(self._styles[: len(text)], key=id):
+                run = list(group)
+                if run[0] is not DEFAULT_STYLE:
+                    spans.append(StyleSpan(start=start, end=start + len(run), style=run[0]))
+                start += len(run)
+        self._line = ""
+        self._styles = []
+        self._column = 0
+        return NormalizedLine(text=text, spans=spans)
+
+
+def normalize(data: Union[bytes, str], preserve_styles: bool = False) -> List[NormalizedLine]:
+    """
+    Normalize a complete piece of raw output.
+
+    Args:
+        data: Raw output, as bytes or text.
+        preserve_styles: Keep SGR attributes as style spans.
+
+    Returns:
+        All lines, including an unterminated last one.
+    """
+    normalizer = AnsiNormalizer(preserve_styles=preserve_styles)
+    lines = normalizer.feed(data)
+    last = normalizer.flush()
+    if last is not None:
+        lines.append(last)
+    return lines
+
+
+def strip_ansi(text: str) -> str:
+    """Plain text of raw output, with every line resolved as the terminal shows it."""
+    if "\x1b" not in text and "\r" not in text and "\b" not in text:
+        return text
+    return "\n".join(line.text for line in normalize(text))
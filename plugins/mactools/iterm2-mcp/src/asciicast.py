@@ -0,0 +1,169 @@
+"""Reading and writing session recordings in the asciicast v2 format."""
+
+import codecs
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import IO, Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+ASCIICAST_VERSION = 2
+
+# Event kinds: terminal output and input sent to the session
+OUTPUT = "o"
+INPUT = "i"
+
+
+@dataclass
+class AsciicastHeader:
+    """First line of a recording."""
+
+    width: int
+    height: int
+    # Unix time of event time 0
+    timestamp: float
+    command: Optional[str] = None
+
+
+@dataclass
+class AsciicastEvent:
+    """One recorded event."""
+
+    time: float  # seconds since the header timestamp
+    kind: str
+    data: str
+
+
+def read_header(f: IO[str]) -> AsciicastHeader:
+    """
+    Parse the header line of a recording.
+
+    Args:
+        f: Recording opened for reading, positioned at the start.
+
+    Returns:
+        The parsed header.
+
+    Raises:
+        ValueError: If the file is not an asciicast v2 recording.
+    """
+    line = f.readline()
+    try:
+        header = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"not an asciicast recording: {e}") from None
+    if not isinstance(header, dict) or header.get("version") != ASCIICAST_VERSION:
+        raise ValueError("not an asciicast v2 recording")
+    return AsciicastHeader(
+        width=int(header.get("width", 80)),
+        height=int(header.get("height", 24)),
+        timestamp=float(header.get("timestamp", 0)),
+        command=header.get("command"),
+    )
+
+
+def iter_events(f: IO[str]) -> Iterator[AsciicastEvent]:
+    """
+    Yield the events of a recording after its header, skipping unreadable lines.
+
+    A recording cut short by a crash ends in a partial line; it is ignored
+    like any other malformed event.
+    """
+    for line in f:
+        try:
+            elapsed, kind, data = json.loads(line)
+        except (json.JSONDecodeError, TypeError, ValueError):
+            continue
+        if isinstance(elapsed, (int, float)) and isinstance(data, str):
+            yield AsciicastEvent(time=float(elapsed), kind=kind, data=data)
+
+
+class AsciicastWriter:
+    """
+    Append-only asciicast v2 recorder for one session.
+
+    Each event is written as its own line and flushed, so a recording survives
+    a crash of the server up to the last event. Reopening an existing recording
+    (e.g. after a server restart) appends to it, keeping its original time base.
+    """
+
+    def __init__(
+        self, path: str, width: int, height: int, command: Optional[str] = None
+    ) -> None:
+        self.path = os.path.expanduser(path)
+        # tmux may split a multibyte character across %output notifications
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        started: Optional[float] = None
+        cut_short = False
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, encoding="utf-8") as f:
+                started = read_header(f).timestamp
+            with open(self.path, "rb") as raw:
+                raw.seek(-1, os.SEEK_END)
+                cut_short = raw.read(1) != b"\n"
+        self._file: Optional[IO[str]] = open(self.path, "a", encoding="utf-8")
+        if cut_short:
+            # Terminate a partial event left by a crash so the next one parses
+            self._file.write("\n")
+        if started is None:
+            # The header stores whole seconds; event times are relative to that
+            started = float(int(time.time()))
+            header: Dict[str, Any] = {
+                "version": ASCIICAST_VERSION,
+                "width": width,
+                "height": height,
+                "timestamp": int(started),
+            }
+            if command:
+                header["command"] = command
+            self._write_line(header)
+        self.started = started
+
+    @property
+    def closed(self) -> bool:
+        """Check if the recorder has stopped writing."""
+        return self._file is None
+
+    def write_output(self, data: bytes) -> None:
+        """Record raw bytes written by the program in the pane."""
+        text = self._decoder.decode(data)
+        if text:
+            self._event(OUTPUT, text)
+
+    def write_input(self, text: str) -> None:
+        """Record text sent to the session."""
+        self._event(INPUT, text)
+
+    def close(self) -> None:
+        """Flush any partial character and stop recording."""
+        if self._file is None:
+            return
+        text = self._decoder.decode(b"", final=True)
+        if text:
+            self._event(OUTPUT, text)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _event(self, kind: str, data: str) -> None:
+        """Append one event, timed from the start of the recording."""
+        self._write_line([round(time.time() - self.started, 6), kind, data])
+
+    def _write_line(self, value: object) -> None:
+        """Write and flush one JSON line; stop recording if the file fails."""
+        if self._file is None:
+            return
+        try:
+            self._file.write(json.dumps(value, ensure_ascii=False) + "\n")
+            self._file.flush()
+        except OSError as e:
+            logger.warning(f"Stopped recording to {self.path}: {e}")
+            self._file.close()
+            self._file = None
@@ -0,0 +1,201 @@
+"""Budget-aware condensing of long output: repeat collapsing and head/tail truncation."""
+
+import re
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Tuple
+
+from .ansi import strip_ansi
+from .models import CondenseReport
+
+# Rough bytes per token, for turning a token budget into a byte budget
+BYTES_PER_TOKEN = 4
+
+# Share of the budget spent on the start of the range; the rest keeps the end
+HEAD_FRACTION = 0.3
+
+_DIGITS = re.compile(r"\d+")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def similarity_key(line: str) -> str:
+    """
+    Key shared by near-identical lines.
+
+    Numbers are folded and punctuation (bar fill, brackets, spacing) is
+    ignored, so successive progress lines (``[=====>    ]  45% 1.2MB/s``)
+    share one key while lines with different words do not. Lines made only
+    of punctuation (``}``, ``)``) are their own key, so unrelated closers
+    are not taken for a run.
+    """
+    return _NON_WORD.sub(" ", _DIGITS.sub("#", line)).strip() or line
+
+
+def _size(text: str) -> int:
+    """UTF-8 size of a line including its newline."""
+    return (len(text) if text.isascii() else len(text.encode("utf-8"))) + 1
+
+
+class _HeadTail:
+    """Keeps the first and last entries that fit a byte budget."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.head_budget = int(max_bytes * HEAD_FRACTION)
+        self.tail_budget = max_bytes - self.head_budget
+        # Longer lines are cut so one line cannot take the whole tail
+        self.max_line = max(16, self.tail_budget // 2)
+        self.head: List[str] = []
+        self.head_bytes = 0
+        self.head_full = False
+        self.tail: Deque[Tuple[str, int, int, int]] = deque()
+        self.tail_bytes = 0
+        self.elided_lines = 0
+        self.elided_from: Optional[int] = None
+        self.elided_to: Optional[int] = None
+
+    def add(self, text: str, first: int, last: int) -> None:
+        """Add an entry standing for source lines ``first..last``."""
+        if len(text) > self.max_line:
+            text = f"{text[: self.max_line]}... [+{len(text) - self.max_line} chars]"
+        size = _size(text)
+
+        if not self.head_full:
+            if self.head_bytes + size <= self.head_budget:
+                self.head.append(text)
+                self.head_bytes += size
+                return
+            self.head_full = True
+
+        self.tail.append((text, first, last, size))
+        self.tail_bytes += size
+        while self.tail_bytes > self.tail_budget and self.tail:
+            _, dropped_first, dropped_last, dropped_size = self.tail.popleft()
+            self.tail_bytes -= dropped_size
+            self.elided_lines += dropped_last - dropped_first + 1
+            if self.elided_from is None:
+                self.elided_from = dropped_first
+            self.elided_to = dropped_last
+
+    def lines(self) -> List[str]:
+        """Head, an elision marker if anything was dropped, and tail."""
+        result = list(self.head)
+        if self.elided_lines:
+            result.append(
+                f"... [{self.elided_lines} lines elided: {self.elided_from}-{self.elided_to}, "
+                f"read them with offset={self.elided_from}] ..."
+            )
+        result.extend(entry[0] for entry in self.tail)
+        return result
+
+
+class _Condenser:
+    """Single pass over lines: fold repeat runs, then feed the head/tail budget."""
+
+    def __init__(self, max_bytes: int, collapse_repeats: bool) -> None:
+        self.budget = _HeadTail(max_bytes)
+        self.collapse_repeats = collapse_repeats
+        self.input_lines = 0
+        self.input_bytes = 0
+        self.collapsed_runs = 0
+        self.collapsed_lines = 0
+        self._key: Optional[str] = None
+        self._first = ""
+        self._second = ""
+        self._last = ""
+        self._start = 0
+        self._count = 0
+        self._identical = True
+
+    def feed(self, index: int, line: str) -> None:
+        self.input_lines += 1
+        self.input_bytes += _size(line)
+        line = strip_ansi(line)
+        if not self.collapse_repeats:
+            self.budget.add(line, index, index)
+            return
+
+        key = similarity_key(line)
+        if self._count and key == self._key:
+            self._count += 1
+            self._identical = self._identical and line == self._first
+            if self._count == 2:
+                self._second = line
+            self._last = line
+            return
+
+        self._flush()
+        self._key = key
+        self._first = self._last = line
+        self._start = index
+        self._count = 1
+        self._identical = True
+
+    def _flush(self) -> None:
+        """Emit the pending run."""
+        count, start = self._count, self._start
+        end = start + count - 1
+        if count == 0:
+            return
+        self.budget.add(self._first, start, start)
+        if count == 2:
+            self.budget.add(self._last, end, end)
+        elif count == 3 and not self._identical:
+            # A marker for a single line would hide it without saving anything
+            self.budget.add(self._second, start + 1, start + 1)
+            self.budget.add(self._last, end, end)
+        elif count > 2 and self._identical:
+            self.collapsed_runs += 1
+            self.collapsed_lines += count - 1
+            self.budget.add(
+                f"... [previous line repeated {count - 1} more times] ...", start + 1, end
+            )
+        elif count > 2:
+            self.collapsed_runs += 1
+            self.collapsed_lines += count - 2
+            self.budget.add(f"... [{count - 2} similar lines] ...", start + 1, end - 1)
+            self.budget.add(self._last, end, end)
+        self._count = 0
+
+    def finish(self) -> Tuple[List[str], CondenseReport]:
+        self._flush()
+        lines = self.budget.lines()
+        report = CondenseReport(
+            input_lines=self.input_lines,
+            input_bytes=self.input_bytes,
+            output_bytes=sum(_size(line) for line in lines),
+            collapsed_runs=self.collapsed_runs,
+            collapsed_lines=self.collapsed_lines,
+            elided_lines=self.budget.elided_lines,
+            elided_from=self.budget.elided_from,
+            elided_to=self.budget.elided_to,
+        )
+        return lines, report
+
+
+def condense_lines(
+    lines: Iterable[str],
+    max_bytes: int,
+    first_index: int = 0,
+    collapse_repeats: bool = True,
+) -> Tuple[List[str], CondenseReport]:
+    """
+    Condense output to fit a byte budget in one streaming pass.
+
+    Runs of identical or near-identical lines (progress bars, spinners,
+    carriage-return rewrites) are folded into counted summary lines. What is
+    left keeps its head and tail within ``max_bytes``; the middle is replaced
+    by a marker naming the elided line range, so it can be paged in later.
+    Memory stays proportional to the budget, not to the input.
+
+    Args:
+        lines: Lines to condense, in order.
+        max_bytes: Approximate size budget for the returned lines.
+        first_index: Absolute index of the first line, used in markers and the report.
+        collapse_repeats: Fold runs of similar lines.
+
+    Returns:
+        The condensed lines and a report of what was left out.
+    """
+    condenser = _Condenser(max_bytes, collapse_repeats)
+    for index, line in enumerate(lines, first_index):
+        condenser.feed(index, line)
+    return condenser.finish()
@@ -0,0 +1,185 @@
+"""Server configuration loaded from environment variables."""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .tmux_placement import PLACEMENT_POLICIES
+
+logger = logging.getLogger(__name__)
+
+ENV_PREFIX = "ITERM2_MCP_"
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting, falling back to the default on bad input."""
+    value = os.environ.get(ENV_PREFIX + name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {ENV_PREFIX}{name}={value!r}")
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting, falling back to the default on bad input."""
+    value = os.environ.get(ENV_PREFIX + name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {ENV_PREFIX}{name}={value!r}")
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting (1/true/yes/on)."""
+    value = os.environ.get(ENV_PREFIX + name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_str(name: str, default: str) -> str:
+    """Read a string setting; an empty value keeps the default."""
+    value = os.environ.get(ENV_PREFIX + name, "").strip()
+    return value or default
+
+
+def _env_path(name: str, default: str) -> str:
+    """Read a file path setting; an empty value or "none" disables it."""
+    value = os.environ.get(ENV_PREFIX + name)
+    if value is None:
+        return default
+    value = value.strip()
+    return "" if value.lower() == "none" else value
+
+
+def _env_choice(name: str, default: str, choices: Tuple[str, ...]) -> str:
+    """Read a string setting restricted to a set of choices."""
+    value = os.environ.get(ENV_PREFIX + name)
+    if value is None:
+        return default
+    value = value.strip().lower()
+    if value not in choices:
+        logger.warning(f"Ignoring invalid {ENV_PREFIX}{name}={value!r}")
+        return default
+    return value
+
+
+@dataclass
+class ServerConfig:
+    """Tunable server settings."""
+
+    # Idle reaping and memory budget
+    idle_timeout_seconds: float = 1800.0
+    reap_interval_seconds: float = 60.0
+    memory_budget_bytes: int = 64 * 1024 * 1024
+    terminate_idle_sessions: bool = False
+
+    # Output buffer compression
+    buffer_hot_lines: int = 5000
+    buffer_segment_lines: int = 1000
+    buffer_compression: str = "zlib"
+
+    # History lines of iTerm2-only sessions kept after a scrollback read, per session
+    scrollback_cache_lines: int = 20000
+
+    # Output processing (capture splitting, searches, summaries, condensed reads)
+    # covering at least offload_min_lines lines runs in a pool of offload_threads
+    # threads (0 keeps it on the event loop); searches of offload_process_min_lines
+    # or more run in offload_processes worker processes if set
+    offload_threads: int = 4
+    offload_min_lines: int = 20000
+    offload_processes: int = 0
+    offload_process_min_lines: int = 200000
+
+    # Startup: answer the MCP handshake while iTerm2 connects, instead of connecting
+    # first and exiting if iTerm2 is unavailable
+    fast_startup: bool = True
+
+    # MCP transport: "stdio" for a single client, "http" for many local clients
+    # (streamable HTTP and SSE on http_host:http_port, or on http_socket if set)
+    transport: str = "stdio"
+    http_host: str = "127.0.0.1"
+    http_port: int = 8765
+    http_socket: str = ""
+
+    # asciicast recordings of tmux sessions' raw output, one <session_id>.cast per
+    # session ("" disables); record_sessions records every tmux session by default
+    recording_dir: str = "~/.local/state/iterm2-mcp/recordings"
+    record_sessions: bool = False
+
+    # Journal of tracked sessions, re-adopted on restart ("" disables)
+    registry_path: str = "~/.local/state/iterm2-mcp/sessions.jsonl"
+
+    # tmux server placement: "default" uses the user's tmux server; "round_robin",
+    # "tenant" and "workload" spread sessions over dedicated -L servers
+    tmux_placement: str = "default"
+    tmux_socket_prefix: str = "iterm2-mcp"
+    tmux_max_sessions_per_server: int = 32
+
+    @classmethod
+    def from_env(cls) -> "ServerConfig":
+        """Build a config from ITERM2_MCP_* environment variables."""
+        defaults = cls()
+        return cls(
+            idle_timeout_seconds=_env_float("IDLE_TIMEOUT", defaults.idle_timeout_seconds),
+            reap_interval_seconds=_env_float("REAP_INTERVAL", defaults.reap_interval_seconds),
+            memory_budget_bytes=_env_int("MEMORY_BUDGET_BYTES", defaults.memory_budget_bytes),
+            terminate_idle_sessions=_env_bool(
+                "TERMINATE_IDLE", defaults.terminate_idle_sessions
+            ),
+            buffer_hot_lines=_env_int("BUFFER_HOT_LINES", defaults.buffer_hot_lines),
+            buffer_segment_lines=_env_int(
+                "BUFFER_SEGMENT_LINES", defaults.buffer_segment_lines
+            ),
+            buffer_compression=_env_choice(
+                "BUFFER_COMPRESSION", defaults.buffer_compression, ("zlib", "lzma", "none")
+            ),
+            scrollback_cache_lines=_env_int(
+                "SCROLLBACK_CACHE_LINES", defaults.scrollback_cache_lines
+            ),
+            offload_threads=_env_int("OFFLOAD_THREADS", defaults.offload_threads),
+            offload_min_lines=_env_int("OFFLOAD_MIN_LINES", defaults.offload_min_lines),
+            offload_processes=_env_int("OFFLOAD_PROCESSES", defaults.offload_processes),
+            offload_process_min_lines=_env_int(
+                "OFFLOAD_PROCESS_MIN_LINES", defaults.offload_process_min_lines
+            ),
+            fast_startup=_env_bool("FAST_STARTUP", defaults.fast_startup),
+            transport=_env_choice("TRANSPORT", defaults.transport, ("stdio", "http")),
+            http_host=_env_str("HTTP_HOST", defaults.http_host),
+            http_port=_env_int("HTTP_PORT", defaults.http_port),
+            http_socket=_env_path("HTTP_SOCKET", defaults.http_socket),
+            recording_dir=_env_path("RECORDING_DIR", defaults.recording_dir),
+            record_sessions=_env_bool("RECORD", defaults.record_sessions),
+            registry_path=_env_path("REGISTRY", defaults.registry_path),
+            tmux_placement=_env_choice(
+                "TMUX_PLACEMENT", defaults.tmux_placement, PLACEMENT_POLICIES
+            ),
+            tmux_socket_prefix=_env_str("TMUX_SOCKET_PREFIX", defaults.tmux_socket_prefix),
+            tmux_max_sessions_per_server=_env_int(
+                "TMUX_MAX_SESSIONS_PER_SERVER", defaults.tmux_max_sessions_per_server
+            ),
+        )
+
+
+# Global config instance
+_config: Optional[ServerConfig] = None
+
+
+def get_config() -> ServerConfig:
+    """
+    Get or load the global server configuration.
+
+    Returns:
+        ServerConfig: The global config instance.
+    """
+    global _config
+    if _config is None:
+        _config = ServerConfig.from_env()
+    return _config
@@ -0,0 +1,459 @@
+"""Recognize test and build tool output and keep structured run summaries."""
+
+import copy
+import re
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Type
+
+from .models import ErrorLocation, RunSummary
+
+# Failing test names kept per run
+MAX_FAILURES = 50
+
+_COUNT = re.compile(
+    r"(\d+) (passed|failed|errors?|skipped|ignored|xfailed|xpassed|todo|warnings?)"
+)
+
+
+class Extractor(ABC):
+    """
+    Base class for recognizers of one tool's output.
+
+    ``feed`` is called with every output line in order; an extractor starts a
+    run the first time it sees a line only its tool prints and keeps the
+    summary of its latest run up to date.
+    """
+
+    kind = ""
+
+    def __init__(self) -> None:
+        self.run: Optional[RunSummary] = None
+
+    @abstractmethod
+    def feed(self, index: int, line: str) -> None:
+        """Process one output line."""
+
+    def start_run(self, index: int) -> RunSummary:
+        """Start a new run at a buffer line."""
+        self.run = RunSummary(kind=self.kind, first_line=index, last_line=index)
+        return self.run
+
+    def current(self, index: int) -> RunSummary:
+        """The run a recognized line belongs to, started if needed."""
+        run = self.run if self.run is not None and not self.run.finished else None
+        if run is None:
+            run = self.start_run(index)
+        run.last_line = index
+        return run
+
+    def add_failure(self, run: RunSummary, name: str) -> None:
+        """Record a failing test name once."""
+        if name not in run.failures and len(run.failures) < MAX_FAILURES:
+            run.failures.append(name)
+
+    def add_error(
+        self,
+        run: RunSummary,
+        index: int,
+        message: str,
+        file: Optional[str] = None,
+        line_number: Optional[int] = None,
+        column: Optional[int] = None,
+        count: bool = True,
+    ) -> None:
+        """Count an error; the first one is kept with its location."""
+        if count:
+            run.errors += 1
+        if run.first_error is None:
+            run.first_error = ErrorLocation(
+                message=message.strip(),
+                line=index,
+                file=file,
+                line_number=line_number,
+                column=column,
+            )
+
+    def locate_error(
+        self, run: RunSummary, file: str, line_number: int, column: Optional[int] = None
+    ) -> None:
+        """Attach a location to the first error if it has none yet."""
+        error = run.first_error
+        if error is not None and error.file is None:
+            error.file, error.line_number, error.column = file, line_number, column
+
+
+_EXTRACTORS: List[Type[Extractor]] = []
+
+
+def register_extractor(cls: Type[Extractor]) -> Type[Extractor]:
+    """Class decorator adding an extractor to every new OutputSummarizer."""
+    _EXTRACTORS.append(cls)
+    return cls
+
+
+def _apply_counts(run: RunSummary, text: str) -> None:
+    """Set run counts from a tool's final tally (``3 failed, 10 passed, ...``)."""
+    for number, word in _COUNT.findall(text):
+        value = int(number)
+        if word == "passed":
+            run.passed = value
+        elif word == "failed":
+            run.failed = value
+        elif word in ("skipped", "ignored", "todo"):
+            run.skipped = value
+        elif word.startswith("error"):
+            run.errors = value
+        elif word.startswith("warning"):
+            run.warnings = value
+
+
+@register_extractor
+class PytestExtractor(Extractor):
+    """pytest, in default, verbose and quiet modes."""
+
+    kind = "pytest"
+
+    _START = re.compile(r"^=+ test session starts =+$")
+    _FINAL = re.compile(
+        r"^=*\s*((?:\d+ \w+(?:, )?)+)(?: in [\d.]+s.*?)?(?: \([\d:]+\))?\s*=*$"
+    )
+    _VERBOSE = re.compile(r"^(\S+::\S+)\s+(PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)\b")
+    _SHORT = re.compile(r"^(FAILED|ERROR) (\S+)(?: - (.*))?$")
+    _PROGRESS = re.compile(r"^(\S+\.py) ([.FEsxX]+)\s*(?:\[\s*\d+%\])?$")
+    _LOCATION = re.compile(r"^(\S+\.py):(\d+): (.*)$")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._detail: Optional[str] = None
+
+    def feed(self, index: int, line: str) -> None:
+        if line.startswith("="):
+            if self._START.match(line):
+                self.start_run(index)
+                return
+        if self.run is not None and " in " in line and line.rstrip("= ").endswith("s"):
+            match = self._FINAL.match(line)
+            if match and ("passed" in line or "failed" in line or "error" in line):
+                run = self.current(index)
+                _apply_counts(run, match.group(1))
+                run.finished = True
+                run.result_line = line.strip("= ")
+                return
+
+        if "::" in line:
+            match = self._VERBOSE.match(line)
+            if match:
+                run = self.current(index)
+                outcome = match.group(2)
+                if outcome in ("PASSED", "XPASS"):
+                    run.passed += 1
+                elif outcome in ("SKIPPED", "XFAIL"):
+                    run.skipped += 1
+                else:
+                    run.failed += 1
+                    self.add_failure(run, match.group(1))
+                return
+            match = self._SHORT.match(line)
+            if match and self.run is not None:
+                run = self.current(index)
+                self.add_failure(run, match.group(2))
+                if match.group(3):
+                    self.add_error(run, index, match.group(3), count=False)
+                return
+
+        if ".py" not in line:
+            if line.startswith("E ") and self.run is not None and self._detail is None:
+                self._detail = line[1:].strip()
+            return
+        match = self._PROGRESS.match(line)
+        if match:
+            run = self.current(index)
+            marks = match.group(2)
+            run.passed += marks.count(".")
+            run.failed += marks.count("F")
+            run.errors += marks.count("E")
+            run.skipped += marks.count("s") + marks.count("x")
+            return
+        match = self._LOCATION.match(line)
+        if match and self.run is not None:
+            run = self.current(index)
+            message = self._detail or match.group(3)
+            self._detail = None
+            self.add_error(
+                run, index, message, match.group(1), int(match.group(2)), count=False
+            )
+
+
+@register_extractor
+class JestExtractor(Extractor):
+    """jest (and npm's own errors around it)."""
+
+    kind = "jest"
+
+    _FILE = re.compile(r"^\s*(PASS|FAIL)\s+(\S+)")
+    _TEST = re.compile(r"^\s*● (.+)$")
+    _TALLY = re.compile(r"^Tests:\s+(.*)$")
+    _FRAME = re.compile(r"^\s+at .*?\(?([^\s()]+\.[cm]?[jt]sx?):(\d+):(\d+)\)?$")
+    _NPM = re.compile(r"^npm (?:ERR!|error) (.*)$")
+
+    def feed(self, index: int, line: str) -> None:
+        if "●" in line:
+            match = self._TEST.match(line)
+            if match:
+                run = self.current(index)
+                name = match.group(1).strip()
+                if name.startswith("Console"):
+                    return
+                if name == "Test suite failed to run":
+                    self.add_error(run, index, name)
+                else:
+                    self.add_failure(run, name)
+                    if run.first_error is None:
+                        self.add_error(run, index, name, count=False)
+            return
+        if line.startswith("Tests:"):
+            match = self._TALLY.match(line)
+            if match and self.run is not None:
+                run = self.current(index)
+                _apply_counts(run, match.group(1))
+                run.finished = True
+                run.result_line = line.strip()
+            return
+        if "PASS" in line or "FAIL" in line:
+            match = self._FILE.match(line)
+            if match and match.group(2).endswith(("js", "ts", "jsx", "tsx")):
+                self.current(index)
+            return
+        if line.startswith("npm "):
+            match = self._NPM.match(line)
+            if match and self.run is not None:
+                # npm reports after jest's tally, so this belongs to the finished run too
+                self.run.last_line = index
+                self.add_error(self.run, index, match.group(1))
+            return
+        if " at " in line and self.run is not None and "node_modules" not in line:
+            match = self._FRAME.match(line)
+            if match:
+                self.locate_error(
+                    self.run, match.group(1), int(match.group(2)), int(match.group(3))
+                )
+
+
+@register_extractor
+class CargoExtractor(Extractor):
+    """cargo build and cargo test."""
+
+    kind = "cargo"
+
+    _ERROR = re.compile(r"^error(?:\[E\d+\])?: (.+)$")
+    _ARROW = re.compile(r"^\s*--> (.+):(\d+):(\d+)$")
+    _RUNNING = re.compile(r"^running \d+ tests?$")
+    _TEST = re.compile(r"^test (\S+) \.\.\. (ok|FAILED|ignored)")
+    _RESULT = re.compile(
+        r"^test result: (?:ok|FAILED)\. (\d+) passed; (\d+) failed; (\d+) ignored"
+    )
+    _PANIC = re.compile(r"panicked at (?:'(.*)', )?([^\s:']+):(\d+):(\d+)")
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Counts of the test binary running now, replaced by its result line
+        self._pending = [0, 0, 0]
+
+    def feed(self, index: int, line: str) -> None:
+        if line.startswith("test "):
+            match = self._TEST.match(line)
+            if match:
+                run = self.current(index)
+                outcome = match.group(2)
+                if outcome == "ok":
+                    run.passed += 1
+                    self._pending[0] += 1
+                elif outcome == "FAILED":
+                    run.failed += 1
+                    self._pending[1] += 1
+                    self.add_failure(run, match.group(1))
+                else:
+                    run.skipped += 1
+                    self._pending[2] += 1
+                return
+            match = self._RESULT.match(line)
+            if match:
+                run = self.current(index)
+                passed, failed, ignored = (int(value) for value in match.groups())
+                run.passed += passed - self._pending[0]
+                run.failed += failed - self._pending[1]
+                run.skipped += ignored - self._pending[2]
+                self._pending = [0, 0, 0]
+                run.result_line = line.strip()
+            return
+        if line.startswith("running "):
+            if self._RUNNING.match(line):
+                self.current(index)
+                self._pending = [0, 0, 0]
+            return
+        if line.lstrip().startswith("Compiling ") and self.run is None:
+            self.start_run(index)
+            return
+        if line.startswith("error"):
+            match = self._ERROR.match(line)
+            if match:
+                run = self.current(index)
+                self.add_error(run, index, match.group(1))
+                if match.group(1).startswith(("could not compile", "test failed")):
+                    run.finished = True
+                    run.result_line = line.strip()
+            return
+        if line.startswith("warning: "):
+            if self.run is not None:
+                self.current(index).warnings += 1
+            return
+        if "-->" in line and self.run is not None:
+            match = self._ARROW.match(line)
+            if match:
+                self.locate_error(
+                    self.run, match.group(1), int(match.group(2)), int(match.group(3))
+                )
+            return
+        if "panicked at" in line:
+            match = self._PANIC.search(line)
+            if match:
+                run = self.current(index)
+                self.add_error(
+                    run,
+                    index,
+                    match.group(1) or line.strip(),
+                    match.group(2),
+                    int(match.group(3)),
+                    int(match.group(4)),
+                    count=False,
+                )
+
+
+@register_extractor
+class MakeExtractor(Extractor):
+    """make with gcc/clang style compiler diagnostics."""
+
+    kind = "make"
+
+    _DIAGNOSTIC = re.compile(r"^(\S[^:]*):(\d+):(?:(\d+):)? (fatal error|error|warning): (.+)$")
+    _MAKE = re.compile(r"^g?make(?:\[\d+\])?: \*\*\* (.+)$")
+    _LINKER = re.compile(r"^(?:collect2|ld|/usr/bin/ld)(?:: error)?: (.+)$")
+
+    def feed(self, index: int, line: str) -> None:
+        if "error" in line or "warning:" in line:
+            match = self._DIAGNOSTIC.match(line)
+            if match:
+                run = self.current(index)
+                if match.group(4) == "warning":
+                    run.warnings += 1
+                    return
+                column = int(match.group(3)) if match.group(3) else None
+                self.add_error(
+                    run, index, match.group(5), match.group(1), int(match.group(2)), column
+                )
+                return
+        if "***" in line:
+            match = self._MAKE.match(line)
+            if match:
+                run = self.current(index)
+                self.add_error(run, index, match.group(1))
+                run.finished = True
+                run.result_line = line.strip()
+                return
+        if line.startswith(("collect2", "ld:", "/usr/bin/ld")):
+            match = self._LINKER.match(line)
+            if match:
+                self.add_error(self.current(index), index, match.group(1))
+
+
+@register_extractor
+class GoTestExtractor(Extractor):
+    """go test and go build."""
+
+    kind = "go"
+
+    _RUN = re.compile(r"^=== RUN\s+(\S+)")
+    _RESULT = re.compile(r"^\s*--- (PASS|FAIL|SKIP): (\S+)")
+    _PACKAGE = re.compile(r"^(ok|FAIL)\s+(\S+)\s+(?:[\d.]+s|\(cached\))")
+    _LOCATION = re.compile(r"^\s+(\S+\.go):(\d+): (.+)$")
+    _BUILD = re.compile(r"^(\S+\.go):(\d+):(\d+): (.+)$")
+
+    def feed(self, index: int, line: str) -> None:
+        if line.startswith("=== "):
+            if self._RUN.match(line):
+                self.current(index)
+            return
+        if "--- " in line:
+            match = self._RESULT.match(line)
+            if match:
+                run = self.current(index)
+                outcome = match.group(1)
+                if outcome == "PASS":
+                    run.passed += 1
+                elif outcome == "SKIP":
+                    run.skipped += 1
+                else:
+                    run.failed += 1
+                    self.add_failure(run, match.group(2))
+                return
+        if line.startswith(("ok", "FAIL")):
+            match = self._PACKAGE.match(line)
+            if match:
+                run = self.current(index)
+                run.result_line = line.strip()
+            return
+        if ".go:" not in line:
+            return
+        match = self._LOCATION.match(line)
+        if match and self.run is not None:
+            self.add_error(
+                self.current(index),
+                index,
+                match.group(3),
+                match.group(1),
+                int(match.group(2)),
+                count=False,
+            )
+            return
+        match = self._BUILD.match(line)
+        if match:
+            self.add_error(
+                self.current(index),
+                index,
+                match.group(4),
+                match.group(1),
+                int(match.group(2)),
+                int(match.group(3)),
+            )
+
+
+class OutputSummarizer:
+    """
+    Runs every registered extractor over a session's output, incrementally.
+
+    Lines are fed once, in order; ``next_line`` is where the next feed resumes.
+    """
+
+    def __init__(
+        self,
+        from_line: int = 0,
+        extractors: Optional[List[Callable[[], Extractor]]] = None,
+    ) -> None:
+        self.from_line = from_line
+        self.next_line = from_line
+        self.extractors = [factory() for factory in (extractors or _EXTRACTORS)]
+
+    def feed(self, index: int, line: str) -> None:
+        """Process one output line."""
+        for extractor in self.extractors:
+            extractor.feed(index, line)
+        self.next_line = index + 1
+
+    def runs(self) -> List[RunSummary]:
+        """Latest run of each recognized tool, most recently active last."""
+        runs = [e.run for e in self.extractors if e.run is not None]
+        return sorted(runs, key=lambda run: run.last_line)
+
+    def copy(self) -> "OutputSummarizer":
+        """Independent copy, for feeding lines that may still change."""
+        return copy.deepcopy(self)
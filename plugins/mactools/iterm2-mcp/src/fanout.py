@@ -0,0 +1,238 @@
+"""Run one command across many sessions concurrently."""
+
+import asyncio
+import logging
+import time
+from typing import List, Optional
+from uuid import uuid4
+
+from .interaction import ExpectBranch, InteractionRunner, ScriptStep, compile_script
+from .models import FanoutResult, SessionState
+from .progress import report_progress, set_sender
+from .session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+# Marker printed after the command so its completion and exit status show up in the output
+SENTINEL_PREFIX = "__mcp_done_"
+
+
+def _sentinel_command(command: str, token: str) -> str:
+    """Append a printf reporting the exit status of the command line."""
+    return f"{command}; printf '\\n{SENTINEL_PREFIX}{token}_%s__\\n' $?"
+
+
+async def run_command(
+    manager: SessionManager,
+    session: SessionState,
+    command: str,
+    timeout: float,
+    tail_lines: int,
+) -> FanoutResult:
+    """
+    Run a command line in a session and wait for it to finish.
+
+    The command is followed by an exit-status sentinel, so completion does not
+    depend on output going quiet.
+
+    Args:
+        manager: Session manager owning the session.
+        session: Session to run the command in.
+        command: Command line to run.
+        timeout: Maximum seconds to wait.
+        tail_lines: Output lines to keep.
+
+    Returns:
+        FanoutResult for the session.
+    """
+    token = uuid4().hex[:8]
+    step = ScriptStep(
+        send=_sentinel_command(command, token),
+        expect=[ExpectBranch(pattern=rf"^{SENTINEL_PREFIX}{token}_(\d+)__$")],
+        timeout=timeout,
+    )
+    runner = InteractionRunner(manager, session, compile_script([step]), timeout=timeout)
+    # A few spare lines cover the echoed command line and the sentinel itself
+    result = await runner.run(max_output_lines=tail_lines + 3)
+    if result is None:
+        return FanoutResult(
+            session_id=str(session.session_id),
+            completed=False,
+            exit_status=None,
+            elapsed_seconds=0.0,
+            output_tail=[],
+            error="Session went away",
+        )
+
+    exit_status: Optional[int] = None
+    error = result.error
+    timed_out = False
+    if result.completed and runner.last_match is not None:
+        exit_status = int(runner.last_match.group(1))
+    elif any(entry.action == "timeout" for entry in result.transcript):
+        error = f"Did not finish within {timeout:g}s"
+        timed_out = True
+
+    return FanoutResult(
+        session_id=str(session.session_id),
+        completed=result.completed,
+        exit_status=exit_status,
+        elapsed_seconds=result.elapsed_seconds,
+        output_tail=_strip_sentinel(result.output, token)[-tail_lines:] if tail_lines else [],
+        error=error,
+        timed_out=timed_out,
+    )
+
+
+def _strip_sentinel(lines: List[str], token: str) -> List[str]:
+    """
+    Reduce captured lines to the command's own output.
+
+    Drops the echoed command line (which may wrap over several screen lines and
+    ends with the token), and everything from the printed sentinel on (the
+    blank line its leading newline can leave, and the next prompt).
+    """
+    sentinel = f"{SENTINEL_PREFIX}{token}_"
+    echo_end = -1
+    for index, line in enumerate(lines):
+        if token in line and not line.startswith(sentinel):
+            echo_end = index
+
+    output: List[str] = []
+    for line in lines[echo_end + 1:]:
+        if line.startswith(sentinel):
+            if output and not output[-1].strip():
+                output.pop()
+            break
+        output.append(line)
+    return output
+
+
+async def _run_until_idle(
+    manager: SessionManager,
+    session: SessionState,
+    command: str,
+    timeout: float,
+    quiet_seconds: float,
+    tail_lines: int,
+) -> FanoutResult:
+    """Send the command and wait for the output to go quiet."""
+    session_id = str(session.session_id)
+    started = time.monotonic()
+    previous = session.commands.commands[-1] if session.commands.commands else None
+    first_line = session.buffer_first_line + max(0, len(session.output_buffer) - 1)
+
+    if not await manager.send_to_session(session.session_id, command):
+        return FanoutResult(
+            session_id=session_id,
+            completed=False,
+            exit_status=None,
+            elapsed_seconds=time.monotonic() - started,
+            output_tail=[],
+            error="Failed to send command",
+        )
+
+    idle = await manager.wait_for_idle(session.session_id, quiet_seconds, timeout)
+    if idle is None:
+        return FanoutResult(
+            session_id=session_id,
+            completed=False,
+            exit_status=None,
+            elapsed_seconds=time.monotonic() - started,
+            output_tail=[],
+            error="Session went away",
+        )
+
+    # Shell integration, when installed, knows the exit status
+    exit_status: Optional[int] = None
+    records = session.commands.commands
+    if records and records[-1] is not previous and records[-1].finished_at is not None:
+        exit_status = records[-1].exit_status
+
+    buffer = session.output_buffer
+    end = len(buffer)
+    start = max(0, first_line - session.buffer_first_line, end - tail_lines)
+    output_tail = buffer.read_range(start, end) if tail_lines else []
+    return FanoutResult(
+        session_id=session_id,
+        completed=idle.idle,
+        exit_status=exit_status,
+        elapsed_seconds=time.monotonic() - started,
+        output_tail=output_tail,
+        error=None if idle.idle else f"Still printing after {timeout:g}s",
+    )
+
+
+async def run_on_sessions(
+    manager: SessionManager,
+    sessions: List[SessionState],
+    command: str,
+    max_concurrency: int = 8,
+    timeout: float = 300.0,
+    detect_exit_status: bool = True,
+    quiet_seconds: float = 2.0,
+    tail_lines: int = 20,
+) -> List[FanoutResult]:
+    """
+    Send a command to many sessions at once and collect per-session results.
+
+    With ``detect_exit_status`` a ``printf`` of ``$?`` is appended to the
+    command line (POSIX shells), which gives both a reliable completion signal
+    and the exit status. Otherwise completion means the output went quiet for
+    ``quiet_seconds``, and the exit status is only known for sessions with
+    shell integration.
+
+    Args:
+        manager: Session manager owning the sessions.
+        sessions: Sessions to run the command in.
+        command: Command line to run.
+        max_concurrency: Maximum sessions driven at the same time.
+        timeout: Maximum seconds to wait for each session.
+        detect_exit_status: Append an exit-status sentinel to the command.
+        quiet_seconds: Quiet period that counts as done without the sentinel.
+        tail_lines: Output lines to keep per session.
+
+    Returns:
+        One FanoutResult per session, in the order given.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(session: SessionState) -> FanoutResult:
+        # Progress is reported per finished session, not per script step
+        set_sender(None)
+        async with semaphore:
+            session.touch()
+            try:
+                if detect_exit_status:
+                    return await run_command(
+                        manager, session, command, timeout, tail_lines
+                    )
+                return await _run_until_idle(
+                    manager, session, command, timeout, quiet_seconds, tail_lines
+                )
+            except Exception as e:
+                logger.error(f"Error running command in session {session.session_id}: {e}")
+                return FanoutResult(
+                    session_id=str(session.session_id),
+                    completed=False,
+                    exit_status=None,
+                    elapsed_seconds=0.0,
+                    output_tail=[],
+                    error=str(e),
+                )
+
+    tasks = [asyncio.ensure_future(run_one(session)) for session in sessions]
+    try:
+        for finished, task in enumerate(asyncio.as_completed(tasks), 1):
+            result = await task
+            await report_progress(
+                finished,
+                len(tasks),
+                f"{finished}/{len(tasks)} sessions finished "
+                f"(last: {result.session_id[:8]}, exit status {result.exit_status})",
+            )
+    finally:
+        # Only unfinished tasks are affected, if the caller was cancelled
+        for task in tasks:
+            task.cancel()
+    return [task.result() for task in tasks]
@@ -0,0 +1,132 @@
+"""Local HTTP transport: streamable HTTP and SSE endpoints sharing one session table."""
+
+import logging
+import os
+import socket
+import stat
+from typing import Any, Awaitable, Callable, List, Optional
+
+from mcp.server import Server
+
+logger = logging.getLogger(__name__)
+
+# Endpoint paths: streamable HTTP, and the legacy SSE stream with its POST endpoint
+STREAMABLE_HTTP_PATH = "/mcp"
+SSE_PATH = "/sse"
+SSE_MESSAGES_PATH = "/messages/"
+
+# Hosts that only accept connections from this machine
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# Signature of an ASGI application
+ASGIApp = Callable[[Any, Any, Any], Awaitable[None]]
+
+
+class _Endpoint:
+    """Wrap an ASGI callable so Starlette routes requests to it unchanged."""
+
+    def __init__(self, handler: ASGIApp) -> None:
+        self._handler = handler
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        await self._handler(scope, receive, send)
+
+
+def _allowed_hosts(host: str) -> List[str]:
+    """Host headers accepted by DNS rebinding protection."""
+    hosts = ["localhost", "127.0.0.1:*", "localhost:*", "[::1]:*"]
+    if host not in LOOPBACK_HOSTS:
+        hosts.append(f"{host}:*")
+    return hosts
+
+
+def _bind_unix_socket(path: str) -> socket.socket:
+    """Bind a Unix socket only the current user can connect to."""
+    if os.path.exists(path):
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise RuntimeError(f"{path} exists and is not a socket")
+        # Left behind by a previous server that did not shut down cleanly
+        os.unlink(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        sock.bind(path)
+    finally:
+        os.umask(umask)
+    return sock
+
+
+async def serve_http(
+    server: Server, host: str, port: int, unix_socket: Optional[str] = None
+) -> None:
+    """
+    Serve MCP over HTTP until the process is stopped.
+
+    Every client gets its own MCP session on the shared ``server``, so all of
+    them see the same sessions, jobs and workers. Two transports are offered:
+    streamable HTTP at ``/mcp`` and the older SSE transport at ``/sse``.
+
+    Args:
+        server: MCP server whose handlers answer the requests.
+        host: Interface to listen on; anything but a loopback address exposes
+            the terminals to the network.
+        port: TCP port to listen on.
+        unix_socket: Listen on this Unix socket path instead of TCP.
+    """
+    # Imported here so the stdio transport does not pay for the web stack
+    import uvicorn
+    from mcp.server.sse import SseServerTransport
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from mcp.server.transport_security import TransportSecuritySettings
+    from starlette.applications import Starlette
+    from starlette.routing import Mount, Route
+
+    security = TransportSecuritySettings(
+        enable_dns_rebinding_protection=True,
+        allowed_hosts=_allowed_hosts(host),
+        allowed_origins=["http://127.0.0.1:*", "http://localhost:*", "http://[::1]:*"],
+    )
+    sessions = StreamableHTTPSessionManager(app=server, security_settings=security)
+    sse = SseServerTransport(SSE_MESSAGES_PATH, security_settings=security)
+
+    async def handle_sse(scope: Any, receive: Any, send: Any) -> None:
+        async with sse.connect_sse(scope, receive, send) as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+
+    web_app = Starlette(
+        routes=[
+            Route(STREAMABLE_HTTP_PATH, endpoint=_Endpoint(sessions.handle_request)),
+            Route(SSE_PATH, endpoint=_Endpoint(handle_sse), methods=["GET"]),
+            Mount(SSE_MESSAGES_PATH, app=sse.handle_post_message),
+        ],
+        lifespan=lambda _: sessions.run(),
+    )
+
+    config = uvicorn.Config(
+        web_app,
+        host=host,
+        port=port,
+        log_config=None,
+        access_log=False,
+        timeout_graceful_shutdown=5,
+    )
+    http_server = uvicorn.Server(config)
+
+    if unix_socket:
+        path = os.path.expanduser(unix_socket)
+        sock = _bind_unix_socket(path)
+        logger.info(f"Serving MCP over HTTP on unix:{path}")
+        try:
+            await http_server.serve(sockets=[sock])
+        finally:
+            sock.close()
+            if os.path.exists(path):
+                os.unlink(path)
+        return
+
+    if host not in LOOPBACK_HOSTS:
+        logger.warning(f"HTTP transport listens on {host}, reachable from other machines")
+    logger.info(f"Serving MCP over HTTP on http://{host}:{port}{STREAMABLE_HTTP_PATH}")
+    await http_server.serve()
@@ -0,0 +1,353 @@
+"""Expect-style scripted interaction with a session."""
+
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Tuple
+from uuid import UUID
+
+from .models import InteractionResult, SessionState, TranscriptEntry
+from .progress import report_progress
+from .session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+# Special goto target that stops the script successfully
+END_LABEL = "end"
+
+# on_timeout values besides a step label
+ON_TIMEOUT_FAIL = "fail"
+ON_TIMEOUT_CONTINUE = "continue"
+
+
+@dataclass
+class ExpectBranch:
+    """A pattern to wait for and what to do when it shows up first."""
+
+    pattern: str
+    send: Optional[str] = None
+    submit: bool = True
+    goto: Optional[str] = None
+    ignore_case: bool = False
+
+
+@dataclass
+class ScriptStep:
+    """
+    One step of an interaction script.
+
+    A step sends ``send`` (if set), then waits for the first of its ``expect``
+    branches to match (if any). Without a matching branch ``goto``, execution
+    continues with the next step.
+    """
+
+    label: Optional[str] = None
+    send: Optional[str] = None
+    submit: bool = True
+    expect: List[ExpectBranch] = field(default_factory=list)
+    timeout: float = 10.0
+    on_timeout: str = ON_TIMEOUT_FAIL
+
+
+@dataclass
+class _CompiledScript:
+    steps: List[ScriptStep]
+    labels: Dict[str, int]
+    patterns: Dict[Tuple[int, int], Pattern[str]]
+
+
+def compile_script(steps: List[ScriptStep]) -> _CompiledScript:
+    """
+    Validate a script and compile its patterns.
+
+    Args:
+        steps: Script steps in order.
+
+    Returns:
+        The compiled script.
+
+    Raises:
+        ValueError: If a step is empty or refers to an unknown label.
+        re.error: If a pattern is not a valid regular expression.
+    """
+    labels: Dict[str, int] = {}
+    for index, step in enumerate(steps):
+        if step.label is None:
+            continue
+        if step.label in labels or step.label in (
+            END_LABEL,
+            ON_TIMEOUT_FAIL,
+            ON_TIMEOUT_CONTINUE,
+        ):
+            raise ValueError(f"Duplicate or reserved label {step.label!r}")
+        labels[step.label] = index
+
+    patterns: Dict[Tuple[int, int], Pattern[str]] = {}
+    for index, step in enumerate(steps):
+        if step.send is None and not step.expect:
+            raise ValueError(f"Step {index} has neither send nor expect")
+        if step.on_timeout not in (ON_TIMEOUT_FAIL, ON_TIMEOUT_CONTINUE) and (
+            step.on_timeout not in labels
+        ):
+            raise ValueError(
+                f"Step {index} on_timeout refers to unknown label {step.on_timeout!r}"
+            )
+        for branch_index, branch in enumerate(step.expect):
+            if branch.goto is not None and branch.goto != END_LABEL and branch.goto not in labels:
+                raise ValueError(f"Step {index} goto refers to unknown label {branch.goto!r}")
+            flags = re.IGNORECASE if branch.ignore_case else 0
+            patterns[(index, branch_index)] = re.compile(branch.pattern, flags | re.MULTILINE)
+
+    return _CompiledScript(steps=steps, labels=labels, patterns=patterns)
+
+
+class InteractionRunner:
+    """
+    Runs a compiled script against one session.
+
+    Output is matched from a cursor that starts at the end of the output
+    present when the script starts and moves past each match, like expect's
+    buffer: text matched once is never matched again. Waiting is driven by the
+    session's output notifications, so an idle expect costs no captures.
+    """
+
+    def __init__(
+        self,
+        manager: SessionManager,
+        session: SessionState,
+        script: _CompiledScript,
+        timeout: float = 120.0,
+        max_steps: int = 200,
+    ) -> None:
+        self.manager = manager
+        self.session = session
+        self.script = script
+        self.timeout = timeout
+        self.max_steps = max_steps
+        self.transcript: List[TranscriptEntry] = []
+        self.last_match: Optional[re.Match] = None
+        self._started = 0.0
+        self._steps_run = 0
+        # Where matching resumes, numbered like the session's reads (buffer_first_line on)
+        self._cursor_line = 0
+        self._cursor_column = 0
+        self._searched_version = -1
+
+    async def run(self, max_output_lines: int = 200) -> Optional[InteractionResult]:
+        """
+        Execute the script.
+
+        Args:
+            max_output_lines: Maximum output lines to return (the last ones are kept).
+
+        Returns:
+            InteractionResult, or None if the session went away before starting.
+        """
+        self._started = time.monotonic()
+        if not await self.manager.refresh_output(self.session):
+            return None
+        self._move_cursor_to_end()
+        first_line = self._cursor_line
+
+        error = await self._execute()
+
+        buffer = self.session.output_buffer
+        end = len(buffer)
+        start = max(first_line - self.session.buffer_first_line, end - max_output_lines)
+        output = buffer.read_range(max(0, start), end)
+        return InteractionResult(
+            completed=error is None,
+            steps_run=self._steps_run,
+            elapsed_seconds=self._elapsed(),
+            transcript=self.transcript,
+            output=output,
+            session_id=str(self.session.session_id),
+            error=error,
+        )
+
+    async def _execute(self) -> Optional[str]:
+        """Walk the script; return an error message, or None on success."""
+        steps = self.script.steps
+        index = 0
+        while index < len(steps):
+            if self._steps_run >= self.max_steps:
+                return f"Stopped after {self.max_steps} steps (loop in script?)"
+            self._steps_run += 1
+            step = steps[index]
+            next_index = index + 1
+
+            if step.send is not None:
+                if not await self._send(index, step.send, step.submit):
+                    return f"Step {index}: failed to send text"
+
+            if step.expect:
+                remaining = self.timeout - self._elapsed()
+                if remaining <= 0:
+                    return f"Script timed out after {self.timeout:g}s"
+                matched = await self._expect(index, min(step.timeout, remaining))
+                if self.session.session_id not in self.manager.sessions:
+                    return f"Step {index}: session went away"
+
+                if matched is None:
+                    patterns = ", ".join(repr(b.pattern) for b in step.expect)
+                    self._record(index, "timeout", f"no match for {patterns}")
+                    if step.on_timeout == ON_TIMEOUT_FAIL:
+                        return f"Step {index}: timed out waiting for {patterns}"
+                    if step.on_timeout != ON_TIMEOUT_CONTINUE:
+                        next_index = self.script.labels[step.on_timeout]
+                else:
+                    branch = step.expect[matched]
+                    if branch.send is not None:
+                        if not await self._send(index, branch.send, branch.submit):
+                            return f"Step {index}: failed to send text"
+                    if branch.goto == END_LABEL:
+                        return None
+                    if branch.goto is not None:
+                        next_index = self.script.labels[branch.goto]
+
+            if self.transcript:
+                entry = self.transcript[-1]
+                await report_progress(
+                    self._steps_run,
+                    message=f"Step {entry.step} {entry.action}: {entry.detail!r}",
+                )
+            index = next_index
+        return None
+
+    async def _send(self, step: int, text: str, submit: bool) -> bool:
+        """Send text and record it."""
+        if submit and not text.endswith("\n"):
+            text += "\n"
+        self._record(step, "send", text)
+        return await self.manager.send_to_session(self.session.session_id, text, submit=submit)
+
+    async def _expect(self, step: int, timeout: float) -> Optional[int]:
+        """
+        Wait for the first branch of a step to match.
+
+        Returns:
+            Index of the matching branch, or None on timeout or if the session is gone.
+        """
+        deadline = time.monotonic() + timeout
+        self._searched_version = -1
+        while True:
+            if not await self.manager.refresh_output(self.session):
+                return None
+            matched = self._search(step)
+            if matched is not None:
+                return matched
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await self.manager.wait_for_output(self.session, remaining)
+            if self.session.session_id not in self.manager.sessions:
+                return None
+
+    def _search(self, step: int) -> Optional[int]:
+        """Match the step's branches against output past the cursor."""
+        buffer = self.session.output_buffer
+        if buffer.version == self._searched_version:
+            return None
+        self._searched_version = buffer.version
+
+        text = self._pending_text()
+        best: Optional[Tuple[int, int, re.Match]] = None
+        for branch_index in range(len(self.script.steps[step].expect)):
+            match = self.script.patterns[(step, branch_index)].search(text)
+            if match and (best is None or match.start() < best[0]):
+                best = (match.start(), branch_index, match)
+        if best is None:
+            return None
+
+        _, branch_index, match = best
+        self.last_match = match
+        self._advance_cursor(text, match.end())
+        self._record(step, "match", match.group(0))
+        return branch_index
+
+    def _pending_text(self) -> str:
+        """Output from the cursor to the end of the buffer."""
+        buffer = self.session.output_buffer
+        origin = self.session.buffer_first_line
+        end = len(buffer)
+        if self._cursor_line >= origin + end:
+            # The buffer was cleared or shrank; start over from what is there
+            self._cursor_line = origin + max(0, end - 1)
+            self._cursor_column = 0
+        elif self._cursor_line < origin:
+            # Scrolled off an iTerm2-only session's screen; start at its top
+            self._cursor_line = origin
+            self._cursor_column = 0
+        lines = buffer.read_range(self._cursor_line - origin, end)
+        if lines:
+            lines[0] = lines[0][self._cursor_column:]
+        return "\n".join(lines)
+
+    def _advance_cursor(self, text: str, offset: int) -> None:
+        """Move the cursor to an offset of the text returned by _pending_text."""
+        newlines = text.count("\n", 0, offset)
+        if newlines:
+            self._cursor_line += newlines
+            self._cursor_column = offset - text.rfind("\n", 0, offset) - 1
+        else:
+            self._cursor_column += offset
+
+    def _move_cursor_to_end(self) -> None:
+        """Place the cursor after the last character of the current output."""
+        buffer = self.session.output_buffer
+        end = len(buffer)
+        if end == 0:
+            self._cursor_line = self.session.buffer_first_line
+            self._cursor_column = 0
+            return
+        self._cursor_line = self.session.buffer_first_line + end - 1
+        self._cursor_column = len(buffer[end - 1])
+
+    def _record(self, step: int, action: str, detail: str) -> None:
+        self.transcript.append(
+            TranscriptEntry(
+                step=step, action=action, detail=detail, elapsed_seconds=self._elapsed()
+            )
+        )
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+
+async def run_interaction(
+    manager: SessionManager,
+    session_id: UUID,
+    steps: List[ScriptStep],
+    timeout: float = 120.0,
+    max_steps: int = 200,
+    max_output_lines: int = 200,
+) -> Optional[InteractionResult]:
+    """
+    Run an expect/send script against a session.
+
+    Args:
+        manager: Session manager owning the session.
+        session_id: Session UUID.
+        steps: Script steps.
+        timeout: Maximum seconds for the whole script.
+        max_steps: Maximum steps executed, guarding against goto loops.
+        max_output_lines: Maximum output lines to return.
+
+    Returns:
+        InteractionResult, or None if the session was not found.
+
+    Raises:
+        ValueError: If the script is invalid.
+        re.error: If a pattern is not a valid regular expression.
+    """
+    script = compile_script(steps)
+    session = manager.get_session_state(session_id)
+    if not session:
+        logger.error(f"Session not found: {session_id}")
+        return None
+    session.touch()
+
+    runner = InteractionRunner(manager, session, script, timeout=timeout, max_steps=max_steps)
+    return await runner.run(max_output_lines=max_output_lines)
@@ -1,21 +1,58 @@
 """iTerm2 API controller for creating and managing sessions."""
 
 import asyncio
+import contextlib
 import logging
-from typing import Optional
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
 
-import iterm2
+# iterm2 (and its protobuf and websockets stack) is imported on first connect,
+# so the MCP handshake does not wait for it
+if TYPE_CHECKING:
+    import iterm2
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Seconds between health probes of an idle connection, and how long a probe may take
+PROBE_INTERVAL_SECONDS = 5.0
+PROBE_TIMEOUT_SECONDS = 2.0
+
+# Reconnect backoff: first retry delay, doubling up to the maximum
+RECONNECT_INITIAL_DELAY = 0.05
+RECONNECT_MAX_DELAY = 10.0
+
+# How long a call made while disconnected waits for the reconnect
+CALL_WAIT_SECONDS = 10.0
+
 
 class ITerm2Controller:
-    """Wrapper around iTerm2 Python API."""
+    """
+    Wrapper around iTerm2 Python API.
+
+    A supervisor task watches the connection (websocket close plus a periodic
+    probe, since a half-open socket never closes on its own) and reconnects
+    with exponential backoff. Calls made meanwhile wait for the reconnect
+    instead of failing; read-only calls interrupted by a drop are retried once.
+    Reconnect callbacks run before queued calls resume, so the session manager
+    can map old iTerm2 session IDs to the new App's sessions first.
+    """
 
     def __init__(self) -> None:
-        self.connection: Optional[iterm2.Connection] = None
-        self.app: Optional[iterm2.App] = None
+        self.connection: Optional["iterm2.Connection"] = None
+        self.app: Optional["iterm2.App"] = None
         self._connected = False
+        # Set while calls may proceed; cleared from a drop until reconnect callbacks ran
+        self._ready = asyncio.Event()
+        # Set by calls that hit a dead connection, to wake the supervisor
+        self._lost = asyncio.Event()
+        self._supervisor: Optional[asyncio.Task] = None
+        self._reconnect_callbacks: List[Callable[[], Awaitable[None]]] = []
+        # Old iTerm2 session ID -> ID of the same session after a reconnect
+        self._aliases: Dict[str, str] = {}
+        # Number of successful connections, including the first
+        self.generation = 0
 
     async def connect(self) -> bool:
         """
@@ -25,9 +62,8 @@ class ITerm2Controller:
             bool: True if connected successfully, False otherwise.
         """
         try:
-            self.connection = await iterm2.Connection.async_create()
-            self.app = await iterm2.async_get_app(self.connection)
-            self._connected = True
+            await self._open()
+            self._ready.set()
             logger.info("Successfully connected to iTerm2")
             return True
         except Exception as e:
@@ -39,10 +75,238 @@ class ITerm2Controller:
             self._connected = False
             return False
 
+    async def _open(self) -> None:
+        """Open a new connection and App snapshot, raising on failure."""
+        import iterm2
+
+        # The App singleton is bound to the connection that created it
+        iterm2.app.invalidate_app()
+        connection = await iterm2.Connection.async_create()
+        app = await iterm2.async_get_app(connection)
+        self.connection, self.app = connection, app
+        self._connected = True
+        self.generation += 1
+
     @property
     def is_connected(self) -> bool:
         """Check if connected to iTerm2."""
-        return self._connected and self.connection is not None
+        if not self._connected or self.connection is None:
+            return False
+        websocket = self.connection.websocket
+        return websocket is not None and not websocket.closed
+
+    def start_supervisor(self) -> None:
+        """Start watching the connection and reconnecting when it drops."""
+        if self._supervisor is None or self._supervisor.done():
+            self._supervisor = asyncio.ensure_future(self._supervise())
+
+    def add_reconnect_callback(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """
+        Register a coroutine to run after every reconnect.
+
+        Callbacks run before queued calls resume. They may use ``self.app`` and
+        ``find_session``, but not methods that wait for the connection.
+        """
+        self._reconnect_callbacks.append(callback)
+
+    def connection_lost(self) -> None:
+        """Report that the connection stopped working; the supervisor reconnects."""
+        if self._connected:
+            logger.warning("Lost connection to iTerm2; reconnecting")
+        self._connected = False
+        self._ready.clear()
+        self._lost.set()
+
+    async def wait_connected(self, timeout: float = CALL_WAIT_SECONDS) -> bool:
+        """
+        Wait for a usable connection.
+
+        Args:
+            timeout: Maximum seconds to wait for a reconnect in progress.
+
+        Returns:
+            bool: True if connected, False if not connected within the timeout.
+        """
+        if self._ready.is_set() and self.is_connected:
+            return True
+        if self._supervisor is None or self._supervisor.done():
+            return False
+        if self._ready.is_set():
+            # Dropped without the supervisor noticing yet
+            self.connection_lost()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.is_connected
+
+    async def _supervise(self) -> None:
+        """Probe the connection while it is up; reconnect with backoff when it is not."""
+        delay = RECONNECT_INITIAL_DELAY
+        lost_at: Optional[float] = None
+        while True:
+            if self.is_connected:
+                await self._watch_connection()
+                continue
+
+            self._connected = False
+            self._ready.clear()
+            if lost_at is None:
+                lost_at = time.monotonic()
+            try:
+                await self._open()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Reconnect to iTerm2 failed, retrying in {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                continue
+
+            # Callbacks see the new App before queued calls resume
+            for callback in self._reconnect_callbacks:
+                try:
+                    await callback()
+                except Exception as e:
+                    logger.error(f"iTerm2 reconnect callback failed: {e}")
+            self._ready.set()
+            self._lost.clear()
+            elapsed = (time.monotonic() - lost_at) * 1000
+            if self.generation > 1:
+                logger.info(f"Reconnected to iTerm2 in {elapsed:.0f} ms")
+            else:
+                logger.info("Successfully connected to iTerm2")
+            delay = RECONNECT_INITIAL_DELAY
+            lost_at = None
+
+    async def _watch_connection(self) -> None:
+        """Wait up to one probe interval; report the connection lost if it closed or hangs."""
+        assert self.connection is not None and self.connection.websocket is not None
+        closed = asyncio.ensure_future(self.connection.websocket.wait_closed())
+        lost = asyncio.ensure_future(self._lost.wait())
+        try:
+            done, _ = await asyncio.wait(
+                {closed, lost},
+                timeout=PROBE_INTERVAL_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            closed.cancel()
+            lost.cancel()
+        if not done and await self._probe():
+            return
+        self.connection_lost()
+        # A half-open socket has to be closed by us
+        try:
+            await self.connection.websocket.close()
+        except Exception:
+            pass
+
+    async def _probe(self) -> bool:
+        """Make a cheap round trip to check that iTerm2 still answers."""
+        if self.app is None:
+            return False
+        try:
+            await asyncio.wait_for(self.app.async_get_variable("pid"), PROBE_TIMEOUT_SECONDS)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"iTerm2 health probe failed: {e}")
+            return False
+
+    async def _call(
+        self,
+        description: str,
+        op: Callable[[], Awaitable[T]],
+        default: T,
+        retry: bool = False,
+    ) -> T:
+        """
+        Run an API call once connected, reconnecting if the connection drops.
+
+        Args:
+            description: What the call does, for log messages ("reading screen of ...").
+            op: The call; it should resolve sessions with ``_session`` when run.
+            default: Result when not connected or on error.
+            retry: Retry once after a reconnect. Only for calls that are safe to
+                repeat; a dropped ``send_text`` may already have been delivered.
+
+        Returns:
+            The call's result, or ``default``.
+        """
+        for attempt in range(2):
+            if not await self.wait_connected():
+                logger.error("Not connected to iTerm2")
+                return default
+            try:
+                return await op()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(e, (ConnectionError, OSError)) or not self.is_connected:
+                    self.connection_lost()
+                    if retry and attempt == 0:
+                        logger.info(f"Retrying {description} after reconnect")
+                        continue
+                logger.error(f"Error {description}: {e}")
+                return default
+        return default
+
+    def remap_session(self, old_id: str, new_id: str) -> None:
+        """Route calls for an iTerm2 session ID from before a reconnect to its new ID."""
+        self._aliases[old_id] = new_id
+
+    def resolve_session_id(self, session_id: str) -> str:
+        """Current ID of an iTerm2 session, following reconnect remaps."""
+        return self._aliases.get(session_id, session_id)
+
+    def _session(self, session_id: str) -> Optional["iterm2.Session"]:
+        """Look up a session in the current App snapshot."""
+        if self.app is None:
+            return None
+        return self.app.get_session_by_id(self.resolve_session_id(session_id))
+
+    def session_ids(self) -> List[str]:
+        """IDs of every session in the current App snapshot."""
+        if self.app is None:
+            return []
+        ids = [
+            session.session_id
+            for window in self.app.terminal_windows
+            for tab in window.tabs
+            for session in tab.sessions
+        ]
+        ids.extend(session.session_id for session in self.app.buried_sessions)
+        return ids
+
+    async def find_session(
+        self, tty: Optional[str] = None, pid: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Find a session in the current App snapshot by its tty or shell PID.
+
+        Used to re-resolve sessions whose IDs changed across an iTerm2 restart.
+
+        Args:
+            tty: Terminal device, e.g. "/dev/ttys003".
+            pid: Process ID of the session's shell.
+
+        Returns:
+            str: iTerm2 session ID, or None if no session matches.
+        """
+        for session_id in self.session_ids():
+            session = self._session(session_id)
+            if session is None:
+                continue
+            try:
+                if tty is not None and await session.async_get_variable("tty") == tty:
+                    return session_id
+                if pid is not None and await session.async_get_variable("pid") == pid:
+                    return session_id
+            except Exception as e:
+                logger.debug(f"Could not inspect session {session_id}: {e}")
+        return None
 
     async def create_tab(
         self,
@@ -59,15 +323,15 @@ class ITerm2Controller:
         Returns:
             str: iTerm2 session ID if successful, None otherwise.
         """
-        if not self.is_connected or self.app is None:
-            logger.error("Not connected to iTerm2")
-            return None
 
-        try:
+        async def op() -> Optional[str]:
+            assert self.app is not None
             # Get current window or create new one
             window = self.app.current_terminal_window
             if window is None:
                 logger.info("No current window, creating new window...")
+                import iterm2
+
                 window = await iterm2.Window.async_create(
                     self.connection,
                     profile=profile,
@@ -96,9 +360,7 @@ class ITerm2Controller:
             logger.error("Failed to create tab - no session returned")
             return None
 
-        except Exception as e:
-            logger.error(f"Error creating tab: {e}")
-            return None
+        return await self._call("creating tab", op, None)
 
     async def send_text(self, session_id: str, text: str) -> bool:
         """
@@ -111,12 +373,9 @@ class ITerm2Controller:
         Returns:
             bool: True if successful, False otherwise.
         """
-        if not self.is_connected or self.app is None:
-            logger.error("Not connected to iTerm2")
-            return False
 
-        try:
-            session = self.app.get_session_by_id(session_id)
+        async def op() -> bool:
+            session = self._session(session_id)
             if session is None:
                 logger.error(f"Session not found: {session_id}")
                 return False
@@ -125,11 +384,9 @@ class ITerm2Controller:
             logger.debug(f"Sent text to session {session_id}: {text[:50]}...")
             return True
 
-        except Exception as e:
-            logger.error(f"Error sending text to session {session_id}: {e}")
-            return False
+        return await self._call(f"sending text to session {session_id}", op, False)
 
-    async def get_session(self, session_id: str) -> Optional[iterm2.Session]:
+    async def get_session(self, session_id: str) -> Optional["iterm2.Session"]:
         """
         Get an iTerm2 session by ID.
 
@@ -139,16 +396,11 @@ class ITerm2Controller:
         Returns:
             Session object if found, None otherwise.
         """
-        if not self.is_connected or self.app is None:
-            logger.error("Not connected to iTerm2")
-            return None
 
-        try:
-            session = self.app.get_session_by_id(session_id)
-            return session
-        except Exception as e:
-            logger.error(f"Error getting session {session_id}: {e}")
-            return None
+        async def op() -> Optional["iterm2.Session"]:
+            return self._session(session_id)
+
+        return await self._call(f"getting session {session_id}", op, None)
 
     async def split_pane(
         self,
@@ -167,12 +419,9 @@ class ITerm2Controller:
         Returns:
             str: New pane's session ID if successful, None otherwise.
         """
-        if not self.is_connected or self.app is None:
-            logger.error("Not connected to iTerm2")
-            return None
 
-        try:
-            session = self.app.get_session_by_id(session_id)
+        async def op() -> Optional[str]:
+            session = self._session(session_id)
             if session is None:
                 logger.error(f"Session not found: {session_id}")
                 return None
@@ -194,9 +443,7 @@ class ITerm2Controller:
             )
             return new_session.session_id
 
-        except Exception as e:
-            logger.error(f"Error splitting pane: {e}")
-            return None
+        return await self._call("splitting pane", op, None)
 
     async def close_session(self, session_id: str) -> bool:
         """
@@ -208,12 +455,9 @@ class ITerm2Controller:
         Returns:
             bool: True if successful, False otherwise.
         """
-        if not self.is_connected or self.app is None:
-            logger.error("Not connected to iTerm2")
-            return False
 
-        try:
-            session = self.app.get_session_by_id(session_id)
+        async def op() -> bool:
+            session = self._session(session_id)
             if session is None:
                 logger.error(f"Session not found: {session_id}")
                 return False
@@ -222,9 +466,7 @@ class ITerm2Controller:
             logger.info(f"Closed session: {session_id}")
             return True
 
-        except Exception as e:
-            logger.error(f"Error closing session {session_id}: {e}")
-            return False
+        return await self._call(f"closing session {session_id}", op, False)
 
     async def activate_session(self, session_id: str) -> bool:
         """
@@ -236,12 +478,9 @@ class ITerm2Controller:
         Returns:
             bool: True if successful, False otherwise.
         """
-        if not self.is_connected or self.app is None:
-            logger.error("Not connected to iTerm2")
-            return False
 
-        try:
-            session = self.app.get_session_by_id(session_id)
+        async def op() -> bool:
+            session = self._session(session_id)
             if session is None:
                 logger.error(f"Session not found: {session_id}")
                 return False
@@ -250,16 +489,292 @@ class ITerm2Controller:
             logger.info(f"Activated session: {session_id}")
             return True
 
+        return await self._call(f"activating session {session_id}", op, False, retry=True)
+
+    async def get_screen_lines(self, session_id: str) -> Optional[Tuple[int, List[str]]]:
+        """
+        Get the visible screen of an iTerm2 session.
+
+        Args:
+            session_id: iTerm2 session ID.
+
+        Returns:
+            Tuple of (absolute line number of the first screen line, screen lines),
+            or None if failed.
+        """
+
+        async def op() -> Optional[Tuple[int, List[str]]]:
+            import iterm2
+
+            session = self._session(session_id)
+            if session is None or self.connection is None:
+                return None
+            async with iterm2.Transaction(self.connection):
+                info = await session.async_get_line_info()
+                content = await session.async_get_screen_contents()
+            lines = [content.line(i).string for i in range(content.number_of_lines)]
+            return info.overflow + info.scrollback_buffer_height, lines
+
+        return await self._call(f"reading screen of session {session_id}", op, None, retry=True)
+
+    async def get_line_info(self, session_id: str) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Get the absolute line numbering of an iTerm2 session.
+
+        Args:
+            session_id: iTerm2 session ID.
+
+        Returns:
+            Tuple of (first available line, first screen line, end line, columns),
+            or None if failed. Lines before the first available one were dropped
+            from history; lines from the first screen line on may still change.
+        """
+
+        async def op() -> Optional[Tuple[int, int, int, int]]:
+            import iterm2
+
+            session = self._session(session_id)
+            if session is None or self.connection is None:
+                return None
+            async with iterm2.Transaction(self.connection):
+                info = await session.async_get_line_info()
+                columns = await session.async_get_variable("columns")
+            history_end = info.overflow + info.scrollback_buffer_height
+            return (
+                info.overflow,
+                history_end,
+                history_end + info.mutable_area_height,
+                int(columns or 0),
+            )
+
+        return await self._call(
+            f"reading line info of session {session_id}", op, None, retry=True
+        )
+
+    async def get_line_ranges(
+        self, session_id: str, ranges: List[Tuple[int, int]]
+    ) -> Optional[Tuple[int, List[Tuple[int, List[str]]]]]:
+        """
+        Fetch ranges of lines from an iTerm2 session's history and screen.
+
+        The line info and every range are read in one transaction, so the
+        session cannot scroll between them.
+
+        Args:
+            session_id: iTerm2 session ID.
+            ranges: (first line, line count) pairs, in absolute line numbers.
+
+        Returns:
+            Tuple of (first screen line, list of (first line, lines) per range),
+            or None if failed. A range is clipped to the lines still available,
+            so its first line may be later than requested.
+        """
+
+        async def op() -> Optional[Tuple[int, List[Tuple[int, List[str]]]]]:
+            import iterm2
+
+            session = self._session(session_id)
+            if session is None:
+                return None
+            fetched: List[Tuple[int, List[str]]] = []
+            async with iterm2.Transaction(self.connection):
+                info = await session.async_get_line_info()
+                history_end = info.overflow + info.scrollback_buffer_height
+                end = history_end + info.mutable_area_height
+                for first, count in ranges:
+                    start = max(first, info.overflow)
+                    stop = min(first + count, end)
+                    lines: List[str] = []
+                    if stop > start:
+                        contents = await session.async_get_contents(start, stop - start)
+                        lines = [line.string for line in contents]
+                    fetched.append((start, lines))
+            return history_end, fetched
+
+        return await self._call(
+            f"reading scrollback of session {session_id}", op, None, retry=True
+        )
+
+    async def monitor_screen(self, session_id: str, callback: Callable[[], None]) -> None:
+        """
+        Report screen updates of an iTerm2 session until it closes or is cancelled.
+
+        Args:
+            session_id: iTerm2 session ID.
+            callback: Called after each screen update.
+        """
+        session = await self.get_session(session_id)
+        if session is None:
+            return
+
+        try:
+            async with session.get_screen_streamer(want_contents=False) as streamer:
+                while True:
+                    await streamer.async_get()
+                    callback()
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"Error activating session {session_id}: {e}")
-            return False
+            logger.debug(f"Screen monitor for session {session_id} stopped: {e}")
+
+    async def get_variable(self, session_id: str, name: str) -> Any:
+        """
+        Read a session variable (e.g. "path", "pid", "jobName").
+
+        Args:
+            session_id: iTerm2 session ID.
+            name: Variable name.
+
+        Returns:
+            The variable value, or None if unavailable.
+        """
+
+        async def op() -> Any:
+            session = self._session(session_id)
+            if session is None:
+                return None
+            return await session.async_get_variable(name)
+
+        return await self._call(
+            f"reading variable {name} of session {session_id}", op, None, retry=True
+        )
+
+    async def monitor_variables(
+        self,
+        session_id: str,
+        names: Tuple[str, ...],
+        callback: Callable[[str, Any], None],
+    ) -> None:
+        """
+        Report the values of session variables, then every change, until the
+        session closes, the connection drops or this is cancelled.
+
+        Args:
+            session_id: iTerm2 session ID.
+            names: Variable names (e.g. "path", "jobName").
+            callback: Called with a variable's name and its current or new value.
+        """
+        if not await self.wait_connected():
+            return
+
+        import iterm2
+
+        session_id = self.resolve_session_id(session_id)
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                monitors = [
+                    await stack.enter_async_context(
+                        iterm2.VariableMonitor(
+                            self.connection, iterm2.VariableScopes.SESSION, name, session_id
+                        )
+                    )
+                    for name in names
+                ]
+                # Read after subscribing, so a change in between is not missed
+                session = self._session(session_id)
+                if session is None:
+                    return
+                values = await asyncio.gather(
+                    *(session.async_get_variable(name) for name in names)
+                )
+                for name, value in zip(names, values):
+                    callback(name, value)
+
+                async def watch(name: str, monitor: "iterm2.VariableMonitor") -> None:
+                    while True:
+                        callback(name, await monitor.async_get())
+
+                await asyncio.gather(
+                    *(watch(name, monitor) for name, monitor in zip(names, monitors))
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Variable monitor for session {session_id} stopped: {e}")
+
+    async def monitor_prompts(
+        self,
+        session_id: str,
+        on_command_start: Callable[[str], None],
+        on_command_end: Callable[[int, Optional[Tuple[int, int]]], None],
+    ) -> None:
+        """
+        Report shell-integration command boundaries until the session closes.
+
+        Requires iTerm2 shell integration in the session's shell.
+
+        Args:
+            session_id: iTerm2 session ID.
+            on_command_start: Called with the command line when a command starts.
+            on_command_end: Called with the exit status and the (first, last)
+                absolute line range of the command's output, when known.
+        """
+        if not await self.wait_connected():
+            return
+
+        import iterm2
+
+        session_id = self.resolve_session_id(session_id)
+        modes = [
+            iterm2.PromptMonitor.Mode.COMMAND_START,
+            iterm2.PromptMonitor.Mode.COMMAND_END,
+        ]
+        try:
+            async with iterm2.PromptMonitor(self.connection, session_id, modes=modes) as monitor:
+                while True:
+                    mode, value, prompt_id = await monitor.async_get(include_id=True)
+                    if mode == iterm2.PromptMonitor.Mode.COMMAND_START:
+                        on_command_start(value)
+                        continue
+
+                    output_range: Optional[Tuple[int, int]] = None
+                    if prompt_id:
+                        prompt = await iterm2.async_get_prompt_by_id(
+                            self.connection, session_id, prompt_id
+                        )
+                        if prompt is not None:
+                            coords = prompt.output_range
+                            output_range = (coords.start.y, coords.end.y)
+                    on_command_end(value, output_range)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Prompt monitor for session {session_id} stopped: {e}")
+
+    async def monitor_terminations(self, callback: Callable[[str], None]) -> None:
+        """
+        Report closed iTerm2 sessions until cancelled or the connection drops.
+
+        Args:
+            callback: Called with the iTerm2 session ID of each terminated session.
+        """
+        if not await self.wait_connected():
+            logger.error("Not connected to iTerm2")
+            return
+
+        import iterm2
+
+        try:
+            async with iterm2.SessionTerminationMonitor(self.connection) as monitor:
+                while True:
+                    session_id = await monitor.async_get()
+                    logger.debug(f"iTerm2 session terminated: {session_id}")
+                    callback(session_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Session termination monitor stopped: {e}")
 
     async def disconnect(self) -> None:
         """Disconnect from iTerm2."""
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            self._supervisor = None
         if self.connection:
             try:
                 # Note: Connection cleanup is automatic
                 self._connected = False
+                self._ready.clear()
                 logger.info("Disconnected from iTerm2")
             except Exception as e:
                 logger.error(f"Error during disconnect: {e}")
@@ -267,17 +782,29 @@ class ITerm2Controller:
 
 # Global controller instance
 _controller: Optional[ITerm2Controller] = None
+# Connection attempt shared by every caller that arrives while it is in flight
+_connecting: Optional["asyncio.Future[bool]"] = None
 
 
 async def get_controller() -> ITerm2Controller:
     """
     Get or create the global iTerm2 controller instance.
 
+    Concurrent callers (the server's startup task and early tool calls) wait
+    for the same connection attempt instead of seeing a half-made controller.
+    After the first attempt the supervisor keeps the connection alive.
+
     Returns:
         ITerm2Controller: The global controller instance.
     """
-    global _controller
+    global _controller, _connecting
     if _controller is None:
         _controller = ITerm2Controller()
-        await _controller.connect()
+        _connecting = asyncio.ensure_future(_controller.connect())
+    if _connecting is not None:
+        if not _connecting.done():
+            # Shielded so a cancelled tool call does not abort the connection
+            await asyncio.shield(_connecting)
+        _connecting = None
+        _controller.start_supervisor()
     return _controller
@@ -1,11 +1,22 @@
 """Data models and type definitions for iTerm2 MCP server."""
 
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
 from uuid import UUID, uuid4
 
+from .output_buffer import OutputBuffer
+from .shell_integration import CommandTracker, PromptMarkParser
+from .vt import VirtualScreen
+
+if TYPE_CHECKING:
+    from .asciicast import AsciicastWriter
+    from .extractors import OutputSummarizer
+    from .replay import ReplayPlayer
+    from .scrollback import ScrollbackCache
+
 
 class ControlMode(str, Enum):
     """Who currently controls the session."""
@@ -14,6 +25,16 @@ class ControlMode(str, Enum):
     SHARED = "shared"
 
 
+class JobStatus(str, Enum):
+    """Lifecycle of a scheduled job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    TIMED_OUT = "timed_out"
+    CANCELLED = "cancelled"
+
+
 @dataclass
 class SessionState:
     """Internal session state tracking."""
@@ -21,12 +42,46 @@ class SessionState:
     session_id: UUID = field(default_factory=uuid4)
     iterm_session_id: Optional[str] = None
     tmux_session: Optional[str] = None
+    # tmux server the session runs on (-L name or -S path; None for the default server)
+    tmux_socket: Optional[str] = None
+    # tmux pane the session tracks (e.g. "%3"), found when the control client attaches
+    tmux_pane: Optional[str] = None
     pid: Optional[int] = None
-    output_buffer: List[str] = field(default_factory=list)
+    output_buffer: OutputBuffer = field(default_factory=OutputBuffer)
+    # Line number of output_buffer[0] in the numbering reads use: iTerm2's absolute
+    # number of the first screen line for iTerm2-only sessions, 0 otherwise
+    buffer_first_line: int = 0
     last_read_index: int = 0
+    # Set when the terminal reports output the buffer has not picked up yet
+    output_dirty: bool = True
+    # time.monotonic() of the last output notification
+    last_output_at: float = field(default_factory=time.monotonic)
+    # Unix arrival times of lines completed in the output stream since the last sync
+    pending_line_times: List[float] = field(default_factory=list)
+
+    # Shell-integration command index; tmux sessions take marks from the screen model,
+    # replays from prompt_parser
+    commands: CommandTracker = field(default_factory=CommandTracker)
+    prompt_parser: Optional[PromptMarkParser] = None
+    # Local screen model fed by the raw output stream (tmux sessions)
+    screen: Optional[VirtualScreen] = None
+    # Test/build output recognizers, created by the first get_output_summary
+    summarizer: Optional["OutputSummarizer"] = None
+    # iTerm2 session variables (path, jobName, ...) kept current by variable monitors
+    variables: Dict[str, Any] = field(default_factory=dict)
+    # iTerm2 history lines fetched by scrollback reads (iTerm2-only sessions)
+    scrollback: Optional["ScrollbackCache"] = None
+    # asciicast file the raw output is appended to (tmux sessions), and its writer
+    recording_path: Optional[str] = None
+    recorder: Optional["AsciicastWriter"] = None
+    # Recording played back in place of a terminal (replay sessions)
+    replay: Optional["ReplayPlayer"] = None
     created_at: datetime = field(default_factory=datetime.now)
+    last_accessed_at: datetime = field(default_factory=datetime.now)
     controlled_by: ControlMode = ControlMode.CLAUDE
     command: Optional[str] = None
+    # Free-form labels for addressing groups of sessions (e.g. "workers")
+    tags: Set[str] = field(default_factory=set)
 
     # Pane relationship tracking (for split panes)
     parent_session_id: Optional[UUID] = None
@@ -39,6 +94,23 @@ class SessionState:
         if isinstance(self.session_id, str):
             self.session_id = UUID(self.session_id)
 
+    def touch(self) -> None:
+        """Record that the session was just used."""
+        self.last_accessed_at = datetime.now()
+
+    @property
+    def idle_seconds(self) -> float:
+        """Seconds since the session was last used."""
+        return (datetime.now() - self.last_accessed_at).total_seconds()
+
+    @property
+    def buffer_bytes(self) -> int:
+        """Approximate memory held by the output buffer and scrollback cache."""
+        size = self.output_buffer.nbytes
+        if self.scrollback is not None:
+            size += self.scrollback.nbytes
+        return size
+
 
 @dataclass
 class SessionInfo:
@@ -52,9 +124,13 @@ class SessionInfo:
     runtime_seconds: float
     line_count: int
     command: Optional[str]
+    idle_seconds: float = 0.0
     parent_session_id: Optional[str] = None
     pane_position: Optional[str] = None
     child_count: int = 0
+    tags: List[str] = field(default_factory=list)
+    tmux_socket: Optional[str] = None
+    recording_path: Optional[str] = None
 
     @classmethod
     def from_state(cls, state: SessionState) -> "SessionInfo":
@@ -69,12 +145,46 @@ class SessionInfo:
             runtime_seconds=runtime,
             line_count=len(state.output_buffer),
             command=state.command,
+            idle_seconds=state.idle_seconds,
             parent_session_id=str(state.parent_session_id) if state.parent_session_id else None,
             pane_position=state.pane_position,
             child_count=len(state.child_session_ids),
+            tags=sorted(state.tags),
+            tmux_socket=state.tmux_socket,
+            recording_path=state.recording_path,
         )
 
 
+@dataclass
+class ScreenState:
+    """The visible screen of a session and its cursor."""
+
+    lines: List[str]
+    # None when the source does not report the cursor
+    cursor_row: Optional[int]
+    cursor_col: Optional[int]
+    alternate_screen: bool
+    # "emulator" (local screen model), "tmux" or "iterm2"
+    source: str
+    session_id: str
+
+
+@dataclass
+class CondenseReport:
+    """What a budgeted read left out."""
+
+    input_lines: int
+    input_bytes: int
+    output_bytes: int
+    # Runs of repeated or near-identical lines folded into a summary line
+    collapsed_runs: int = 0
+    collapsed_lines: int = 0
+    # Lines dropped between the kept head and tail (absolute indices, inclusive)
+    elided_lines: int = 0
+    elided_from: Optional[int] = None
+    elided_to: Optional[int] = None
+
+
 @dataclass
 class PaginatedOutput:
     """Paginated output response."""
@@ -86,3 +196,170 @@ class PaginatedOutput:
     remaining: int
     session_id: str
     controlled_by: str
+    version: int = 0
+    not_modified: bool = False
+    # Arrival time (Unix seconds) of each returned line
+    timestamps: List[float] = field(default_factory=list)
+    # Set for budgeted reads, whose lines are a condensed view of the range
+    condensed: Optional[CondenseReport] = None
+
+
+@dataclass
+class IdleResult:
+    """Outcome of waiting for a session's output to go quiet."""
+
+    idle: bool
+    waited_seconds: float
+    busy_seconds: float
+    quiet_seconds: float
+    version: int
+    session_id: str
+
+
+@dataclass
+class SearchMatch:
+    """A matching line with surrounding context."""
+
+    line: int
+    text: str
+    context_start: int
+    context: List[str]
+
+
+@dataclass
+class SearchResult:
+    """Search response over a session's output."""
+
+    matches: List[SearchMatch]
+    total_lines: int
+    next_cursor: Optional[int]
+    session_id: str
+
+
+@dataclass
+class ReapReport:
+    """Result of an idle-reaping / memory-budget pass."""
+
+    reclaimed_bytes: int = 0
+    resident_bytes: int = 0
+    compressed_session_ids: List[str] = field(default_factory=list)
+    evicted_session_ids: List[str] = field(default_factory=list)
+    terminated_session_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class TranscriptEntry:
+    """One event of a scripted interaction."""
+
+    step: int
+    action: str  # "send", "match", "timeout"
+    detail: str
+    elapsed_seconds: float
+
+
+@dataclass
+class InteractionResult:
+    """Outcome of running an interaction script against a session."""
+
+    completed: bool
+    steps_run: int
+    elapsed_seconds: float
+    transcript: List[TranscriptEntry]
+    output: List[str]
+    session_id: str
+    error: Optional[str] = None
+
+
+@dataclass
+class FanoutResult:
+    """Outcome of a fanned-out command in one session."""
+
+    session_id: str
+    completed: bool
+    exit_status: Optional[int]
+    elapsed_seconds: float
+    output_tail: List[str]
+    error: Optional[str] = None
+    # The command was still running when the timeout expired
+    timed_out: bool = False
+
+
+@dataclass
+class Job:
+    """A command submitted to the worker pool."""
+
+    command: str
+    timeout: float
+    job_id: str = field(default_factory=lambda: str(uuid4()))
+    status: JobStatus = JobStatus.QUEUED
+    session_id: Optional[str] = None
+    exit_status: Optional[int] = None
+    output: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    submitted_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def is_finished(self) -> bool:
+        """Check if the job reached a final state."""
+        return self.status not in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        """Seconds the job ran, or None if it never started."""
+        if self.started_at is None:
+            return None
+        end = self.finished_at or datetime.now()
+        return (end - self.started_at).total_seconds()
+
+
+@dataclass
+class TimelineEntry:
+    """A line of output placed on a cross-session timeline."""
+
+    timestamp: float
+    session_id: str
+    line: int
+    text: str
+
+
+@dataclass
+class ErrorLocation:
+    """First error of a run, with its source location when the tool reports one."""
+
+    message: str
+    # Buffer line the error was reported on
+    line: int
+    file: Optional[str] = None
+    line_number: Optional[int] = None
+    column: Optional[int] = None
+
+
+@dataclass
+class RunSummary:
+    """Structured summary of the latest test or build run of one tool."""
+
+    kind: str
+    first_line: int
+    last_line: int
+    passed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    errors: int = 0
+    warnings: int = 0
+    failures: List[str] = field(default_factory=list)
+    first_error: Optional[ErrorLocation] = None
+    # Set once the tool printed its final result line
+    finished: bool = False
+    result_line: Optional[str] = None
+
+
+@dataclass
+class OutputSummary:
+    """Runs recognized in a session's output."""
+
+    session_id: str
+    from_line: int
+    lines_scanned: int
+    runs: List[RunSummary]
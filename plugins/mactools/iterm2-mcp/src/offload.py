@@ -0,0 +1,107 @@
+"""Running CPU-heavy output processing off the event loop."""
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+T = TypeVar("T")
+
+
+class Offloader:
+    """
+    Runs output processing in worker threads or processes once it is large.
+
+    Work on fewer than ``min_lines`` lines runs inline: handing it to a thread
+    costs more than doing it. Larger work runs in a thread pool. The worker
+    still shares the GIL with the event loop, but the interpreter switches
+    threads every few milliseconds between bytecodes (and zlib/lzma release the
+    GIL while decompressing), so other tool calls keep being answered while a
+    search or summary works through a big buffer instead of waiting for it.
+
+    With ``processes`` set, work that is marked ``isolated`` and covers at
+    least ``process_min_lines`` lines runs in a worker process instead, fully in
+    parallel with the loop. Its function and arguments are pickled, so this
+    pays off for work with small inputs, like a regex search over compressed
+    segments. Pools are created on first use.
+    """
+
+    def __init__(
+        self,
+        threads: int = 4,
+        processes: int = 0,
+        min_lines: int = 20000,
+        process_min_lines: int = 200000,
+    ) -> None:
+        self.threads = threads
+        self.processes = processes
+        self.min_lines = min_lines
+        self.process_min_lines = process_min_lines
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional["ProcessPoolExecutor"] = None
+
+    def executor_for(self, lines: int, isolated: bool = False) -> Optional[Executor]:
+        """
+        Pick where work of a given size runs.
+
+        Args:
+            lines: Number of lines the work covers (or an estimate).
+            isolated: The work may run in another process.
+
+        Returns:
+            The executor to use, or None to run inline.
+        """
+        if isolated and self.processes > 0 and lines >= self.process_min_lines:
+            if self._process_pool is None:
+                # Imported here so servers without a process pool do not pay for it
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # Forking a process that runs threads is unsafe; start clean workers
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._process_pool
+        if self.threads > 0 and lines >= self.min_lines:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self.threads, thread_name_prefix="iterm2-mcp-offload"
+                )
+            return self._thread_pool
+        return None
+
+    async def run(
+        self, lines: int, func: Callable[..., T], *args: Any, isolated: bool = False
+    ) -> T:
+        """
+        Run a function inline or in a worker, depending on the size of its work.
+
+        The function must not touch state the event loop may change meanwhile;
+        callers pass it frozen inputs (e.g. an OutputBuffer view).
+
+        Args:
+            lines: Number of lines the work covers (or an estimate).
+            func: Function to run.
+            *args: Arguments for ``func``.
+            isolated: ``func`` and its arguments can be pickled and nothing it
+                changes needs to be seen by the caller, so it may run in a
+                worker process.
+
+        Returns:
+            What ``func`` returned.
+        """
+        executor = self.executor_for(lines, isolated)
+        if executor is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    def shutdown(self) -> None:
+        """Stop the worker pools without waiting for running work."""
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._thread_pool = None
+        self._process_pool = None
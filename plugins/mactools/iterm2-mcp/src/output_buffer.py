@@ -0,0 +1,668 @@
+"""Session output buffer with compressed cold segments."""
+
+import bisect
+import logging
+import lzma
+import re
+import sys
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union, overload
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Lines compared when checking that a new capture lines up with the buffer
+SYNC_OVERLAP = 3
+
+# Decompressed segments kept around for sequential paging
+SEGMENT_CACHE_SIZE = 2
+
+
+def _compress(text: str, codec: str) -> bytes:
+    """Compress segment text with the given codec."""
+    raw = text.encode("utf-8")
+    if codec == "lzma":
+        return lzma.compress(raw, preset=1)
+    if codec == "zlib":
+        return zlib.compress(raw, 1)
+    return raw
+
+
+def _decompress(data: bytes, codec: str) -> str:
+    """Decompress segment text produced by _compress."""
+    if codec == "lzma":
+        raw = lzma.decompress(data)
+    elif codec == "zlib":
+        raw = zlib.decompress(data)
+    else:
+        raw = data
+    return raw.decode("utf-8")
+
+
+def _line_offsets(lines: List[str]) -> "array[int]":
+    """
+    Build a line-offset index for ``"\\n".join(lines)``.
+
+    Entry ``i`` is where line ``i`` starts; the extra final entry is one past the
+    end of the text, so line ``i`` is ``text[offsets[i]:offsets[i + 1] - 1]``.
+    """
+    offsets = array("I", [0])
+    position = 0
+    for line in lines:
+        position += len(line) + 1
+        offsets.append(position)
+    return offsets
+
+
+@dataclass
+class _Segment:
+    """A sealed run of lines stored compressed, with its line-offset index."""
+
+    start: int
+    count: int
+    data: bytes
+    codec: str
+    offsets: "array[int]"
+
+    def text(self) -> str:
+        """Decompress the segment text."""
+        return _decompress(self.data, self.codec)
+
+    def line_at(self, position: int) -> int:
+        """Segment-relative line containing a text position."""
+        return bisect.bisect_right(self.offsets, position) - 1
+
+    def slice(self, text: str, lo: int, hi: int) -> List[str]:
+        """Lines ``[lo, hi)`` of the decompressed text, without splitting the rest."""
+        if lo >= hi:
+            return []
+        return text[self.offsets[lo] : self.offsets[hi] - 1].split("\n")
+
+
+def _search(
+    pattern: "re.Pattern[str]",
+    segments: List[_Segment],
+    segment_text: Callable[[_Segment], str],
+    lines: List[str],
+    lines_start: int,
+    start: int,
+    stop: int,
+    limit: int,
+) -> Tuple[List[int], Optional[int]]:
+    """
+    Find lines in ``[start, stop)`` matching a regex.
+
+    Args:
+        pattern: Compiled pattern.
+        segments: Sealed segments overlapping the range, in order.
+        segment_text: Returns the decompressed text of a segment.
+        lines: Uncompressed lines from ``lines_start`` on.
+        lines_start: Absolute index of ``lines[0]``; every line before it is in ``segments``.
+        start: First line to search.
+        stop: Line to stop before.
+        limit: Maximum number of matching lines to return.
+
+    Returns:
+        Tuple of (matching line numbers, cursor to resume from or None if done).
+    """
+    matches: List[int] = []
+    for segment in segments:
+        if segment.start >= stop:
+            break
+        text = segment_text(segment)
+        line = max(0, start - segment.start)
+        count = min(segment.count, stop - segment.start)
+        while line < count:
+            found = pattern.search(text, segment.offsets[line])
+            if found is None:
+                break
+            line = segment.line_at(found.start())
+            if line >= count:
+                break
+            end = segment.offsets[line + 1] - 1
+            # A match running past the newline belongs to no line; retry within it
+            if found.end() > end and pattern.search(text, segment.offsets[line], end) is None:
+                line += 1
+                continue
+            matches.append(segment.start + line)
+            if len(matches) > limit:
+                return matches[:limit], matches[limit - 1] + 1
+            line += 1
+
+    for index in range(max(start, lines_start), stop):
+        if pattern.search(lines[index - lines_start]):
+            matches.append(index)
+            if len(matches) > limit:
+                return matches[:limit], matches[limit - 1] + 1
+
+    return matches, None
+
+
+class BufferView:
+    """
+    Frozen lines ``[start, stop)`` of an OutputBuffer, safe to read off the event loop.
+
+    Holds the sealed segments covering the range, which never change once
+    sealed, and a copy of the uncompressed lines after them, so the buffer can
+    keep syncing while a worker thread (or process, the view pickles) searches
+    or iterates the view. Segments are decompressed without the buffer's cache.
+    """
+
+    def __init__(
+        self, segments: List[_Segment], lines: List[str], lines_start: int, start: int, stop: int
+    ) -> None:
+        self.segments = segments
+        self.lines = lines
+        self.lines_start = lines_start
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return max(0, self.stop - self.start)
+
+    def __iter__(self) -> Iterator[str]:
+        for segment in self.segments:
+            lo = max(0, self.start - segment.start)
+            hi = min(segment.count, self.stop - segment.start)
+            yield from segment.slice(segment.text(), lo, hi)
+        yield from self.lines
+
+    def search(
+        self, pattern: "re.Pattern[str]", limit: int = 50
+    ) -> Tuple[List[int], Optional[int]]:
+        """
+        Find lines of the view matching a regex.
+
+        Sealed segments are searched as one block of text each and matches are
+        mapped back to line numbers through the segment's line-offset index, so
+        nothing is split into lines just to be searched.
+
+        Args:
+            pattern: Compiled pattern (``re.MULTILINE`` makes ``^``/``$`` per line).
+            limit: Maximum number of matching lines to return.
+
+        Returns:
+            Tuple of (matching line numbers, cursor to resume from or None if done).
+        """
+        return _search(
+            pattern,
+            self.segments,
+            _Segment.text,
+            self.lines,
+            self.lines_start,
+            self.start,
+            self.stop,
+            limit,
+        )
+
+
+class OutputBuffer:
+    """
+    Line buffer for a session's output.
+
+    Lines are addressed by absolute index and split into three regions:
+
+    - sealed segments: older lines, compressed in fixed-size runs
+    - hot lines: recent committed lines kept as plain strings
+    - tail: the live screen, which may still change on the next capture
+
+    Committed lines never change. Once more than ``hot_lines`` committed lines are
+    held uncompressed, the oldest run of ``segment_lines`` is sealed. Reads that
+    reach into a sealed segment decompress it on demand, and the most recently
+    used segments stay cached so that sequential paging stays cheap.
+
+    Every line also carries the wall-clock time it arrived (for tail lines: last
+    changed), kept in a parallel ``array("d")`` for committed lines. Committed
+    times never decrease, so time ranges map to line ranges by binary search.
+    """
+
+    def __init__(
+        self,
+        hot_lines: Optional[int] = None,
+        segment_lines: Optional[int] = None,
+        codec: Optional[str] = None,
+    ) -> None:
+        config = get_config()
+        self.hot_lines = config.buffer_hot_lines if hot_lines is None else hot_lines
+        self.segment_lines = max(
+            1, config.buffer_segment_lines if segment_lines is None else segment_lines
+        )
+        self.codec = config.buffer_compression if codec is None else codec
+
+        self._segments: List[_Segment] = []
+        self._segment_starts: List[int] = []
+        self._sealed_count = 0
+        self._hot: List[str] = []
+        self._tail: List[str] = []
+        self._times: "array[float]" = array("d")
+        self._tail_times: List[float] = []
+        self._cache: "OrderedDict[int, str]" = OrderedDict()
+        # Absolute index of source line 0 in the last synced capture
+        self._source_offset = 0
+        # Bumped on every content change
+        self.version = 0
+
+    @property
+    def committed_count(self) -> int:
+        """Number of lines that will no longer change."""
+        return self._sealed_count + len(self._hot)
+
+    @property
+    def hot_count(self) -> int:
+        """Number of committed lines not yet compressed."""
+        return len(self._hot)
+
+    def next_source_line(self, history_size: int) -> int:
+        """
+        First source line worth capturing for the next sync.
+
+        Args:
+            history_size: Current number of history lines in the source.
+
+        Returns:
+            Source line number, including a few lines of overlap for alignment.
+        """
+        expected = self.committed_count - self._source_offset
+        if expected > history_size:
+            return 0
+        return max(0, expected - SYNC_OVERLAP)
+
+    def __len__(self) -> int:
+        return self.committed_count + len(self._tail)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[str]:
+        for segment in self._segments:
+            yield from segment.slice(self._segment_text(segment), 0, segment.count)
+        yield from self._hot
+        yield from self._tail
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            lines = self.read_range(start, stop)
+            return lines if step == 1 else lines[::step]
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("output buffer index out of range")
+        return self.read_range(index, index + 1)[0]
+
+    def read_range(self, start: int, stop: int) -> List[str]:
+        """
+        Return lines in ``[start, stop)`` by absolute index.
+
+        Args:
+            start: First line index (inclusive).
+            stop: Last line index (exclusive).
+
+        Returns:
+            List of lines, decompressing sealed segments as needed.
+        """
+        start = max(0, start)
+        stop = min(stop, len(self))
+        if start >= stop:
+            return []
+
+        result: List[str] = []
+        position = start
+
+        if position < self._sealed_count:
+            seg_index = bisect.bisect_right(self._segment_starts, position) - 1
+            while position < min(stop, self._sealed_count):
+                segment = self._segments[seg_index]
+                lo = position - segment.start
+                hi = min(stop, segment.start + segment.count) - segment.start
+                result.extend(segment.slice(self._segment_text(segment), lo, hi))
+                position = segment.start + hi
+                seg_index += 1
+
+        committed = self.committed_count
+        if position < stop and position < committed:
+            hi = min(stop, committed)
+            result.extend(self._hot[position - self._sealed_count : hi - self._sealed_count])
+            position = hi
+
+        if position < stop:
+            result.extend(self._tail[position - committed : stop - committed])
+
+        return result
+
+    def read_times(self, start: int, stop: int) -> List[float]:
+        """Arrival times of lines in ``[start, stop)``, parallel to read_range."""
+        start = max(0, start)
+        stop = min(stop, len(self))
+        if start >= stop:
+            return []
+        committed = self.committed_count
+        times = self._times[start : min(stop, committed)].tolist()
+        if stop > committed:
+            times.extend(self._tail_times[max(0, start - committed) : stop - committed])
+        return times
+
+    def time_range(self, since: Optional[float], until: Optional[float]) -> Tuple[int, int]:
+        """
+        Map a time window to a line range.
+
+        Committed lines are located by binary search on their timestamps; the
+        tail (one screen at most) is scanned.
+
+        Args:
+            since: Earliest arrival time (inclusive), or None for the start.
+            until: Latest arrival time (inclusive), or None for the end.
+
+        Returns:
+            Tuple of (start, stop) absolute line indices; empty when start >= stop.
+        """
+        committed = self.committed_count
+        total = len(self)
+
+        if since is None:
+            start = 0
+        else:
+            start = bisect.bisect_left(self._times, since)
+            if start == committed:
+                start = next(
+                    (committed + i for i, t in enumerate(self._tail_times) if t >= since),
+                    total,
+                )
+
+        if until is None:
+            stop = total
+        else:
+            stop = bisect.bisect_right(self._times, until)
+            if stop == committed:
+                stop = next(
+                    (committed + i for i, t in enumerate(self._tail_times) if t > until),
+                    total,
+                )
+
+        return start, stop
+
+    def _segment_text(self, segment: _Segment) -> str:
+        """Decompress a segment, using the small LRU cache."""
+        cached = self._cache.get(segment.start)
+        if cached is not None:
+            self._cache.move_to_end(segment.start)
+            return cached
+
+        text = segment.text()
+        self._cache[segment.start] = text
+        while len(self._cache) > SEGMENT_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return text
+
+    def view(self, start: int, stop: int) -> BufferView:
+        """
+        Freeze lines ``[start, stop)`` for processing off the event loop.
+
+        Only the uncompressed part of the range is copied; sealed segments are
+        shared, since they never change.
+
+        Args:
+            start: First line index (inclusive).
+            stop: Last line index (exclusive).
+        """
+        start = max(0, start)
+        stop = max(start, min(stop, len(self)))
+        lines_start = max(start, self._sealed_count)
+        return BufferView(
+            self._segments_between(start, stop),
+            self.read_range(lines_start, stop),
+            lines_start,
+            start,
+            stop,
+        )
+
+    def _segments_between(self, start: int, stop: int) -> List[_Segment]:
+        """Sealed segments holding any of the lines in ``[start, stop)``."""
+        if start >= min(stop, self._sealed_count):
+            return []
+        first = bisect.bisect_right(self._segment_starts, start) - 1
+        last = bisect.bisect_left(self._segment_starts, stop)
+        return self._segments[first:last]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident memory used by the buffer."""
+        size = sys.getsizeof(self._hot) + sys.getsizeof(self._tail)
+        size += sum(sys.getsizeof(line) for line in self._hot)
+        size += sum(sys.getsizeof(line) for line in self._tail)
+        size += sys.getsizeof(self._times) + sys.getsizeof(self._tail_times)
+        for segment in self._segments:
+            size += sys.getsizeof(segment.data) + sys.getsizeof(segment.offsets)
+        size += sum(sys.getsizeof(text) for text in self._cache.values())
+        return size
+
+    def extend(self, lines: Iterable[str], timestamp: Optional[float] = None) -> None:
+        """
+        Commit lines to the end of the buffer, before the live tail.
+
+        Args:
+            lines: Lines to append. Embedded newlines start new lines.
+            timestamp: Arrival time of the lines (default: now).
+        """
+        split: List[str] = []
+        for line in lines:
+            if "\n" in line:
+                split.extend(line.split("\n"))
+            else:
+                split.append(line)
+        stamp = time.time() if timestamp is None else timestamp
+        self._commit(split, [stamp] * len(split))
+
+    def _commit(self, lines: List[str], times: List[float]) -> None:
+        """Append committed lines with their arrival times."""
+        if not lines:
+            return
+        latest = self._times[-1] if self._times else 0.0
+        for stamp in times:
+            # Keep committed times sorted for binary search
+            latest = max(latest, stamp)
+            self._times.append(latest)
+        self._hot.extend(lines)
+        self.version += 1
+        self._seal()
+
+    def set_tail(
+        self,
+        lines: List[str],
+        timestamp: Optional[float] = None,
+        line_times: Optional[List[float]] = None,
+    ) -> None:
+        """
+        Replace the live (still changing) lines after the committed output.
+
+        Args:
+            lines: Current screen lines; trailing blank lines are dropped.
+            timestamp: Time the screen was last written to (default: now);
+                lines that did not change keep their earlier time.
+            line_times: Known arrival times of the most recent lines, oldest
+                first (see sync).
+        """
+        self._merge([], lines, timestamp, line_times)
+
+    def _merge(
+        self,
+        new_lines: List[str],
+        screen: List[str],
+        timestamp: Optional[float],
+        line_times: Optional[List[float]],
+    ) -> None:
+        """
+        Commit ``new_lines`` and replace the tail with ``screen``, stamping times.
+
+        Old tail line ``k`` is compared with line ``k`` of ``new_lines + screen``:
+        committed lines scrolled off the top of the old tail, and the rest of the
+        tail moved up by as many lines. Unchanged lines keep their time; changed
+        ones are stamped from ``line_times`` matched up from the end (the newest
+        line arrived last), falling back to ``timestamp``.
+        """
+        end = len(screen)
+        while end > 0 and not screen[end - 1].strip():
+            end -= 1
+        tail = screen[:end]
+
+        stamp = time.time() if timestamp is None else timestamp
+        known = line_times or []
+        old_tail, old_times = self._tail, self._tail_times
+        times: List[float] = []
+        fresh: List[int] = []
+        for k, line in enumerate(new_lines + tail):
+            if k < len(old_tail) and old_tail[k] == line:
+                times.append(old_times[k])
+            else:
+                times.append(stamp)
+                fresh.append(k)
+
+        for r, k in enumerate(reversed(fresh)):
+            if r < len(known):
+                times[k] = known[-1 - r]
+            elif known:
+                times[k] = known[0]
+
+        count = len(new_lines)
+        self._commit(new_lines, times[:count])
+        self._tail_times = times[count:]
+        if tail != old_tail:
+            self._tail = tail
+            self.version += 1
+
+    def sync(
+        self,
+        lines: List[str],
+        first_line: int,
+        history_size: int,
+        timestamp: Optional[float] = None,
+        line_times: Optional[List[float]] = None,
+    ) -> bool:
+        """
+        Merge a capture of scrollback + screen into the buffer.
+
+        ``lines[i]`` is source line ``first_line + i``, where source lines
+        ``[0, history_size)`` are scrollback history (immutable) and the rest are
+        the visible screen. New history lines are committed, the screen replaces
+        the tail. If the capture starts after line 0 and does not line up with the
+        committed lines (history was trimmed or cleared), nothing is changed and
+        False is returned so the caller can retry with a full capture.
+
+        Lines that scrolled from the screen into history keep the time they
+        first appeared on screen. New or changed lines are stamped with
+        ``line_times`` (arrival times of the latest lines, e.g. from the output
+        stream's newlines) matched up from the end, or else with ``timestamp``.
+
+        Args:
+            lines: Captured lines.
+            first_line: Source line number of ``lines[0]``.
+            history_size: Number of history lines in the source.
+            timestamp: Time the source was last written to (default: now).
+            line_times: Known arrival times of the most recent lines, oldest first.
+
+        Returns:
+            bool: True if the capture was merged, False if a full capture is needed.
+        """
+        committed = self.committed_count
+        expected = committed - self._source_offset
+        history_end = max(0, history_size - first_line)
+
+        if first_line <= expected <= history_size and self._overlap_matches(
+            lines, first_line, expected
+        ):
+            new_from = expected - first_line
+        elif first_line > 0:
+            return False
+        else:
+            new_from = self._find_alignment(lines[:history_end])
+            self._source_offset = committed - new_from
+
+        self._merge(lines[new_from:history_end], lines[history_end:], timestamp, line_times)
+        return True
+
+    def _overlap_matches(self, lines: List[str], first_line: int, expected: int) -> bool:
+        """Check that captured lines before ``expected`` equal committed lines."""
+        available = expected - first_line
+        if available <= 0:
+            return available == 0
+        if available > len(lines):
+            return False
+        count = min(available, SYNC_OVERLAP)
+        end = self._source_offset + expected
+        return self.read_range(end - count, end) == lines[available - count : available]
+
+    def _find_alignment(self, history: List[str]) -> int:
+        """
+        Find where new lines start in a full history capture.
+
+        Looks for the last committed lines in the capture, newest position first.
+        Returns 0 (treat everything as new) when they are not found.
+        """
+        committed = self.committed_count
+        if committed == 0 or not history:
+            return 0
+
+        anchor = self.read_range(committed - SYNC_OVERLAP, committed)
+        size = len(anchor)
+        for end in range(len(history), size - 1, -1):
+            if history[end - 1] == anchor[-1] and history[end - size : end] == anchor:
+                return end
+        return 0
+
+    def _seal(self) -> None:
+        """Compress the oldest hot lines once the hot window is exceeded."""
+        while len(self._hot) >= self.hot_lines + self.segment_lines:
+            self._seal_run(self.segment_lines)
+
+    def _seal_run(self, count: int) -> None:
+        """Move ``count`` lines from the hot list into a compressed segment."""
+        run = self._hot[:count]
+        del self._hot[:count]
+        segment = _Segment(
+            start=self._sealed_count,
+            count=len(run),
+            data=_compress("\n".join(run), self.codec),
+            codec=self.codec,
+            offsets=_line_offsets(run),
+        )
+        self._segments.append(segment)
+        self._segment_starts.append(segment.start)
+        self._sealed_count += segment.count
+
+    def compact(self) -> int:
+        """
+        Seal every committed line, regardless of the hot window.
+
+        Returns:
+            int: Bytes freed.
+        """
+        before = self.nbytes
+        self._cache.clear()
+        while self._hot:
+            self._seal_run(min(self.segment_lines, len(self._hot)))
+        return max(0, before - self.nbytes)
+
+    def clear(self) -> None:
+        """Drop all lines."""
+        self._segments.clear()
+        self._segment_starts.clear()
+        self._sealed_count = 0
+        self._hot = []
+        self._tail = []
+        self._times = array("d")
+        self._tail_times = []
+        self._cache.clear()
+        self._source_offset = 0
+        self.version += 1
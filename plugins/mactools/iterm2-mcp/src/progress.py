@@ -0,0 +1,78 @@
+"""MCP progress notifications for long-running and large tool calls."""
+
+import logging
+from contextvars import ContextVar, Token
+from typing import Awaitable, Callable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Output lines per progress notification of a large read
+CHUNK_LINES = 200
+
+# Seconds between status notifications of a waiting tool
+STATUS_INTERVAL_SECONDS = 1.0
+
+# Sends one notification: progress, total (if known) and a message
+ProgressSender = Callable[[float, Optional[float], Optional[str]], Awaitable[None]]
+
+# Sender of the tool call running in the current task; None if the client did not ask
+_sender: ContextVar[Optional[ProgressSender]] = ContextVar("progress_sender", default=None)
+
+
+def set_sender(sender: Optional[ProgressSender]) -> Token:
+    """Install the progress sender for the current tool call; returns a reset token."""
+    return _sender.set(sender)
+
+
+def reset_sender(token: Token) -> None:
+    """Restore the sender that was active before ``set_sender``."""
+    _sender.reset(token)
+
+
+def is_reporting() -> bool:
+    """Check if the current tool call was asked for progress notifications."""
+    return _sender.get() is not None
+
+
+async def report_progress(
+    progress: float, total: Optional[float] = None, message: Optional[str] = None
+) -> None:
+    """
+    Send a progress notification for the current tool call, if one was asked for.
+
+    Args:
+        progress: Amount done so far; must increase with every notification.
+        total: Amount when done, if known.
+        message: Status text or a chunk of output.
+    """
+    sender = _sender.get()
+    if sender is None:
+        return
+    try:
+        await sender(progress, total, message)
+    except Exception as e:
+        # A client that stopped listening must not fail the tool call itself
+        logger.debug(f"Could not send progress notification: {e}")
+
+
+async def report_chunks(lines: Sequence[str], chunk_lines: int = CHUNK_LINES) -> bool:
+    """
+    Stream lines as progress notifications, ``chunk_lines`` at a time.
+
+    Each notification carries one chunk as its message and the number of lines
+    sent so far as its progress, so a client can show a large read as it
+    arrives. Nothing is sent if the result fits in a single chunk.
+
+    Args:
+        lines: Lines of the result, in order.
+        chunk_lines: Lines per notification.
+
+    Returns:
+        True if the lines were streamed, so the response need not repeat them.
+    """
+    if not is_reporting() or len(lines) <= chunk_lines:
+        return False
+    for start in range(0, len(lines), chunk_lines):
+        end = min(start + chunk_lines, len(lines))
+        await report_progress(end, len(lines), "\n".join(lines[start:end]))
+    return True
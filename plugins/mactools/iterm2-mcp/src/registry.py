@@ -0,0 +1,242 @@
+"""On-disk registry of tracked sessions, for re-adopting them after a restart."""
+
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+from uuid import UUID
+
+from .models import ControlMode, SessionState
+
+logger = logging.getLogger(__name__)
+
+# Compact once the journal holds this many entries and COMPACT_RATIO times the live records
+COMPACT_MIN_ENTRIES = 256
+COMPACT_RATIO = 4
+
+
+def session_record(session: SessionState) -> Dict[str, Any]:
+    """Persistent fields of a session (identity, links and read cursor, not output)."""
+    return {
+        "session_id": str(session.session_id),
+        "iterm_session_id": session.iterm_session_id,
+        "tmux_session": session.tmux_session,
+        "tmux_socket": session.tmux_socket,
+        "tmux_pane": session.tmux_pane,
+        "recording_path": session.recording_path,
+        "command": session.command,
+        "controlled_by": session.controlled_by.value,
+        "tags": sorted(session.tags),
+        "parent_session_id": (
+            str(session.parent_session_id) if session.parent_session_id else None
+        ),
+        "child_session_ids": [str(child_id) for child_id in session.child_session_ids],
+        "pane_position": session.pane_position,
+        "window_id": session.window_id,
+        "created_at": session.created_at.isoformat(),
+        "last_read_index": session.last_read_index,
+    }
+
+
+def owner_alive(owner: Any) -> bool:
+    """Check if the server process that owns a record is still running."""
+    if not isinstance(owner, int) or owner <= 0:
+        return False
+    try:
+        os.kill(owner, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running under another user
+        return True
+    return True
+
+
+def session_from_record(record: Dict[str, Any]) -> SessionState:
+    """Rebuild a session from its record; the output buffer starts empty."""
+    parent_id = record.get("parent_session_id")
+    return SessionState(
+        session_id=UUID(record["session_id"]),
+        iterm_session_id=record.get("iterm_session_id"),
+        tmux_session=record.get("tmux_session"),
+        tmux_socket=record.get("tmux_socket"),
+        tmux_pane=record.get("tmux_pane"),
+        recording_path=record.get("recording_path"),
+        command=record.get("command"),
+        controlled_by=ControlMode(record.get("controlled_by", ControlMode.CLAUDE.value)),
+        tags=set(record.get("tags", [])),
+        parent_session_id=UUID(parent_id) if parent_id else None,
+        child_session_ids=[UUID(child_id) for child_id in record.get("child_session_ids", [])],
+        pane_position=record.get("pane_position"),
+        window_id=record.get("window_id"),
+        created_at=datetime.fromisoformat(record["created_at"]),
+        last_read_index=record.get("last_read_index", 0),
+    )
+
+
+class SessionRegistry:
+    """
+    Append-only JSONL journal of tracked sessions.
+
+    Each change appends one small entry (``put`` a whole record, ``cursor`` for a
+    moved read cursor, ``remove``), so updates cost one buffered write and a
+    crash can at worst tear the last line, which is skipped on load. The journal
+    is rewritten from the live records, atomically, once it has grown to several
+    times their number.
+
+    Several servers may share the journal. Every record carries the PID of the
+    server that owns it, a server only changes its own records, and appends and
+    rewrites hold an exclusive ``flock`` on a sidecar ``.lock`` file, so a
+    rewrite replays everyone's entries and keeps the other servers' records.
+    """
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = Path(path).expanduser() if path else None
+        self.owner = os.getpid()
+        # Records owned by this server
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._entries = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Check if the registry writes to disk."""
+        return self.path is not None
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the journal's lock file exclusively."""
+        assert self.path is not None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        Replay the journal and claim the records no running server owns.
+
+        Returns:
+            Records of the sessions left behind by servers that have stopped.
+        """
+        self.records.clear()
+        self._entries = 0
+        if self.path is None:
+            return []
+
+        try:
+            with self._locked():
+                records = self._read()
+                claimed = []
+                for record in records.values():
+                    owner = record.get("owner")
+                    if owner != self.owner and owner_alive(owner):
+                        continue
+                    record["owner"] = self.owner
+                    self.records[record["session_id"]] = record
+                    claimed.append(dict(record))
+                self._write(records)
+        except OSError as e:
+            logger.error(f"Cannot read session registry {self.path}: {e}")
+            return []
+        return claimed
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        """Replay the whole journal, every server's records included."""
+        assert self.path is not None
+        records: Dict[str, Dict[str, Any]] = {}
+        if not self.path.exists():
+            return records
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._replay(records, json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping damaged entry in {self.path}")
+        return records
+
+    @staticmethod
+    def _replay(records: Dict[str, Dict[str, Any]], entry: Dict[str, Any]) -> None:
+        """Apply one journal entry to the records."""
+        op = entry["op"]
+        if op == "put":
+            record = entry["session"]
+            records[record["session_id"]] = record
+        elif op == "cursor":
+            record = records.get(entry["session_id"])
+            if record is not None:
+                record["last_read_index"] = entry["last_read_index"]
+        elif op == "remove":
+            records.pop(entry["session_id"], None)
+
+    def put(self, session: SessionState) -> None:
+        """Record a new or changed session."""
+        record = session_record(session)
+        record["owner"] = self.owner
+        self.records[record["session_id"]] = record
+        self._append({"op": "put", "session": record})
+
+    def save_cursor(self, session: SessionState) -> None:
+        """Record a session's read cursor if it moved."""
+        record = self.records.get(str(session.session_id))
+        if record is None or record["last_read_index"] == session.last_read_index:
+            return
+        record["last_read_index"] = session.last_read_index
+        self._append(
+            {
+                "op": "cursor",
+                "session_id": record["session_id"],
+                "last_read_index": session.last_read_index,
+            }
+        )
+
+    def remove(self, session_id: Union[UUID, str]) -> None:
+        """Forget a session."""
+        if self.records.pop(str(session_id), None) is not None:
+            self._append({"op": "remove", "session_id": str(session_id)})
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        """Append an entry, compacting the journal when it has grown enough."""
+        if self.path is None:
+            return
+        try:
+            with self._locked():
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logger.error(f"Cannot write session registry {self.path}: {e}")
+            return
+        self._entries += 1
+        if (
+            self._entries >= COMPACT_MIN_ENTRIES
+            and self._entries >= COMPACT_RATIO * len(self.records)
+        ):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the journal as one ``put`` per live record of every server."""
+        if self.path is None:
+            return
+        try:
+            with self._locked():
+                self._write(self._read())
+        except OSError as e:
+            logger.error(f"Cannot compact session registry {self.path}: {e}")
+            return
+        self._entries = len(self.records)
+
+    def _write(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Atomically replace the journal with the given records; call with the lock held."""
+        assert self.path is not None
+        temp = self.path.with_name(self.path.name + ".tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            for record in records.values():
+                entry = {"op": "put", "session": record}
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(temp, self.path)
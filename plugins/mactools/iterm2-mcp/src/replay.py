@@ -0,0 +1,94 @@
+"""Playback of asciicast recordings as live sessions, without a terminal."""
+
+import asyncio
+import os
+import time
+from typing import Callable, List, Optional, Tuple
+
+from .ansi import AnsiNormalizer
+from .asciicast import OUTPUT, AsciicastEvent, iter_events, read_header
+
+# Seconds spent feeding events between event loop yields when not waiting for the pace
+YIELD_INTERVAL_SECONDS = 0.01
+
+
+class ReplayPlayer:
+    """
+    Plays a recording back as if it were a terminal running the session.
+
+    Output events are fed at the recorded pace divided by ``speed`` (0 plays as
+    fast as possible), with pauses capped at ``max_idle`` seconds. Like a
+    terminal, the player holds the output as finished lines plus the line still
+    being written, which the session manager syncs into the buffer, and hands
+    every raw chunk to ``on_output`` the way tmux delivers ``%output``. Lines
+    are stamped with their recorded times, so a replay produces the same buffer
+    on every run, however fast it is played.
+    """
+
+    def __init__(self, path: str, speed: float = 0.0, max_idle: Optional[float] = None) -> None:
+        self.path = os.path.expanduser(path)
+        with open(self.path, encoding="utf-8") as f:
+            self.header = read_header(f)
+        self.speed = max(0.0, speed)
+        self.max_idle = max_idle
+        self.events_played = 0
+        self.finished = False
+        # Unix time of the latest event played
+        self.current_time = self.header.timestamp
+        self._normalizer = AnsiNormalizer()
+        self._pending: List[Tuple[float, List[str]]] = []
+
+    @property
+    def current_line(self) -> str:
+        """The unfinished last line, as shown so far."""
+        return self._normalizer.current_line
+
+    def take_lines(self) -> List[Tuple[float, List[str]]]:
+        """Finished lines since the last call, as (Unix time, lines) per event."""
+        pending, self._pending = self._pending, []
+        return pending
+
+    async def play(self, on_output: Callable[[str], None]) -> None:
+        """
+        Feed the recording's output events until the end of the file.
+
+        Args:
+            on_output: Called with the text of each output event after it is fed.
+        """
+        started = time.monotonic()
+        yielded = started
+        clock = 0.0
+        previous = 0.0
+        with open(self.path, encoding="utf-8") as f:
+            read_header(f)
+            for event in iter_events(f):
+                if event.kind != OUTPUT:
+                    continue
+                gap = max(0.0, event.time - previous)
+                previous = event.time
+                if self.max_idle is not None:
+                    gap = min(gap, self.max_idle)
+                clock += gap
+
+                delay = 0.0
+                if self.speed > 0:
+                    delay = started + clock / self.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    yielded = time.monotonic()
+                elif time.monotonic() - yielded >= YIELD_INTERVAL_SECONDS:
+                    # Let other tool calls run while a replay catches up or runs flat out
+                    await asyncio.sleep(0)
+                    yielded = time.monotonic()
+
+                self._feed(event)
+                on_output(event.data)
+        self.finished = True
+
+    def _feed(self, event: AsciicastEvent) -> None:
+        """Apply one output event to the lines."""
+        self.events_played += 1
+        self.current_time = self.header.timestamp + event.time
+        lines = self._normalizer.feed(event.data)
+        if lines:
+            self._pending.append((self.current_time, [line.text for line in lines]))
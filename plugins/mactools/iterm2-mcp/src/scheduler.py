@@ -0,0 +1,282 @@
+"""Job queue dispatching commands to a pool of worker sessions."""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+
+from .fanout import run_command
+from .models import Job, JobStatus, SessionState
+from .session_manager import SessionManager, get_session_manager
+
+logger = logging.getLogger(__name__)
+
+# Tag carried by every worker session
+WORKER_TAG = "workers"
+
+# Finished jobs remembered before the oldest are forgotten
+MAX_FINISHED_JOBS = 1000
+
+# Output lines kept per job
+JOB_OUTPUT_LINES = 500
+
+# Ctrl-C, sent to interrupt a running job
+INTERRUPT = "\x03"
+
+# After an interrupt, seconds of quiet (and at most how long to wait for it) before
+# the worker takes its next job, so the interrupt cannot reach that job
+INTERRUPT_QUIET_SECONDS = 0.5
+INTERRUPT_SETTLE_SECONDS = 5.0
+
+
+@dataclass
+class _Worker:
+    session_id: UUID
+    task: Optional[asyncio.Task] = None
+    job: Optional[Job] = None
+    run: Optional[asyncio.Task] = None
+
+
+class JobScheduler:
+    """
+    Local parallel executor on top of SessionManager.
+
+    Owns a pool of worker sessions and a FIFO job queue. Each worker takes the
+    next job as soon as its previous one finishes; completion and exit status
+    are detected with the same sentinel as ``run_on_sessions``.
+    """
+
+    def __init__(self, manager: SessionManager) -> None:
+        self.manager = manager
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._workers: Dict[UUID, _Worker] = {}
+        self._queue: Optional[asyncio.Queue] = None
+
+    @property
+    def worker_ids(self) -> List[UUID]:
+        """Session IDs of the pool's workers."""
+        return list(self._workers)
+
+    async def start_pool(
+        self,
+        size: int = 0,
+        session_ids: Optional[List[UUID]] = None,
+        tag: Optional[str] = None,
+    ) -> List[UUID]:
+        """
+        Add workers to the pool.
+
+        Existing sessions can be adopted by ID or tag; ``size`` new tmux-backed
+        tabs are created on top of that.
+
+        Args:
+            size: Number of new worker sessions to create.
+            session_ids: Existing sessions to adopt as workers.
+            tag: Adopt every session with this tag.
+
+        Returns:
+            Session IDs of the workers added.
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+
+        candidates: List[SessionState] = []
+        for session_id in session_ids or []:
+            session = self.manager.get_session_state(session_id)
+            if session:
+                candidates.append(session)
+        if tag:
+            candidates.extend(self.manager.find_sessions(tag))
+
+        for _ in range(size):
+            name = f"mcp-worker-{uuid4().hex[:8]}"
+            session = await self.manager.create_session(tmux_session=name)
+            if session is None:
+                logger.error("Failed to create worker session")
+                break
+            candidates.append(session)
+
+        added: List[UUID] = []
+        for session in candidates:
+            if session.session_id in self._workers:
+                continue
+            session.tags.add(WORKER_TAG)
+            worker = _Worker(session_id=session.session_id)
+            worker.task = asyncio.create_task(self._worker_loop(worker))
+            self._workers[session.session_id] = worker
+            added.append(session.session_id)
+
+        logger.info(f"Worker pool has {len(self._workers)} workers ({len(added)} added)")
+        return added
+
+    def submit(self, command: str, timeout: float = 600.0) -> Job:
+        """
+        Queue a command for the next idle worker.
+
+        Args:
+            command: Command line to run.
+            timeout: Maximum seconds the job may run.
+
+        Returns:
+            The queued Job.
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+
+        job = Job(command=command, timeout=timeout)
+        self.jobs[job.job_id] = job
+        self._queue.put_nowait(job)
+        self._forget_old_jobs()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID."""
+        return self.jobs.get(job_id)
+
+    def list_jobs(self, status: Optional[JobStatus] = None) -> List[Job]:
+        """List jobs in submission order, optionally filtered by status."""
+        return [job for job in self.jobs.values() if status is None or job.status == status]
+
+    @property
+    def queued_count(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return sum(1 for job in self.jobs.values() if job.status == JobStatus.QUEUED)
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job.
+
+        A running job is interrupted with Ctrl-C in its worker session; the
+        worker waits for the interrupt to settle before taking its next job.
+
+        Args:
+            job_id: Job to cancel.
+
+        Returns:
+            bool: True if the job was cancelled, False if unknown or already finished.
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.is_finished:
+            return False
+
+        was_running = job.status == JobStatus.RUNNING
+        self._finish(job, JobStatus.CANCELLED, error="Cancelled")
+        if was_running:
+            for worker in self._workers.values():
+                if worker.job is job and worker.run is not None:
+                    # The worker loop sends the interrupt
+                    worker.run.cancel()
+        return True
+
+    async def stop(self) -> None:
+        """Stop all workers; running jobs are left running in their sessions."""
+        for worker in self._workers.values():
+            if worker.task is not None:
+                worker.task.cancel()
+            if worker.run is not None:
+                worker.run.cancel()
+        self._workers.clear()
+
+    async def _worker_loop(self, worker: _Worker) -> None:
+        """Run queued jobs in one worker session until it goes away."""
+        assert self._queue is not None
+        while True:
+            job = await self._queue.get()
+            if job.status != JobStatus.QUEUED:
+                # Cancelled while waiting in the queue
+                continue
+
+            session = self.manager.get_session_state(worker.session_id)
+            if session is None:
+                # Hand the job to another worker and retire this one
+                self._queue.put_nowait(job)
+                break
+
+            job.status = JobStatus.RUNNING
+            job.session_id = str(worker.session_id)
+            job.started_at = datetime.now()
+            worker.job = job
+            worker.run = asyncio.create_task(
+                run_command(self.manager, session, job.command, job.timeout, JOB_OUTPUT_LINES)
+            )
+            try:
+                result = await worker.run
+            except asyncio.CancelledError:
+                if job.status == JobStatus.CANCELLED:
+                    await self._interrupt(worker)
+                    continue
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.job_id} failed in worker {worker.session_id}: {e}")
+                self._finish(job, JobStatus.FAILED, error=str(e))
+                continue
+            finally:
+                worker.job = None
+                worker.run = None
+
+            job.output = result.output_tail
+            job.exit_status = result.exit_status
+            if result.completed:
+                status = JobStatus.SUCCEEDED if result.exit_status == 0 else JobStatus.FAILED
+            elif result.timed_out and worker.session_id in self.manager.sessions:
+                status = JobStatus.TIMED_OUT
+                # Free the worker for the next job
+                await self._interrupt(worker)
+            else:
+                status = JobStatus.FAILED
+            self._finish(job, status, error=result.error)
+
+        self._workers.pop(worker.session_id, None)
+        logger.info(f"Worker {worker.session_id} left the pool")
+        if not self._workers:
+            self._fail_queued("No workers left in the pool")
+
+    async def _interrupt(self, worker: _Worker) -> None:
+        """Interrupt a worker's command and wait until the session is quiet again."""
+        if not await self.manager.send_to_session(worker.session_id, INTERRUPT, submit=False):
+            return
+        await self.manager.wait_for_idle(
+            worker.session_id,
+            quiet_seconds=INTERRUPT_QUIET_SECONDS,
+            timeout=INTERRUPT_SETTLE_SECONDS,
+        )
+
+    def _fail_queued(self, error: str) -> None:
+        """Fail every job still waiting for a worker."""
+        queued = [job for job in self.jobs.values() if job.status == JobStatus.QUEUED]
+        for job in queued:
+            self._finish(job, JobStatus.FAILED, error=error)
+        if queued:
+            logger.warning(f"Failed {len(queued)} queued jobs: {error}")
+
+    def _finish(self, job: Job, status: JobStatus, error: Optional[str] = None) -> None:
+        """Move a job to a final state."""
+        job.status = status
+        job.error = error
+        job.finished_at = datetime.now()
+
+    def _forget_old_jobs(self) -> None:
+        """Drop the oldest finished jobs beyond MAX_FINISHED_JOBS."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.is_finished]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+
+# Global scheduler instance
+_scheduler: Optional[JobScheduler] = None
+
+
+def get_scheduler() -> JobScheduler:
+    """
+    Get or create the global job scheduler instance.
+
+    Returns:
+        JobScheduler: The global scheduler instance.
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = JobScheduler(get_session_manager())
+    return _scheduler
@@ -0,0 +1,111 @@
+"""Cache of iTerm2 scrollback lines, keyed by absolute line number."""
+
+import sys
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+
+class ScrollbackCache:
+    """
+    Lines fetched from an iTerm2 session's scrollback history.
+
+    iTerm2 numbers lines absolutely: a line keeps its number as it scrolls from
+    the screen into history, and numbers below ``overflow`` are gone for good.
+    History lines never change, so once fetched they are kept here and paging
+    back and forth over them costs no further API calls. Screen lines can still
+    change and are never cached. The least recently used lines are dropped once
+    ``max_lines`` are held.
+
+    The numbering only holds while ``overflow`` grows and the width stays the
+    same: "Clear Buffer" restarts it, and a resize re-wraps every line. Either
+    one empties the cache (see ``validate``).
+    """
+
+    def __init__(self, max_lines: int) -> None:
+        self.max_lines = max_lines
+        self._lines: "OrderedDict[int, str]" = OrderedDict()
+        self._nbytes = 0
+        # Overflow and column count seen by the last validate
+        self._overflow = 0
+        self._columns: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the cached text."""
+        return self._nbytes
+
+    def get(self, line: int) -> Optional[str]:
+        """Return a cached line, or None if it has not been fetched."""
+        text = self._lines.get(line)
+        if text is not None:
+            self._lines.move_to_end(line)
+        return text
+
+    def missing(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        """
+        Find the parts of a line range that are not cached.
+
+        Args:
+            start: First line of the range.
+            stop: Line after the last one.
+
+        Returns:
+            List of (first line, line count) runs to fetch, in order.
+        """
+        runs: List[Tuple[int, int]] = []
+        run_start: Optional[int] = None
+        for line in range(start, stop):
+            if line in self._lines:
+                if run_start is not None:
+                    runs.append((run_start, line - run_start))
+                    run_start = None
+            elif run_start is None:
+                run_start = line
+        if run_start is not None:
+            runs.append((run_start, stop - run_start))
+        return runs
+
+    def store(self, first: int, lines: List[str], history_end: int) -> None:
+        """
+        Cache fetched lines that are in history.
+
+        Args:
+            first: Absolute number of the first line.
+            lines: Fetched lines, in order.
+            history_end: First line of the screen when they were fetched; lines
+                from there on may still change and are not stored.
+        """
+        if self.max_lines <= 0:
+            return
+        for line, text in enumerate(lines[: max(0, history_end - first)], first):
+            previous = self._lines.get(line)
+            if previous is not None:
+                self._nbytes -= sys.getsizeof(previous)
+            self._lines[line] = text
+            self._lines.move_to_end(line)
+            self._nbytes += sys.getsizeof(text)
+
+        while len(self._lines) > self.max_lines:
+            _, text = self._lines.popitem(last=False)
+            self._nbytes -= sys.getsizeof(text)
+
+    def validate(self, overflow: int, columns: int) -> None:
+        """
+        Drop every cached line if the session's lines were renumbered or re-wrapped.
+
+        Args:
+            overflow: First available line, from the session's current line info.
+            columns: Current width of the session.
+        """
+        if overflow < self._overflow or (self._columns is not None and columns != self._columns):
+            self.clear()
+        self._overflow = overflow
+        self._columns = columns
+
+    def clear(self) -> None:
+        """Drop every cached line."""
+        self._lines.clear()
+        self._nbytes = 0
@@ -3,14 +3,16 @@
 import asyncio
 import logging
 import sys
-from typing import Any
+from typing import Any, Optional
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool
 
+from .config import get_config
 from .iterm_controller import get_controller
-from .tools.iterm_tools import TOOLS
+from .progress import ProgressSender, reset_sender, set_sender
+from .tools.schemas import load_tools
 
 # Configure logging
 logging.basicConfig(
@@ -24,29 +26,62 @@ logger = logging.getLogger(__name__)
 # Create MCP server
 app = Server("iterm2-mcp-server")
 
+# Tool descriptors, built on the first tools/list request
+_tool_list: Optional[list[Tool]] = None
+
+
+def _tool_table() -> list[dict[str, Any]]:
+    """The tool table with handlers; importing it loads the session manager and scheduler."""
+    from .tools.iterm_tools import TOOLS
+
+    return TOOLS
+
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List all available MCP tools."""
-    return [
-        Tool(
-            name=tool["name"],
-            description=tool["description"],
-            inputSchema=tool["inputSchema"],
+    global _tool_list
+    if _tool_list is None:
+        # The shipped descriptors spare importing the tool module until the first call
+        _tool_list = [
+            Tool(
+                name=tool["name"],
+                description=tool["description"],
+                inputSchema=tool["inputSchema"],
+            )
+            for tool in load_tools() or _tool_table()
+        ]
+    return _tool_list
+
+
+def _progress_sender() -> Optional[ProgressSender]:
+    """Progress sender for the current request, if the client passed a progress token."""
+    try:
+        context = app.request_context
+    except LookupError:
+        return None
+    token = context.meta.progressToken if context.meta else None
+    if token is None:
+        return None
+
+    async def send(progress: float, total: Optional[float], message: Optional[str]) -> None:
+        await context.session.send_progress_notification(
+            token, progress, total, message, related_request_id=str(context.request_id)
         )
-        for tool in TOOLS
-    ]
+
+    return send
 
 
 @app.call_tool()
 async def call_tool(name: str, arguments: Any) -> list[Any]:
     """Handle tool calls from MCP clients."""
     # Find tool handler
-    tool = next((t for t in TOOLS if t["name"] == name), None)
+    tool = next((t for t in _tool_table() if t["name"] == name), None)
     if not tool:
         logger.error(f"Unknown tool: {name}")
         return [{"type": "text", "text": f"Error: Unknown tool '{name}'"}]
 
+    progress = set_sender(_progress_sender())
     try:
         # Call tool handler
         result = await tool["handler"](arguments or {})
@@ -68,14 +103,34 @@ async def call_tool(name: str, arguments: Any) -> list[Any]:
             if "attach_command" in result:
                 response_text.append(f"\nAttach command: {result['attach_command']}")
 
-            # Add output for read operations
-            if "output" in result:
-                response_text.append(f"\nOutput:\n{result['output']}")
+            # Add transcript of scripted interactions
+            if "transcript" in result:
+                response_text.append("\nTranscript:")
+                for entry in result["transcript"]:
+                    response_text.append(
+                        f"  [{entry['elapsed_seconds']:.2f}s] step {entry['step']} "
+                        f"{entry['action']}: {entry['detail']!r}"
+                    )
+
+            # Add output for read operations (as its own piece: the text is
+            # copied once, by the final join)
+            if "output" in result or "streamed_lines" in result:
+                response_text.append("\nOutput:")
+                if "output" in result:
+                    response_text.append(result["output"])
+                else:
+                    response_text.append(
+                        f"[{result['streamed_lines']} lines sent as progress notifications]"
+                    )
                 if result.get("remaining", 0) > 0:
                     response_text.append(
                         f"\n[{result['remaining']} more lines available]"
                     )
 
+            # Add output version for conditional reads
+            if "version" in result and not result.get("not_modified"):
+                response_text.append(f"\nVersion: {result['version']}")
+
             # Add sessions list
             if "sessions" in result:
                 response_text.append("\n\nActive Sessions:")
@@ -88,6 +143,8 @@ async def call_tool(name: str, arguments: Any) -> list[Any]:
                     )
                     if session.get("tmux_session"):
                         response_text.append(f"    tmux: {session['tmux_session']}")
+                    if session.get("tags"):
+                        response_text.append(f"    tags: {', '.join(session['tags'])}")
 
             # Add warnings
             if "warning" in result:
@@ -104,32 +161,77 @@ async def call_tool(name: str, arguments: Any) -> list[Any]:
     except Exception as e:
         logger.exception(f"Error executing tool {name}")
         return [{"type": "text", "text": f"Error: {str(e)}"}]
+    finally:
+        reset_sender(progress)
 
 
-async def main() -> None:
-    """Run the MCP server."""
-    logger.info("Starting iTerm2 MCP server...")
+async def connect_iterm2() -> bool:
+    """
+    Connect to iTerm2 and start the session manager's watchers.
+
+    The manager is started either way: if the first attempt fails, the
+    controller keeps reconnecting in the background and the manager picks the
+    connection up through its reconnect callback.
+
+    Returns:
+        bool: True if connected, False otherwise.
+    """
+    from .session_manager import get_session_manager
 
-    # Connect to iTerm2
     controller = await get_controller()
+
+    # Watch for sessions closed outside the server
+    await get_session_manager().start()
+
     if not controller.is_connected:
         logger.error(
             "Failed to connect to iTerm2. "
             "Make sure iTerm2 is running and Python API is enabled "
             "(Preferences > General > Magic > Enable Python API)"
         )
-        sys.exit(1)
+        return False
 
     logger.info("Connected to iTerm2")
+    return True
+
+
+async def main() -> None:
+    """Run the MCP server."""
+    logger.info("Starting iTerm2 MCP server...")
+    config = get_config()
+
+    connecting: Optional[asyncio.Task] = None
+    if config.fast_startup:
+        # The handshake and tools/list are answered meanwhile; tool calls that
+        # need iTerm2 wait for this same connection attempt in get_controller()
+        connecting = asyncio.create_task(connect_iterm2())
+    elif not await connect_iterm2():
+        sys.exit(1)
+
     logger.info("Server ready to accept requests")
 
-    # Run MCP server using stdio transport
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(
-            read_stream,
-            write_stream,
-            app.create_initialization_options(),
-        )
+    try:
+        if config.transport == "http":
+            # Many local clients (agents, dashboards) share this session table
+            from .http_transport import serve_http
+
+            await serve_http(app, config.http_host, config.http_port, config.http_socket)
+        else:
+            # Run MCP server using stdio transport
+            async with stdio_server() as (read_stream, write_stream):
+                await app.run(
+                    read_stream,
+                    write_stream,
+                    app.create_initialization_options(),
+                )
+    finally:
+        from .scheduler import get_scheduler
+        from .session_manager import get_session_manager
+
+        if connecting is not None:
+            connecting.cancel()
+        await get_scheduler().stop()
+        await get_session_manager().stop()
 
 
 if __name__ == "__main__":
@@ -1,23 +1,795 @@
 """Session management with tmux integration and output buffering."""
 
 import asyncio
+import functools
+import heapq
 import logging
+import os
+import re
+import shlex
 import subprocess
-from typing import Dict, List, Optional
+import time
+from typing import Any, Coroutine, Dict, Iterable, List, Optional, Set, Tuple
 from uuid import UUID
 
+from .asciicast import AsciicastWriter
+from .condense import condense_lines
+from .config import ServerConfig, get_config
+from .extractors import OutputSummarizer
 from .iterm_controller import get_controller
-from .models import ControlMode, PaginatedOutput, SessionInfo, SessionState
+from .models import (
+    ControlMode,
+    IdleResult,
+    OutputSummary,
+    PaginatedOutput,
+    ReapReport,
+    SearchMatch,
+    SearchResult,
+    ScreenState,
+    SessionInfo,
+    SessionState,
+    TimelineEntry,
+)
+from .offload import Offloader
+from .output_buffer import BufferView
+from .progress import STATUS_INTERVAL_SECONDS, is_reporting, report_progress
+from .registry import SessionRegistry, session_from_record
+from .replay import ReplayPlayer
+from .scrollback import ScrollbackCache
+from .shell_integration import CommandRecord, PromptMarkParser
+from .tmux_control import TmuxControlClient, unescape_output
+from .tmux_placement import TmuxPlacement, tmux_command
+from .vt import VirtualScreen
 
 logger = logging.getLogger(__name__)
 
+# Stream line arrival times held per session between syncs
+MAX_PENDING_LINE_TIMES = 10000
+
+# Quiet time before a screen model that disagrees with tmux is reloaded, so
+# %output notifications still in flight are not applied on top of a newer capture
+SCREEN_SETTLE_SECONDS = 0.5
+
+# iTerm2 session variables cached on each session and updated by variable monitors
+WATCHED_VARIABLES = ("path", "jobName", "jobPid", "tty", "hostname")
+
+# Lines searched between progress notifications (and event loop yields)
+SEARCH_CHUNK_LINES = 20000
+
+# Characters split per step of a large capture, so an offloaded split lets the loop run
+CAPTURE_SPLIT_CHARS = 1 << 20
+
+# Pane fields queried when syncing a tmux session
+_PANE_FORMAT = (
+    "#{history_size} #{cursor_y} #{cursor_x} #{pane_width} #{pane_height} #{alternate_on}"
+)
+
+# tmux commands aimed at the session's own pane rather than its active one
+_PANE_COMMANDS = ("capture-pane", "display-message", "send-keys")
+
+
+def split_capture(output: str) -> List[str]:
+    """Split captured pane text into lines, a bounded slice at a time."""
+    if output.endswith("\n"):
+        output = output[:-1]
+    if len(output) <= CAPTURE_SPLIT_CHARS:
+        return output.split("\n")
+
+    lines: List[str] = []
+    position = 0
+    while True:
+        cut = output.find("\n", position + CAPTURE_SPLIT_CHARS)
+        if cut < 0:
+            lines.extend(output[position:].split("\n"))
+            return lines
+        lines.extend(output[position:cut].split("\n"))
+        position = cut + 1
+
+
+def feed_summarizer(summarizer: OutputSummarizer, lines: Iterable[str], first_line: int) -> None:
+    """Feed consecutive buffer lines, starting at ``first_line``, to a summarizer."""
+    for index, line in enumerate(lines, first_line):
+        summarizer.feed(index, line)
+
+
+def resolve_time(value: Optional[float]) -> Optional[float]:
+    """Turn a time bound into Unix seconds; negative values count back from now."""
+    if value is None or value >= 0:
+        return value
+    return time.time() + value
+
 
 class SessionManager:
     """Manages terminal sessions with iTerm2 and tmux integration."""
 
-    def __init__(self) -> None:
+    def __init__(self, config: Optional[ServerConfig] = None) -> None:
+        self.config = config or get_config()
         self.sessions: Dict[UUID, SessionState] = {}
+        self.registry = SessionRegistry(self.config.registry_path)
+        self.placement = TmuxPlacement(
+            self.config.tmux_placement,
+            self.config.tmux_socket_prefix,
+            self.config.tmux_max_sessions_per_server,
+        )
+        self.offloader = Offloader(
+            threads=self.config.offload_threads,
+            processes=self.config.offload_processes,
+            min_lines=self.config.offload_min_lines,
+            process_min_lines=self.config.offload_process_min_lines,
+        )
         self._tmux_available: Optional[bool] = None
+        self._control_clients: Dict[UUID, TmuxControlClient] = {}
+        self._screen_monitors: Dict[UUID, asyncio.Task] = {}
+        self._prompt_monitors: Dict[UUID, asyncio.Task] = {}
+        self._variable_monitors: Dict[UUID, asyncio.Task] = {}
+        self._replays: Dict[UUID, asyncio.Task] = {}
+        self._termination_monitor: Optional[asyncio.Task] = None
+        self._output_events: Dict[UUID, asyncio.Event] = {}
+        # Serializes summary updates, which may feed the summarizer in a worker thread
+        self._summary_locks: Dict[UUID, asyncio.Lock] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Start background watchers that evict sessions closed outside the server."""
+        controller = await get_controller()
+        controller.add_reconnect_callback(self._on_iterm_reconnected)
+        await self._restore_sessions()
+        if controller.is_connected:
+            self._termination_monitor = self._spawn(
+                controller.monitor_terminations(self._on_iterm_session_terminated)
+            )
+        if self.config.reap_interval_seconds > 0:
+            self._spawn(self._reap_loop())
+
+    async def stop(self) -> None:
+        """Stop background watchers and detach tmux control clients."""
+        for task in list(self._tasks):
+            task.cancel()
+        for client in list(self._control_clients.values()):
+            await client.stop()
+        self._control_clients.clear()
+        self.offloader.shutdown()
+
+    async def _restore_sessions(self) -> None:
+        """
+        Re-adopt sessions recorded by a previous server run that are still alive.
+
+        tmux sessions are matched by name and iTerm2 panes by session ID; the
+        UUID, parent/child links, tags and read cursor are restored, and the
+        output buffer refills from the terminal on the first read. Records of
+        iTerm2-only panes are kept for a later start if iTerm2 is not connected
+        yet, and dropped once they are known to be gone. Records owned by
+        another server that is still running are left to it.
+        """
+        records = self.registry.load()
+        if not records:
+            return
+
+        controller = await get_controller()
+        live_panes = set(controller.session_ids()) if controller.is_connected else None
+        # Running tmux session names per tmux server the records refer to
+        live_tmux: Dict[Optional[str], Set[str]] = {}
+        for record in records:
+            socket = record.get("tmux_socket")
+            if record.get("tmux_session") and socket not in live_tmux:
+                live_tmux[socket] = await self._list_tmux_sessions(socket)
+
+        adopted: Dict[UUID, SessionState] = {}
+        for record in records:
+            try:
+                session = session_from_record(record)
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Dropping unreadable session record: {e}")
+                session_id = record.get("session_id")
+                if session_id is not None:
+                    self.registry.remove(str(session_id))
+                continue
+            if session.session_id in self.sessions:
+                continue
+
+            pane_alive = (
+                None if live_panes is None else session.iterm_session_id in live_panes
+            )
+            if session.tmux_session and session.tmux_session in live_tmux.get(
+                session.tmux_socket, set()
+            ):
+                if pane_alive is False:
+                    # The tab is gone but the tmux session outlived it
+                    session.iterm_session_id = None
+            elif session.tmux_session or pane_alive is False or not session.iterm_session_id:
+                self.registry.remove(session.session_id)
+                continue
+            elif pane_alive is None:
+                # Cannot check the pane until iTerm2 connects; keep the record
+                continue
+            adopted[session.session_id] = session
+            if session.tmux_socket:
+                self.placement.adopt(session.tmux_socket)
+
+        for session in adopted.values():
+            if session.parent_session_id not in adopted:
+                session.parent_session_id = None
+            session.child_session_ids = [
+                child_id for child_id in session.child_session_ids if child_id in adopted
+            ]
+            self.sessions[session.session_id] = session
+            self.registry.put(session)
+            self._watch_session(session)
+
+        if adopted:
+            logger.info(f"Re-adopted {len(adopted)} session(s) from {self.registry.path}")
+
+    async def _list_tmux_sessions(self, socket: Optional[str] = None) -> Set[str]:
+        """Names of the sessions running on a tmux server (empty if tmux is unavailable)."""
+        if not self._check_tmux():
+            return set()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *tmux_command(socket),
+                "list-sessions",
+                "-F",
+                "#{session_name}",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, _ = await asyncio.wait_for(process.communicate(), 5.0)
+        except Exception as e:
+            logger.error(f"Error listing tmux sessions: {e}")
+            return set()
+        # Fails with "no server running" when there are no sessions
+        if process.returncode != 0:
+            return set()
+        return set(stdout.decode("utf-8", errors="replace").splitlines())
+
+    def _spawn(self, coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+        """Run a coroutine in the background, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _watch_session(self, session: SessionState) -> None:
+        """
+        Subscribe to a session's lifecycle and output notifications.
+
+        tmux sessions get a control client that reports ``%output`` and evicts
+        the session on ``%exit``; iTerm2-only sessions get a screen streamer.
+        Either way the session is flagged dirty when it prints something, so
+        reads of an unchanged session skip the capture entirely. Sessions shown
+        in an iTerm2 tab also get their variables watched.
+        """
+        session_id = session.session_id
+
+        if session.tmux_session:
+
+            def on_exit(reason: str) -> None:
+                self._evict_session(session_id, reason)
+
+            client = TmuxControlClient(
+                session.tmux_session,
+                on_exit=on_exit,
+                on_output=lambda pane_id, data: self._on_tmux_output(session_id, pane_id, data),
+                socket=session.tmux_socket,
+            )
+            self._control_clients[session_id] = client
+            self._spawn(self._attach_control_client(session, client))
+        elif session.iterm_session_id:
+            self._spawn(self._monitor_iterm_screen(session))
+            self._spawn(self._monitor_iterm_prompts(session))
+        if session.iterm_session_id:
+            self._spawn(self._monitor_iterm_variables(session))
+
+    async def _attach_control_client(
+        self, session: SessionState, client: TmuxControlClient
+    ) -> None:
+        """Attach a control client, then start tracking the pane's process and lines."""
+        if not await client.start():
+            return
+
+        output = await self._run_tmux(
+            session, ["display-message", "-p", f"#{{pane_id}} #{{pane_pid}} {_PANE_FORMAT}"]
+        )
+        if output is None:
+            return
+        try:
+            pane_id, *fields = output.split()
+            pane_pid, history_size, cursor_y, cursor_x, width, height, alternate = (
+                int(value) for value in fields
+            )
+        except ValueError:
+            logger.error(f"Unexpected tmux pane info: {output!r}")
+            return
+
+        if session.tmux_pane != pane_id:
+            # Splits and windows the user opens later must not be mistaken for it
+            session.tmux_pane = pane_id
+            self.registry.put(session)
+        session.pid = pane_pid
+        if session.recording_path and session.recorder is None:
+            self._start_recording(session, width, height)
+
+        visible = await self._capture_tmux_screen(session)
+        if visible is not None:
+            screen = VirtualScreen(columns=width, rows=height, track_marks=True)
+            screen.load(visible, cursor_y, cursor_x, alternate_screen=bool(alternate))
+            # Until the first sync re-anchors it: the row after the history lines
+            screen.first_line = history_size
+            session.screen = screen
+
+    def _start_recording(self, session: SessionState, width: int, height: int) -> None:
+        """Open (or reopen, to append) the asciicast recording of a session."""
+        if not session.recording_path:
+            return
+        try:
+            session.recorder = AsciicastWriter(
+                session.recording_path, width, height, command=session.command
+            )
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cannot record session {session.session_id}: {e}")
+            return
+        logger.info(f"Recording session {session.session_id} to {session.recording_path}")
+
+    def _on_tmux_output(self, session_id: UUID, pane_id: str, data: bytes) -> None:
+        """Handle a %output notification: flag the session, clock lines, scan for marks."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+
+        if session.tmux_pane is not None and pane_id != session.tmux_pane:
+            # Another pane or window the user opened in the tmux session
+            return
+
+        self._on_session_output(session_id)
+
+        screen = session.screen
+        if screen is not None or session.recorder is not None:
+            raw = unescape_output(data)
+            if screen is not None:
+                screen.feed(raw)
+                # Marks carry the screen row they were written on, in buffer numbering
+                for mark in screen.take_marks():
+                    session.commands.on_mark(mark)
+            if session.recorder is not None:
+                session.recorder.write_output(raw)
+
+        newlines = data.count(b"\\012")
+        if newlines:
+            # Arrival time of each completed line, consumed by the next sync
+            times = session.pending_line_times
+            times.extend([time.time()] * newlines)
+            if len(times) > MAX_PENDING_LINE_TIMES:
+                del times[: len(times) - MAX_PENDING_LINE_TIMES]
+
+    async def _monitor_iterm_prompts(self, session: SessionState) -> None:
+        """Track commands of an iTerm2-only session through prompt notifications."""
+        session_id = session.session_id
+        task = asyncio.current_task()
+        if task is None or not session.iterm_session_id:
+            return
+
+        self._prompt_monitors[session_id] = task
+        try:
+            controller = await get_controller()
+            await controller.monitor_prompts(
+                session.iterm_session_id,
+                on_command_start=lambda command: session.commands.start(command, None),
+                on_command_end=lambda status, lines: session.commands.finish(
+                    status,
+                    lines[1] if lines else None,
+                    output_start_line=lines[0] if lines else None,
+                ),
+            )
+        finally:
+            if self._prompt_monitors.get(session_id) is task:
+                del self._prompt_monitors[session_id]
+
+    async def _monitor_iterm_variables(self, session: SessionState) -> None:
+        """Keep a session's cached iTerm2 variables current through variable monitors."""
+        session_id = session.session_id
+        task = asyncio.current_task()
+        if task is None or not session.iterm_session_id:
+            return
+
+        self._variable_monitors[session_id] = task
+        try:
+            controller = await get_controller()
+            if not session.tmux_session:
+                # The shell's PID never changes; tmux sessions get the pane's from tmux
+                pid = await controller.get_variable(session.iterm_session_id, "pid")
+                if isinstance(pid, int):
+                    session.pid = pid
+
+            def on_change(name: str, value: Any) -> None:
+                session.variables[name] = value
+
+            await controller.monitor_variables(
+                session.iterm_session_id, WATCHED_VARIABLES, on_change
+            )
+        finally:
+            if self._variable_monitors.get(session_id) is task:
+                del self._variable_monitors[session_id]
+                session.variables.clear()
+
+    async def get_session_variable(self, session: SessionState, name: str) -> Any:
+        """
+        Read an iTerm2 variable of a session, from the cache when it is watched.
+
+        Args:
+            session: Session shown in an iTerm2 tab.
+            name: Variable name.
+
+        Returns:
+            The variable value, or None if unavailable.
+        """
+        if session.session_id in self._variable_monitors and name in session.variables:
+            return session.variables[name]
+        if not session.iterm_session_id:
+            return None
+        controller = await get_controller()
+        return await controller.get_variable(session.iterm_session_id, name)
+
+    async def _monitor_iterm_screen(self, session: SessionState) -> None:
+        """Flag an iTerm2-only session dirty on every screen update."""
+        session_id = session.session_id
+        task = asyncio.current_task()
+        if task is None or not session.iterm_session_id:
+            return
+
+        self._screen_monitors[session_id] = task
+        try:
+            controller = await get_controller()
+            await controller.monitor_screen(
+                session.iterm_session_id,
+                lambda: self._on_session_output(session_id),
+            )
+        finally:
+            if self._screen_monitors.get(session_id) is task:
+                del self._screen_monitors[session_id]
+
+    def _on_session_output(self, session_id: UUID) -> None:
+        """Record that a session produced output since its buffer was synced."""
+        session = self.sessions.get(session_id)
+        if session:
+            session.output_dirty = True
+            session.last_output_at = time.monotonic()
+        event = self._output_events.get(session_id)
+        if event is not None:
+            event.set()
+
+    def _has_change_feed(self, session: SessionState) -> bool:
+        """Check if output notifications for the session are being received."""
+        if session.replay is not None:
+            return True
+        client = self._control_clients.get(session.session_id)
+        if client is not None:
+            return client.is_running
+        return session.session_id in self._screen_monitors
+
+    async def wait_for_output(
+        self, session: SessionState, timeout: float, poll_interval: float = 0.25
+    ) -> None:
+        """
+        Wait until a session may have new output since its buffer was last refreshed.
+
+        Returns as soon as an output notification arrives (or right away if one
+        arrived since the last refresh). Sessions without a notification feed
+        simply wait ``poll_interval``.
+
+        Args:
+            session: Session to wait on.
+            timeout: Maximum seconds to wait.
+            poll_interval: Polling period for sessions without notifications.
+        """
+        if timeout <= 0:
+            return
+        if not self._has_change_feed(session):
+            await asyncio.sleep(min(timeout, poll_interval))
+            return
+
+        event = self._output_events.setdefault(session.session_id, asyncio.Event())
+        event.clear()
+        if session.output_dirty or session.session_id not in self.sessions:
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def refresh_output(self, session: SessionState) -> bool:
+        """
+        Bring a session's buffer up to date, capturing only if something changed.
+
+        Args:
+            session: Session to refresh.
+
+        Returns:
+            bool: False if the session turned out to be gone, True otherwise.
+        """
+        if not session.output_dirty and self._has_change_feed(session):
+            return True
+
+        # Clear first so output arriving during the capture marks it dirty again
+        session.output_dirty = False
+        if session.replay is not None:
+            synced = self._sync_replay(session)
+        elif session.tmux_session and self._check_tmux():
+            synced = await self._sync_tmux_output(session)
+        elif session.iterm_session_id:
+            synced = await self._sync_iterm_screen(session)
+        else:
+            return True
+
+        if not synced:
+            session.output_dirty = True
+        return session.session_id in self.sessions
+
+    async def _sync_iterm_screen(self, session: SessionState) -> bool:
+        """Replace the buffer tail with the visible screen of an iTerm2 session."""
+        controller = await get_controller()
+        if not session.iterm_session_id or not await controller.wait_connected():
+            return False
+
+        stamp = self._output_timestamp(session)
+        screen = await controller.get_screen_lines(session.iterm_session_id)
+        if screen is None:
+            return False
+        # The buffer holds just the screen; reads number it as iTerm2 does
+        session.buffer_first_line, lines = screen
+        session.output_buffer.set_tail(lines, timestamp=stamp)
+        return True
+
+    def _sync_replay(self, session: SessionState) -> bool:
+        """Commit the lines a replay finished since the last sync; its last line is the tail."""
+        player = session.replay
+        if player is None:
+            return False
+        for stamp, lines in player.take_lines():
+            session.output_buffer.extend(lines, timestamp=stamp)
+        session.output_buffer.set_tail([player.current_line], timestamp=player.current_time)
+        return True
+
+    def _output_timestamp(self, session: SessionState) -> float:
+        """
+        Wall-clock time to stamp newly captured lines with.
+
+        With a notification feed this is when the session last printed, which
+        can be well before the capture; otherwise it is the capture time.
+        """
+        now = time.time()
+        if not self._has_change_feed(session):
+            return now
+        return min(now, now - (time.monotonic() - session.last_output_at))
+
+    async def _on_iterm_reconnected(self) -> None:
+        """
+        Re-resolve iTerm2 sessions and restart notification monitors after a reconnect.
+
+        Session IDs survive a dropped connection but not an iTerm2 restart. A
+        session whose ID is gone is looked up by the tty of its tmux client or
+        by its shell PID; if neither matches, it is treated as closed. Monitors
+        started on the old connection never see another event, so they are
+        replaced.
+        """
+        controller = await get_controller()
+        live = set(controller.session_ids())
+        for session in list(self.sessions.values()):
+            old_id = session.iterm_session_id
+            if old_id is None or controller.resolve_session_id(old_id) in live:
+                continue
+            new_id = await self._find_iterm_session(session)
+            if new_id is None:
+                self._on_iterm_session_terminated(old_id)
+                continue
+            controller.remap_session(old_id, new_id)
+            session.iterm_session_id = new_id
+            self.registry.put(session)
+            logger.info(f"Session {session.session_id} is iTerm2 session {new_id} after reconnect")
+
+        if self._termination_monitor is not None:
+            self._termination_monitor.cancel()
+        self._termination_monitor = self._spawn(
+            controller.monitor_terminations(self._on_iterm_session_terminated)
+        )
+        for session in list(self.sessions.values()):
+            if not session.iterm_session_id:
+                continue
+            monitor = self._variable_monitors.pop(session.session_id, None)
+            if monitor is not None:
+                monitor.cancel()
+            self._spawn(self._monitor_iterm_variables(session))
+            if session.tmux_session:
+                continue
+            for monitors in (self._screen_monitors, self._prompt_monitors):
+                monitor = monitors.pop(session.session_id, None)
+                if monitor is not None:
+                    monitor.cancel()
+            # Updates during the outage were not reported
+            session.output_dirty = True
+            self._spawn(self._monitor_iterm_screen(session))
+            self._spawn(self._monitor_iterm_prompts(session))
+
+    async def _find_iterm_session(self, session: SessionState) -> Optional[str]:
+        """Find the iTerm2 session showing a tracked session in a new App snapshot."""
+        controller = await get_controller()
+        if session.tmux_session:
+            clients = await self._run_tmux(
+                session, ["list-clients", "-F", "#{client_control_mode} #{client_tty}"]
+            )
+            for line in (clients or "").splitlines():
+                control_mode, _, tty = line.partition(" ")
+                if control_mode != "1" and tty:
+                    found = await controller.find_session(tty=tty)
+                    if found:
+                        return found
+            return None
+        if session.pid is not None:
+            return await controller.find_session(pid=session.pid)
+        return None
+
+    def _on_iterm_session_terminated(self, iterm_session_id: str) -> None:
+        """Evict every tracked session backed by a closed iTerm2 session."""
+        for session in list(self.sessions.values()):
+            if session.iterm_session_id != iterm_session_id:
+                continue
+            if session.tmux_session:
+                # The tmux session outlives its tab; keep it reachable via tmux
+                session.iterm_session_id = None
+                monitor = self._variable_monitors.pop(session.session_id, None)
+                if monitor is not None:
+                    monitor.cancel()
+                session.variables.clear()
+                self.registry.put(session)
+                logger.info(
+                    f"iTerm2 tab for session {session.session_id} closed; "
+                    f"tmux session {session.tmux_session} still tracked"
+                )
+            else:
+                self._evict_session(session.session_id, "iTerm2 session closed")
+
+    def _evict_session(self, session_id: UUID, reason: str) -> Optional[SessionState]:
+        """
+        Drop a session from tracking and release its resources.
+
+        Args:
+            session_id: Session UUID.
+            reason: Why the session is being evicted (for logging).
+
+        Returns:
+            The evicted SessionState, or None if it was not tracked.
+        """
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return None
+        self.registry.remove(session_id)
+
+        if session.parent_session_id:
+            parent = self.sessions.get(session.parent_session_id)
+            if parent and session_id in parent.child_session_ids:
+                parent.child_session_ids.remove(session_id)
+        for child_id in session.child_session_ids:
+            child = self.sessions.get(child_id)
+            if child:
+                child.parent_session_id = None
+
+        # Free the buffer now rather than whenever the last reference goes away
+        session.output_buffer.clear()
+        session.last_read_index = 0
+
+        client = self._control_clients.pop(session_id, None)
+        if client is not None:
+            self._spawn(client.stop())
+        for monitors in (
+            self._screen_monitors,
+            self._prompt_monitors,
+            self._variable_monitors,
+            self._replays,
+        ):
+            monitor = monitors.pop(session_id, None)
+            if monitor is not None:
+                monitor.cancel()
+        session.prompt_parser = None
+        if session.recorder is not None:
+            session.recorder.close()
+            session.recorder = None
+        self._summary_locks.pop(session_id, None)
+        event = self._output_events.pop(session_id, None)
+        if event is not None:
+            # Wake anyone waiting on output so they notice the session is gone
+            event.set()
+
+        logger.info(f"Evicted session {session_id}: {reason}")
+        return session
+
+    async def _reap_loop(self) -> None:
+        """Periodically apply the idle policy and memory budget."""
+        while True:
+            await asyncio.sleep(self.config.reap_interval_seconds)
+            try:
+                report = await self.reap()
+                if report.reclaimed_bytes:
+                    logger.info(
+                        f"Reclaimed {report.reclaimed_bytes} bytes: "
+                        f"{len(report.compressed_session_ids)} buffers compressed, "
+                        f"{len(report.evicted_session_ids)} evicted, "
+                        f"{len(report.terminated_session_ids)} idle sessions terminated"
+                    )
+            except Exception as e:
+                logger.error(f"Error reaping sessions: {e}")
+
+    async def reap(self, force: bool = False) -> ReapReport:
+        """
+        Free memory held by idle sessions and enforce the global memory budget.
+
+        Sessions idle longer than the configured timeout get their whole output
+        buffer compressed. If idle termination is enabled, idle Claude-controlled
+        sessions are terminated instead; shared and user sessions are never
+        terminated here. Afterwards, buffers are evicted least-recently-used first
+        until the total fits the budget (tmux sessions refill them from
+        scrollback on the next read).
+
+        Args:
+            force: Treat every session as idle, regardless of the timeout.
+
+        Returns:
+            ReapReport describing what was reclaimed.
+        """
+        report = ReapReport()
+        timeout = self.config.idle_timeout_seconds
+
+        for session in list(self.sessions.values()):
+            if not force and (timeout <= 0 or session.idle_seconds < timeout):
+                continue
+
+            size = session.buffer_bytes
+            if (
+                self.config.terminate_idle_sessions
+                and session.controlled_by == ControlMode.CLAUDE
+            ):
+                if await self.terminate_session(session.session_id):
+                    report.reclaimed_bytes += size
+                    report.terminated_session_ids.append(str(session.session_id))
+                continue
+
+            if session.output_buffer.hot_count:
+                report.reclaimed_bytes += session.output_buffer.compact()
+                report.compressed_session_ids.append(str(session.session_id))
+
+        budget = self.config.memory_budget_bytes
+        resident = sum(session.buffer_bytes for session in self.sessions.values())
+        if budget > 0 and resident > budget:
+            for session in sorted(self.sessions.values(), key=lambda s: s.last_accessed_at):
+                if resident <= budget:
+                    break
+                if not session.output_buffer and not session.scrollback:
+                    continue
+                freed = self._evict_buffer(session)
+                resident -= freed
+                report.reclaimed_bytes += freed
+                report.evicted_session_ids.append(str(session.session_id))
+
+        report.resident_bytes = resident
+        return report
+
+    def _evict_buffer(self, session: SessionState) -> int:
+        """Drop a session's output buffer and return the bytes freed."""
+        size = session.buffer_bytes
+        session.output_buffer.clear()
+        if session.scrollback is not None:
+            session.scrollback.clear()
+        # The refilled buffer is numbered afresh, so the cursor no longer points
+        # into it; rewinding re-reads retained output instead of skipping some.
+        # iTerm2-only sessions keep iTerm2's numbering, and their cursor with it
+        if not self._reads_scrollback(session):
+            session.last_read_index = 0
+            self.registry.save_cursor(session)
+        # Refill from the terminal on the next read
+        session.output_dirty = True
+        return size - session.buffer_bytes
+
+    @staticmethod
+    def _is_missing_tmux_target(stderr: str) -> bool:
+        """Check if tmux failed because the target session no longer exists."""
+        return "can't find" in stderr or "no server running" in stderr
 
     def _check_tmux(self) -> bool:
         """Check if tmux is installed and available."""
@@ -47,6 +819,10 @@ class SessionManager:
         command: Optional[str] = None,
         tmux_session: Optional[str] = None,
         profile: Optional[str] = None,
+        tmux_socket: Optional[str] = None,
+        tenant: Optional[str] = None,
+        workload: Optional[str] = None,
+        record: Optional[bool] = None,
     ) -> Optional[SessionState]:
         """
         Create a new terminal session.
@@ -55,12 +831,17 @@ class SessionManager:
             command: Command to run in the session.
             tmux_session: Optional tmux session name for persistence.
             profile: Optional iTerm2 profile name.
+            tmux_socket: tmux server to use (-L name or -S path), overriding placement.
+            tenant: Tenant of the session, for the "tenant" placement policy.
+            workload: Workload class of the session, for the "workload" placement policy.
+            record: Record the raw output to an asciicast file (tmux sessions only;
+                default: the server setting).
 
         Returns:
             SessionState if successful, None otherwise.
         """
         controller = await get_controller()
-        if not controller.is_connected:
+        if not await controller.wait_connected():
             logger.error("Cannot create session: not connected to iTerm2")
             return None
 
@@ -71,8 +852,13 @@ class SessionManager:
                 logger.error("tmux requested but not available")
                 return None
 
+            if not tmux_socket:
+                tmux_socket = self.placement.place(
+                    self._sessions_per_socket(), tenant=tenant, workload=workload
+                )
+
             # Create tmux session and attach
-            tmux_cmd = f"tmux new-session -A -s {tmux_session}"
+            tmux_cmd = f"{shlex.join(tmux_command(tmux_socket))} new-session -A -s {tmux_session}"
             if command:
                 tmux_cmd += f" '{command}'"
             final_command = tmux_cmd
@@ -91,26 +877,115 @@ class SessionManager:
         session = SessionState(
             iterm_session_id=iterm_session_id,
             tmux_session=tmux_session,
+            tmux_socket=tmux_socket if tmux_session else None,
             command=final_command or command,
             controlled_by=ControlMode.SHARED if tmux_session else ControlMode.CLAUDE,
         )
+        if record is None:
+            record = self.config.record_sessions
+        if record and tmux_session and self.config.recording_dir:
+            session.recording_path = os.path.join(
+                os.path.expanduser(self.config.recording_dir), f"{session.session_id}.cast"
+            )
 
         # Store session
         self.sessions[session.session_id] = session
+        self.registry.put(session)
+        self._watch_session(session)
         logger.info(
             f"Created session {session.session_id} "
-            f"(tmux: {tmux_session}, iterm: {iterm_session_id})"
+            f"(tmux: {tmux_session}, socket: {session.tmux_socket}, iterm: {iterm_session_id})"
         )
 
         return session
 
-    async def send_to_session(self, session_id: UUID, text: str) -> bool:
+    def _sessions_per_socket(self) -> Dict[str, int]:
+        """Count tracked tmux sessions per dedicated tmux server."""
+        counts: Dict[str, int] = {}
+        for session in self.sessions.values():
+            if session.tmux_session and session.tmux_socket:
+                counts[session.tmux_socket] = counts.get(session.tmux_socket, 0) + 1
+        return counts
+
+    def create_replay_session(
+        self, path: str, speed: float = 0.0, max_idle: Optional[float] = None
+    ) -> Optional[SessionState]:
+        """
+        Play an asciicast recording back as a session, without iTerm2 or tmux.
+
+        The session goes through the same output pipeline as a tmux session:
+        every output event is fed to a screen model and the prompt-mark parser,
+        and the buffer is synced from the normalized lines on the next read.
+
+        Args:
+            path: asciicast v2 recording.
+            speed: Playback speed relative to the recording; 0 plays as fast as possible.
+            max_idle: Cap on pauses between events, in recorded seconds.
+
+        Returns:
+            SessionState if the recording could be opened, None otherwise.
+        """
+        try:
+            player = ReplayPlayer(path, speed=speed, max_idle=max_idle)
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot replay {path}: {e}")
+            return None
+
+        header = player.header
+        session = SessionState(
+            command=header.command or f"replay {player.path}",
+            screen=VirtualScreen(columns=header.width, rows=header.height),
+            prompt_parser=PromptMarkParser(),
+            replay=player,
+        )
+        self.sessions[session.session_id] = session
+        self._spawn(self._run_replay(session))
+        logger.info(f"Replaying {player.path} as session {session.session_id}")
+        return session
+
+    async def _run_replay(self, session: SessionState) -> None:
+        """Play a replay session's recording to the end."""
+        session_id = session.session_id
+        task = asyncio.current_task()
+        player = session.replay
+        if task is None or player is None:
+            return
+
+        self._replays[session_id] = task
+        try:
+            await player.play(lambda data: self._on_replay_output(session_id, data))
+            logger.info(
+                f"Replay of {player.path} finished after {player.events_played} events"
+            )
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"Replay of {player.path} failed: {e}")
+        finally:
+            if self._replays.get(session_id) is task:
+                del self._replays[session_id]
+
+    def _on_replay_output(self, session_id: UUID, text: str) -> None:
+        """Handle a replayed output event like a %output notification."""
+        self._on_session_output(session_id)
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        raw = text.encode("utf-8")
+        if session.screen is not None:
+            session.screen.feed(raw)
+        parser = session.prompt_parser
+        if parser is not None:
+            for mark in parser.feed(raw):
+                session.commands.on_mark(mark)
+
+    async def send_to_session(self, session_id: UUID, text: str, submit: bool = True) -> bool:
         """
         Send text to a session.
 
         Args:
             session_id: Session UUID.
             text: Text to send.
+            submit: Press Enter after the text (tmux sessions).
 
         Returns:
             bool: True if successful, False otherwise.
@@ -119,30 +994,26 @@ class SessionManager:
         if not session:
             logger.error(f"Session not found: {session_id}")
             return False
+        if session.replay is not None:
+            logger.error(f"Session {session_id} is a replay and takes no input")
+            return False
+        session.touch()
+        # The echo is output too; count from now so an idle wait can't finish early
+        session.last_output_at = time.monotonic()
 
         # Send via tmux if available
         if session.tmux_session and self._check_tmux():
-            try:
-                # Ensure text ends with newline for command execution
-                if not text.endswith("\n"):
-                    text += "\n"
-
-                result = subprocess.run(
-                    ["tmux", "send-keys", "-t", session.tmux_session, text],
-                    capture_output=True,
-                    text=True,
-                    timeout=5,
-                )
-
-                if result.returncode == 0:
-                    logger.debug(f"Sent text via tmux to {session.tmux_session}")
-                    return True
-                else:
-                    logger.error(
-                        f"tmux send-keys failed: {result.stderr}"
-                    )
-            except Exception as e:
-                logger.error(f"Error sending via tmux: {e}")
+            # Ensure text ends with newline for command execution
+            if submit and not text.endswith("\n"):
+                text += "\n"
+            if session.recorder is not None:
+                session.recorder.write_input(text)
+
+            if await self._run_tmux(session, ["send-keys", text]) is not None:
+                logger.debug(f"Sent text via tmux to {session.tmux_session}")
+                return True
+            if session_id not in self.sessions:
+                return False
 
         # Fallback to iTerm2 API
         if session.iterm_session_id:
@@ -152,40 +1023,266 @@ class SessionManager:
         logger.error(f"No method available to send to session {session_id}")
         return False
 
-    def _read_tmux_output(self, tmux_session: str) -> Optional[List[str]]:
+    @staticmethod
+    def _tmux_target(session: SessionState, command: str) -> str:
+        """Target of a tmux command: the session's pane once known, else the session."""
+        if command in _PANE_COMMANDS and session.tmux_pane:
+            return session.tmux_pane
+        return session.tmux_session or ""
+
+    async def _run_tmux(
+        self, session: SessionState, args: List[str], timeout: float = 5.0
+    ) -> Optional[str]:
         """
-        Read output from a tmux session.
+        Run a tmux command against a session and return its stdout.
+
+        The command runs as an asyncio subprocess, so concurrent calls for
+        different sessions do not block each other or the event loop. It goes
+        to the tmux server the session was placed on.
 
         Args:
-            tmux_session: tmux session name.
+            session: Session backed by a tmux session.
+            args: tmux command and arguments (the target is added automatically).
+            timeout: Seconds to wait for tmux.
 
         Returns:
-            List of output lines, or None if failed.
+            Command output, or None if the command failed.
         """
         try:
-            result = subprocess.run(
-                ["tmux", "capture-pane", "-t", tmux_session, "-p"],
-                capture_output=True,
-                text=True,
-                timeout=5,
+            process = await asyncio.create_subprocess_exec(
+                *tmux_command(session.tmux_socket),
+                args[0],
+                "-t",
+                self._tmux_target(session, args[0]),
+                *args[1:],
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
-
-            if result.returncode == 0:
-                lines = result.stdout.split("\n")
-                return lines
-            else:
-                logger.error(f"tmux capture-pane failed: {result.stderr}")
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                logger.error(f"tmux {args[0]} timed out")
                 return None
 
+            if process.returncode == 0:
+                return stdout.decode("utf-8", errors="replace")
+
+            error = stderr.decode("utf-8", errors="replace")
+            logger.error(f"tmux {args[0]} failed: {error}")
+            if self._is_missing_tmux_target(error):
+                self._evict_session(session.session_id, "tmux session no longer exists")
+            return None
+
         except Exception as e:
-            logger.error(f"Error reading tmux output: {e}")
+            logger.error(f"Error running tmux {args[0]}: {e}")
+            return None
+
+    async def _capture_tmux(
+        self, session: SessionState, first_line: int, history_size: int
+    ) -> Optional[List[str]]:
+        """
+        Capture a tmux pane from a scrollback line to the bottom of the screen.
+
+        Args:
+            session: Session backed by a tmux session.
+            first_line: Scrollback line to start from (0 = oldest history line).
+            history_size: Current number of history lines in the pane.
+
+        Returns:
+            List of output lines, or None if failed.
+        """
+        output = await self._run_tmux(
+            session, ["capture-pane", "-p", "-S", str(first_line - history_size)]
+        )
+        if output is None:
+            return None
+        return await self.offloader.run(history_size - first_line, split_capture, output)
+
+    async def _sync_tmux_output(self, session: SessionState) -> bool:
+        """
+        Bring a session's buffer up to date with its tmux pane.
+
+        Only scrollback the buffer has not committed yet is captured (plus a few
+        lines of overlap to confirm alignment); if tmux trimmed or cleared its
+        history in the meantime, the full scrollback is captured instead.
+
+        Args:
+            session: Session backed by a tmux session.
+
+        Returns:
+            bool: True if the buffer was updated, False otherwise.
+        """
+        screen = session.screen
+        fed = screen.bytes_fed if screen is not None else 0
+        output = await self._run_tmux(session, ["display-message", "-p", _PANE_FORMAT])
+        if output is None:
+            return False
+        try:
+            history_size, cursor_y, cursor_x, width, height, alternate = (
+                int(value) for value in output.split()
+            )
+        except ValueError:
+            logger.error(f"Unexpected tmux pane info: {output!r}")
+            return False
+
+        buffer = session.output_buffer
+        stamp = self._output_timestamp(session)
+        # Newline times from the stream since the last sync
+        newline_times = session.pending_line_times
+        session.pending_line_times = []
+
+        def line_times(lines: List[str], first_line: int) -> List[float]:
+            cursor = history_size + cursor_y - first_line
+            if 0 <= cursor < len(lines) and lines[cursor].strip():
+                # The cursor line has text but no newline yet
+                return newline_times + [stamp]
+            return newline_times
+
+        first_line = buffer.next_source_line(history_size)
+        lines = await self._capture_tmux(session, first_line, history_size)
+        if lines is None:
+            return False
+        if screen is not None:
+            screen.resize(width, height)
+            if screen.bytes_fed == fed:
+                visible = lines[-height:] if len(lines) >= height else None
+                await self._reconcile_screen(
+                    session, screen, visible, cursor_y, cursor_x, bool(alternate)
+                )
+        synced = buffer.sync(
+            lines, first_line, history_size, stamp, line_times(lines, first_line)
+        )
+        if not synced:
+            lines = await self._capture_tmux(session, 0, history_size)
+            synced = lines is not None and buffer.sync(
+                lines, 0, history_size, stamp, line_times(lines, 0)
+            )
+        if synced and screen is not None and screen.bytes_fed == fed:
+            # The screen starts right after the history: anchor mark line numbers
+            # there, undoing drift from history trimming, reflow or a reload
+            screen.first_line = buffer.committed_count
+        return synced
+
+    async def _capture_tmux_screen(self, session: SessionState) -> Optional[List[str]]:
+        """Capture the visible rows of a tmux pane."""
+        output = await self._run_tmux(session, ["capture-pane", "-p"])
+        if output is None:
+            return None
+        if output.endswith("\n"):
+            output = output[:-1]
+        return output.split("\n")
+
+    async def _reconcile_screen(
+        self,
+        session: SessionState,
+        screen: VirtualScreen,
+        visible: Optional[List[str]],
+        cursor_row: int,
+        cursor_col: int,
+        alternate: bool,
+    ) -> None:
+        """
+        Reload a session's screen model from tmux if the two disagree.
+
+        Called with pane state captured while no output was fed, so both
+        describe the same moment unless notifications are still in flight;
+        the reload therefore waits until the session has been quiet for
+        SCREEN_SETTLE_SECONDS.
+        """
+        if (
+            screen.cursor_position == (cursor_row, cursor_col)
+            and screen.alternate_screen == alternate
+            and (visible is None or screen.lines() == [line.rstrip() for line in visible])
+        ):
+            return
+        if time.monotonic() - session.last_output_at < SCREEN_SETTLE_SECONDS:
+            return
+
+        fed = screen.bytes_fed
+        if visible is None:
+            visible = await self._capture_tmux_screen(session)
+            if visible is None or screen.bytes_fed != fed:
+                return
+        logger.debug(f"Reloading screen model of session {session.session_id}")
+        screen.load(visible, cursor_row, cursor_col, alternate_screen=alternate)
+
+    async def get_screen(self, session_id: UUID) -> Optional[ScreenState]:
+        """
+        Get the visible screen and cursor of a session.
+
+        tmux sessions are answered from the local screen model without any
+        capture; other sessions fall back to tmux or the iTerm2 API.
+
+        Args:
+            session_id: Session UUID.
+
+        Returns:
+            ScreenState, or None if the session was not found or the screen is unavailable.
+        """
+        session = self.sessions.get(session_id)
+        if not session:
+            logger.error(f"Session not found: {session_id}")
             return None
+        session.touch()
+
+        screen = session.screen
+        if screen is not None and self._has_change_feed(session):
+            cursor_row, cursor_col = screen.cursor_position
+            return ScreenState(
+                lines=screen.lines(),
+                cursor_row=cursor_row,
+                cursor_col=cursor_col,
+                alternate_screen=screen.alternate_screen,
+                source="emulator",
+                session_id=str(session_id),
+            )
+
+        if session.tmux_session and self._check_tmux():
+            output = await self._run_tmux(
+                session, ["display-message", "-p", "#{cursor_y} #{cursor_x} #{alternate_on}"]
+            )
+            lines = await self._capture_tmux_screen(session)
+            if output is not None and lines is not None:
+                try:
+                    cursor_row, cursor_col, alternate = (int(v) for v in output.split())
+                except ValueError:
+                    logger.error(f"Unexpected tmux pane info: {output!r}")
+                    return None
+                return ScreenState(
+                    lines=[line.rstrip() for line in lines],
+                    cursor_row=cursor_row,
+                    cursor_col=cursor_col,
+                    alternate_screen=bool(alternate),
+                    source="tmux",
+                    session_id=str(session_id),
+                )
+
+        if session.iterm_session_id:
+            controller = await get_controller()
+            captured = await controller.get_screen_lines(session.iterm_session_id)
+            if captured is not None:
+                return ScreenState(
+                    lines=captured[1],
+                    cursor_row=None,
+                    cursor_col=None,
+                    alternate_screen=False,
+                    source="iterm2",
+                    session_id=str(session_id),
+                )
+        return None
 
     async def read_session_output(
         self,
         session_id: UUID,
         offset: int = 0,
         length: int = 1000,
+        if_changed_since: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        collapse_repeats: bool = True,
     ) -> Optional[PaginatedOutput]:
         """
         Read session output with pagination.
@@ -194,6 +1291,14 @@ class SessionManager:
             session_id: Session UUID.
             offset: Starting line (0=from last read, positive=absolute, negative=tail).
             length: Maximum lines to return.
+            if_changed_since: Output version from a previous read; if the output is
+                still at that version, no lines are returned and ``not_modified`` is set.
+            since: Only lines that arrived at or after this time (Unix seconds, or
+                negative for seconds before now). Replaces ``offset``.
+            until: Only lines that arrived at or before this time (same format).
+            max_bytes: Budgeted read: condense the whole selected range (``length`` is
+                ignored) to about this many bytes, keeping its head and tail.
+            collapse_repeats: In a budgeted read, fold runs of similar lines.
 
         Returns:
             PaginatedOutput if successful, None otherwise.
@@ -202,17 +1307,57 @@ class SessionManager:
         if not session:
             logger.error(f"Session not found: {session_id}")
             return None
+        session.touch()
 
-        # Update buffer from tmux if available
-        if session.tmux_session and self._check_tmux():
-            lines = self._read_tmux_output(session.tmux_session)
-            if lines is not None:
-                session.output_buffer = lines
+        # Update buffer from the terminal if it printed anything
+        if not await self.refresh_output(session):
+            return None
 
-        # Calculate read range
-        total_lines = len(session.output_buffer)
+        # Calculate read range. iTerm2-only sessions are numbered as iTerm2 numbers
+        # their scrollback, for every kind of read and for the read cursor
+        version = session.output_buffer.version
+        numbering: Optional[Tuple[int, int, int]] = None
+        if self._reads_scrollback(session):
+            numbering = await self._scrollback_info(session)
+            if numbering is None:
+                return None
+            total_lines = numbering[2]
+        else:
+            total_lines = len(session.output_buffer)
+
+        if if_changed_since is not None and if_changed_since == version:
+            return PaginatedOutput(
+                lines=[],
+                total_lines=total_lines,
+                read_from=session.last_read_index,
+                read_count=0,
+                remaining=max(0, total_lines - session.last_read_index),
+                session_id=str(session_id),
+                controlled_by=session.controlled_by.value,
+                version=version,
+                not_modified=True,
+            )
 
-        if offset < 0:
+        if max_bytes is not None:
+            return await self._read_condensed(
+                session, offset, since, until, max_bytes, collapse_repeats, numbering
+            )
+        if since is None and until is None and numbering is not None:
+            return await self._read_scrollback(session, offset, length, version, numbering)
+
+        # From here on positions are buffer indices, mapped onto the read numbering
+        # by buffer_first_line only in the reply. iTerm2-only sessions get here just
+        # for time windows, which only the buffer (their screen) can resolve
+        end_limit = len(session.output_buffer)
+        if since is not None or until is not None:
+            # Time window: located by binary search on line timestamps
+            start_index, end_limit = session.output_buffer.time_range(
+                resolve_time(since), resolve_time(until)
+            )
+            lines_to_read = session.output_buffer.read_range(
+                start_index, min(end_limit, start_index + length)
+            )
+        elif offset < 0:
             # Negative offset: read from end
             start_index = max(0, total_lines + offset)
             lines_to_read = session.output_buffer[start_index : start_index + length]
@@ -221,7 +1366,8 @@ class SessionManager:
             start_index = session.last_read_index
             lines_to_read = session.output_buffer[start_index : start_index + length]
             # Update last read index
-            session.last_read_index = min(start_index + len(lines_to_read), total_lines)
+            session.last_read_index = min(start_index + len(lines_to_read), end_limit)
+            self.registry.save_cursor(session)
         else:
             # Positive offset: absolute position
             start_index = offset
@@ -229,16 +1375,584 @@ class SessionManager:
 
         read_count = len(lines_to_read)
         end_index = start_index + read_count
-        remaining = max(0, total_lines - end_index)
+        remaining = max(0, end_limit - end_index)
 
         return PaginatedOutput(
             lines=lines_to_read,
             total_lines=total_lines,
-            read_from=start_index,
+            read_from=session.buffer_first_line + start_index,
             read_count=read_count,
             remaining=remaining,
             session_id=str(session_id),
             controlled_by=session.controlled_by.value,
+            version=version,
+            timestamps=session.output_buffer.read_times(start_index, end_index),
+        )
+
+    @staticmethod
+    def _reads_scrollback(session: SessionState) -> bool:
+        """Check if line reads go to iTerm2's scrollback (iTerm2-only sessions)."""
+        return not session.tmux_session and session.iterm_session_id is not None
+
+    async def _scrollback_info(self, session: SessionState) -> Optional[Tuple[int, int, int]]:
+        """
+        Get the line numbering of an iTerm2-only session, validating its scrollback cache.
+
+        Returns:
+            Tuple of (first available line, first screen line, end line), or None
+            if iTerm2 could not be read.
+        """
+        assert session.iterm_session_id is not None
+        controller = await get_controller()
+        line_info = await controller.get_line_info(session.iterm_session_id)
+        if line_info is None:
+            return None
+        first_line, history_end, total_lines, columns = line_info
+        if session.scrollback is not None:
+            session.scrollback.validate(first_line, columns)
+        return first_line, history_end, total_lines
+
+    @staticmethod
+    def _start_line(session: SessionState, offset: int, first_line: int, total_lines: int) -> int:
+        """Resolve a read offset (0=from last read, positive=absolute, negative=tail)."""
+        if offset < 0:
+            start = total_lines + offset
+        elif offset == 0:
+            start = session.last_read_index
+        else:
+            start = offset
+        return min(max(first_line, start), total_lines)
+
+    async def _read_scrollback(
+        self,
+        session: SessionState,
+        offset: int,
+        length: int,
+        version: int,
+        numbering: Tuple[int, int, int],
+    ) -> Optional[PaginatedOutput]:
+        """
+        Read a window of an iTerm2-only session from iTerm2's scrollback.
+
+        Line numbers are iTerm2's absolute line numbers, which also number the
+        output ranges of shell-integration command records. Only the window is
+        fetched, and history lines already fetched come from the cache.
+
+        Args:
+            numbering: The session's line info, from ``_scrollback_info``.
+
+        Returns:
+            PaginatedOutput, or None if iTerm2 could not be read.
+        """
+        first_line, _, total_lines = numbering
+        start_index = self._start_line(session, offset, first_line, total_lines)
+
+        window = await self._fetch_scrollback(
+            session, start_index, min(total_lines, start_index + length)
+        )
+        if window is None:
+            return None
+        start_index, lines = window
+
+        read_count = len(lines)
+        end_index = start_index + read_count
+        if offset == 0:
+            session.last_read_index = end_index
+            self.registry.save_cursor(session)
+
+        return PaginatedOutput(
+            lines=lines,
+            total_lines=total_lines,
+            read_from=start_index,
+            read_count=read_count,
+            remaining=max(0, total_lines - end_index),
+            session_id=str(session.session_id),
+            controlled_by=session.controlled_by.value,
+            version=version,
+        )
+
+    async def _fetch_scrollback(
+        self, session: SessionState, start: int, stop: int
+    ) -> Optional[Tuple[int, List[str]]]:
+        """
+        Get lines of an iTerm2-only session, fetching only what is not cached.
+
+        Call after ``_scrollback_info``, which drops cached lines that a cleared
+        or re-wrapped history made stale.
+
+        Args:
+            session: iTerm2-only session.
+            start: First absolute line number.
+            stop: Line after the last one.
+
+        Returns:
+            Tuple of (first line returned, lines), where the first line is later
+            than ``start`` if the range began to leave history meanwhile; or None
+            if iTerm2 could not be read.
+        """
+        assert session.iterm_session_id is not None
+        if session.scrollback is None:
+            session.scrollback = ScrollbackCache(self.config.scrollback_cache_lines)
+        cache = session.scrollback
+
+        # Cached lines are taken first: storing the fetched ones may evict them
+        window: Dict[int, str] = {}
+        for index in range(start, stop):
+            text = cache.get(index)
+            if text is not None:
+                window[index] = text
+
+        runs = cache.missing(start, stop)
+        if runs:
+            controller = await get_controller()
+            result = await controller.get_line_ranges(session.iterm_session_id, runs)
+            if result is None:
+                return None
+            history_end, ranges = result
+            for first, fetched in ranges:
+                cache.store(first, fetched, history_end)
+                window.update(enumerate(fetched, first))
+
+        lines: List[str] = []
+        for index in range(start, stop):
+            text = window.get(index)
+            if text is None:
+                if lines:
+                    break
+                # Dropped from history before it could be fetched
+                start = index + 1
+                continue
+            lines.append(text)
+        return start, lines
+
+    async def read_lines(
+        self, session: SessionState, start: int, stop: int
+    ) -> Optional[Tuple[int, List[str]]]:
+        """
+        Get lines ``[start, stop)`` in the numbering reads of the session use.
+
+        That is iTerm2's absolute line numbering for iTerm2-only sessions (read
+        from the scrollback) and buffer indices otherwise.
+
+        Returns:
+            Tuple of (first line returned, lines), where the first line is later
+            than ``start`` if the range began before the first available line;
+            or None if the output could not be read.
+        """
+        if self._reads_scrollback(session):
+            numbering = await self._scrollback_info(session)
+            if numbering is None:
+                return None
+            start = max(start, numbering[0])
+            return await self._fetch_scrollback(session, start, min(stop, numbering[2]))
+        start = max(0, start)
+        return start, session.output_buffer.read_range(start, stop)
+
+    async def _read_condensed(
+        self,
+        session: SessionState,
+        offset: int,
+        since: Optional[float],
+        until: Optional[float],
+        max_bytes: int,
+        collapse_repeats: bool,
+        numbering: Optional[Tuple[int, int, int]],
+    ) -> Optional[PaginatedOutput]:
+        """
+        Condense a whole read range to a byte budget in one pass over the output.
+
+        Args:
+            numbering: Line info of an iTerm2-only session (from ``_scrollback_info``),
+                whose range is read from the scrollback; None for other sessions.
+        """
+        buffer = session.output_buffer
+        first_line, total_lines = (numbering[0], numbering[2]) if numbering else (0, len(buffer))
+        lines: Iterable[str]
+        if since is not None or until is not None:
+            # Only the buffer has arrival times
+            start, stop = buffer.time_range(resolve_time(since), resolve_time(until))
+            lines = buffer.view(start, stop)
+            start_index = session.buffer_first_line + start
+            end_index = session.buffer_first_line + stop
+        else:
+            start_index = self._start_line(session, offset, first_line, total_lines)
+            if numbering is not None:
+                window = await self._fetch_scrollback(session, start_index, total_lines)
+                if window is None:
+                    return None
+                start_index, lines = window
+            else:
+                lines = buffer.view(start_index, total_lines)
+            end_index = total_lines
+            if offset == 0:
+                session.last_read_index = total_lines
+                self.registry.save_cursor(session)
+
+        condensed, report = await self.offloader.run(
+            end_index - start_index,
+            functools.partial(
+                condense_lines,
+                lines,
+                max_bytes,
+                first_index=start_index,
+                collapse_repeats=collapse_repeats,
+            ),
+        )
+        return PaginatedOutput(
+            lines=condensed,
+            total_lines=total_lines,
+            read_from=start_index,
+            read_count=report.input_lines,
+            remaining=0,
+            session_id=str(session.session_id),
+            controlled_by=session.controlled_by.value,
+            version=buffer.version,
+            condensed=report,
+        )
+
+    async def get_timeline(
+        self,
+        session_ids: List[UUID],
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 500,
+    ) -> List[TimelineEntry]:
+        """
+        Merge the output of several sessions into one list ordered by arrival time.
+
+        Each session's window is located by binary search on its line timestamps;
+        the per-session runs (already sorted) are then k-way merged.
+
+        Args:
+            session_ids: Sessions to include.
+            since: Earliest arrival time (Unix seconds, or negative for seconds before now).
+            until: Latest arrival time (same format).
+            limit: Maximum entries; the most recent ones are kept.
+
+        Returns:
+            Timeline entries, oldest first.
+        """
+        since_time, until_time = resolve_time(since), resolve_time(until)
+        runs = []
+        for session_id in session_ids:
+            session = self.sessions.get(session_id)
+            if not session:
+                continue
+            session.touch()
+            if not await self.refresh_output(session):
+                continue
+
+            buffer = session.output_buffer
+            start, stop = buffer.time_range(since_time, until_time)
+            # Only the last `limit` lines of each session can make the merged cut
+            start = max(start, stop - limit)
+            label = str(session_id)
+            first = session.buffer_first_line + start
+            run = [
+                TimelineEntry(timestamp=stamp, session_id=label, line=first + i, text=text)
+                for i, (stamp, text) in enumerate(
+                    zip(buffer.read_times(start, stop), buffer.read_range(start, stop))
+                )
+            ]
+            # Committed lines are already in order; screen lines rewritten in place may not be
+            run.sort(key=lambda entry: entry.timestamp)
+            runs.append(run)
+
+        merged = list(heapq.merge(*runs, key=lambda entry: entry.timestamp))
+        return merged[-limit:]
+
+    async def wait_for_idle(
+        self,
+        session_id: UUID,
+        quiet_seconds: float = 2.0,
+        timeout: float = 60.0,
+        poll_interval: float = 0.25,
+    ) -> Optional[IdleResult]:
+        """
+        Wait until a session has printed nothing for ``quiet_seconds``.
+
+        Driven by the last-output timestamp that output notifications maintain:
+        the wait sleeps until the earliest moment the session could be quiet and
+        re-checks, without capturing the screen. Sessions without a notification
+        feed fall back to polling the buffer version every ``poll_interval``.
+
+        Args:
+            session_id: Session UUID.
+            quiet_seconds: How long output must be unchanged.
+            timeout: Maximum seconds to wait.
+            poll_interval: Polling period for sessions without notifications.
+
+        Returns:
+            IdleResult (``idle`` is False on timeout), or None if the session is gone.
+        """
+        session = self.sessions.get(session_id)
+        if not session:
+            logger.error(f"Session not found: {session_id}")
+            return None
+        session.touch()
+
+        started = time.monotonic()
+        next_status = started + STATUS_INTERVAL_SECONDS
+        version = session.output_buffer.version
+        while True:
+            if session_id not in self.sessions:
+                logger.info(f"Session {session_id} went away while waiting for idle")
+                return None
+
+            if not self._has_change_feed(session):
+                if not await self.refresh_output(session):
+                    return None
+                if session.output_buffer.version != version:
+                    version = session.output_buffer.version
+                    session.last_output_at = time.monotonic()
+
+            now = time.monotonic()
+            quiet_for = now - session.last_output_at
+            waited = now - started
+            if quiet_for >= quiet_seconds or waited >= timeout:
+                break
+
+            delay = min(quiet_seconds - quiet_for, timeout - waited)
+            if not self._has_change_feed(session):
+                delay = min(delay, poll_interval)
+            if is_reporting():
+                if now >= next_status:
+                    next_status = now + STATUS_INTERVAL_SECONDS
+                    await report_progress(
+                        waited,
+                        timeout,
+                        f"Waiting for idle: quiet {quiet_for:.1f}s of {quiet_seconds:g}s, "
+                        f"{waited:.0f}s elapsed",
+                    )
+                delay = min(delay, next_status - now)
+            await asyncio.sleep(delay)
+
+        if not await self.refresh_output(session):
+            return None
+        return IdleResult(
+            idle=quiet_for >= quiet_seconds,
+            waited_seconds=waited,
+            busy_seconds=max(0.0, session.last_output_at - started),
+            quiet_seconds=quiet_for,
+            version=session.output_buffer.version,
+            session_id=str(session_id),
+        )
+
+    async def search_session_output(
+        self,
+        session_id: UUID,
+        pattern: str,
+        literal: bool = False,
+        ignore_case: bool = False,
+        cursor: int = 0,
+        max_matches: int = 50,
+        context: int = 2,
+    ) -> Optional[SearchResult]:
+        """
+        Search a session's output for lines matching a pattern.
+
+        Args:
+            session_id: Session UUID.
+            pattern: Regular expression (or literal text if ``literal``).
+            literal: Treat the pattern as plain text.
+            ignore_case: Case-insensitive matching.
+            cursor: Line to resume searching from (``next_cursor`` of a previous call).
+            max_matches: Maximum matching lines to return.
+            context: Lines of context before and after each match.
+
+        Returns:
+            SearchResult if the session exists, None otherwise.
+
+        Raises:
+            re.error: If the pattern is not a valid regular expression.
+        """
+        session = self.sessions.get(session_id)
+        if not session:
+            logger.error(f"Session not found: {session_id}")
+            return None
+        session.touch()
+
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        compiled = re.compile(re.escape(pattern) if literal else pattern, flags)
+
+        if not await self.refresh_output(session):
+            return None
+
+        # Searched a slice at a time, reporting progress and yielding in between;
+        # large searches run in a worker, on a frozen view of each slice.
+        # iTerm2-only sessions are searched in their scrollback, by its numbering
+        buffer = session.output_buffer
+        first_line, total = 0, len(buffer)
+        scrollback = self._reads_scrollback(session)
+        if scrollback:
+            numbering = await self._scrollback_info(session)
+            if numbering is None:
+                return None
+            first_line, _, total = numbering
+        lines: List[int] = []
+        next_cursor: Optional[int] = None
+        start = position = max(first_line, cursor)
+        # A buffer search big enough for worker processes goes in slices of that
+        # size, so each one is worth pickling its view
+        slice_lines = SEARCH_CHUNK_LINES
+        offloader = self.offloader
+        if (
+            not scrollback
+            and offloader.processes > 0
+            and total - start >= offloader.process_min_lines
+        ):
+            slice_lines = max(slice_lines, offloader.process_min_lines)
+        while position < total:
+            end = min(total, position + slice_lines)
+            if scrollback:
+                window = await self._fetch_scrollback(session, position, end)
+                if window is None:
+                    return None
+                first, chunk = window
+                view = BufferView([], chunk, first, first, first + len(chunk))
+            else:
+                view = buffer.view(position, end)
+            found, resume = await offloader.run(
+                end - position, view.search, compiled, max_matches, isolated=True
+            )
+            lines.extend(found)
+            if resume is not None or len(lines) > max_matches:
+                lines = lines[:max_matches]
+                next_cursor = lines[-1] + 1
+                break
+            position = end
+            if position < total:
+                await report_progress(
+                    position - start,
+                    total - start,
+                    f"Searched {position} of {total} lines, {len(lines)} matches",
+                )
+                await asyncio.sleep(0)
+
+        matches = []
+        for line in lines:
+            read = await self.read_lines(session, line - context, line + context + 1)
+            if read is None:
+                return None
+            context_start, context_lines = read
+            if not 0 <= line - context_start < len(context_lines):
+                # Dropped from history since it matched
+                continue
+            matches.append(
+                SearchMatch(
+                    line=line,
+                    text=context_lines[line - context_start],
+                    context_start=context_start,
+                    context=context_lines,
+                )
+            )
+
+        return SearchResult(
+            matches=matches,
+            total_lines=total,
+            next_cursor=next_cursor,
+            session_id=str(session_id),
+        )
+
+    async def get_command_output(
+        self, session: SessionState, record: CommandRecord, max_lines: int = 200
+    ) -> List[str]:
+        """
+        Read the output of a recorded command from the session buffer (or
+        iTerm2's scrollback, for iTerm2-only sessions).
+
+        Args:
+            session: Session the command ran in.
+            record: Command record with output line boundaries.
+            max_lines: Maximum lines to return (the last ones are kept).
+
+        Returns:
+            Output lines, or an empty list if the boundaries are unknown.
+        """
+        if record.output_start_line is None:
+            return []
+
+        if self._reads_scrollback(session):
+            # Records of iTerm2-only sessions use iTerm2's absolute line numbers
+            numbering = await self._scrollback_info(session)
+            if numbering is None:
+                return []
+            end = record.end_line if record.end_line is not None else numbering[2]
+            window = await self._fetch_scrollback(
+                session, max(record.output_start_line, end - max_lines), end
+            )
+            return window[1] if window is not None else []
+
+        if not await self.refresh_output(session):
+            return []
+
+        buffer = session.output_buffer
+        end = record.end_line if record.end_line is not None else len(buffer)
+        start = max(record.output_start_line, end - max_lines)
+        return buffer.read_range(start, end)
+
+    async def get_output_summary(
+        self, session_id: UUID, from_line: Optional[int] = None
+    ) -> Optional[OutputSummary]:
+        """
+        Summarize test and build runs recognized in a session's output.
+
+        Committed lines are fed to the session's summarizer once and never
+        again; the lines that may still change are fed to a throwaway copy, so
+        each call costs only the output that arrived since the last one.
+
+        Args:
+            session_id: Session to summarize.
+            from_line: First buffer line to scan (default: keep the current
+                scan start, initially 0). Changing it rescans from there.
+
+        Returns:
+            Summary of the latest run of each recognized tool, or None if the
+            session is not found or its output cannot be read.
+        """
+        session = self.sessions.get(session_id)
+        if not session:
+            return None
+        session.touch()
+        if not await self.refresh_output(session):
+            return None
+
+        lock = self._summary_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            buffer = session.output_buffer
+            committed = buffer.committed_count
+            summarizer = session.summarizer
+            if (
+                summarizer is None
+                or summarizer.next_line > committed
+                or (from_line is not None and from_line != summarizer.from_line)
+            ):
+                start = max(0, from_line if from_line is not None else 0)
+                if summarizer is not None and from_line is None:
+                    start = summarizer.from_line
+                summarizer = session.summarizer = OutputSummarizer(min(start, committed))
+
+            # A long backlog (e.g. the first call on a big buffer) is fed in a worker
+            first = summarizer.next_line
+            await self.offloader.run(
+                committed - first,
+                feed_summarizer,
+                summarizer,
+                buffer.view(first, committed),
+                first,
+            )
+
+            current = summarizer
+            tail = buffer.read_range(committed, len(buffer))
+            if tail:
+                current = summarizer.copy()
+                feed_summarizer(current, tail, committed)
+
+        return OutputSummary(
+            session_id=str(session_id),
+            from_line=current.from_line,
+            lines_scanned=current.next_line - current.from_line,
+            runs=current.runs(),
         )
 
     def list_sessions(self) -> List[SessionInfo]:
@@ -250,6 +1964,42 @@ class SessionManager:
         """
         return [SessionInfo.from_state(session) for session in self.sessions.values()]
 
+    def tag_session(
+        self, session_id: UUID, add: List[str], remove: List[str]
+    ) -> Optional[Set[str]]:
+        """
+        Add and remove tags on a session.
+
+        Args:
+            session_id: Session UUID.
+            add: Tags to add.
+            remove: Tags to remove.
+
+        Returns:
+            The session's tags afterwards, or None if the session was not found.
+        """
+        session = self.sessions.get(session_id)
+        if not session:
+            logger.error(f"Session not found: {session_id}")
+            return None
+
+        session.tags.difference_update(remove)
+        session.tags.update(add)
+        self.registry.put(session)
+        return session.tags
+
+    def find_sessions(self, tag: str) -> List[SessionState]:
+        """
+        Get all sessions carrying a tag.
+
+        Args:
+            tag: Tag to look for.
+
+        Returns:
+            Matching sessions, oldest first.
+        """
+        return [session for session in self.sessions.values() if tag in session.tags]
+
     def get_session_state(self, session_id: UUID) -> Optional[SessionState]:
         """
         Get session state by ID.
@@ -260,7 +2010,10 @@ class SessionManager:
         Returns:
             SessionState if found, None otherwise.
         """
-        return self.sessions.get(session_id)
+        session = self.sessions.get(session_id)
+        if session:
+            session.touch()
+        return session
 
     async def terminate_session(self, session_id: UUID) -> bool:
         """
@@ -279,24 +2032,11 @@ class SessionManager:
 
         # Kill tmux session if present
         if session.tmux_session and self._check_tmux():
-            try:
-                result = subprocess.run(
-                    ["tmux", "kill-session", "-t", session.tmux_session],
-                    capture_output=True,
-                    text=True,
-                    timeout=5,
-                )
-                if result.returncode == 0:
-                    logger.info(f"Killed tmux session: {session.tmux_session}")
-                else:
-                    logger.warning(
-                        f"Failed to kill tmux session: {result.stderr}"
-                    )
-            except Exception as e:
-                logger.error(f"Error killing tmux session: {e}")
+            if await self._run_tmux(session, ["kill-session"]) is not None:
+                logger.info(f"Killed tmux session: {session.tmux_session}")
 
         # Remove from tracking
-        del self.sessions[session_id]
+        self._evict_session(session_id, "terminated")
         logger.info(f"Terminated session {session_id}")
         return True
 
@@ -317,6 +2057,7 @@ class SessionManager:
             return False
 
         session.controlled_by = mode
+        self.registry.put(session)
         logger.info(f"Set session {session_id} control mode to {mode.value}")
         return True
 
@@ -349,7 +2090,7 @@ class SessionManager:
             return None
 
         controller = await get_controller()
-        if not controller.is_connected:
+        if not await controller.wait_connected():
             logger.error("Cannot split pane: not connected to iTerm2")
             return None
 
@@ -379,6 +2120,9 @@ class SessionManager:
 
         # Store new session
         self.sessions[new_session.session_id] = new_session
+        self.registry.put(new_session)
+        self.registry.put(parent_session)
+        self._watch_session(new_session)
 
         logger.info(
             f"Created split session {new_session.session_id} "
@@ -0,0 +1,204 @@
+"""Shell-integration prompt marks (OSC 133 / FinalTerm) and per-session command index."""
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OSC_133 = b"\x1b]133;"
+
+# Longest unterminated sequence carried over between chunks before giving up
+MAX_PENDING = 4096
+
+# Commands remembered per session
+MAX_COMMANDS = 500
+
+
+@dataclass
+class CommandRecord:
+    """One command run in a session, delimited by shell-integration marks."""
+
+    command: Optional[str] = None
+    prompt_line: Optional[int] = None
+    output_start_line: Optional[int] = None
+    end_line: Optional[int] = None
+    exit_status: Optional[int] = None
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        """Wall time from start to finish, or None while running."""
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class PromptMark:
+    """A single OSC 133 mark found in the output stream."""
+
+    kind: str  # "A" prompt start, "B" command input, "C" output start, "D" command end
+    params: List[str]
+    line: int
+
+
+def parse_mark(body: str, line: int) -> Optional[PromptMark]:
+    """
+    Build a mark from the body of an OSC 133 sequence.
+
+    Args:
+        body: Text between ``ESC ] 133 ;`` and the terminator, e.g. ``"D;0"``.
+        line: Line the mark was emitted on.
+
+    Returns:
+        The mark, or None if the body is empty.
+    """
+    fields = body.split(";")
+    if not fields[0]:
+        return None
+    return PromptMark(kind=fields[0][0], params=fields[1:], line=line)
+
+
+class PromptMarkParser:
+    """
+    Streaming parser for OSC 133 prompt marks.
+
+    Shells with iTerm2 (FinalTerm-compatible) shell integration wrap every
+    prompt and command in ``ESC ] 133 ; <kind> [; params] BEL`` sequences.
+    The parser keeps a running count of newlines so each mark carries the
+    line it was emitted on, and carries incomplete sequences over to the next
+    chunk. That count matches lines split on newlines (replayed recordings);
+    for terminal rows, which wrap and get redrawn, VirtualScreen numbers the
+    marks instead.
+    """
+
+    def __init__(self, first_line: int = 0) -> None:
+        self.line = first_line
+        self._pending = b""
+
+    def feed(self, data: bytes) -> List[PromptMark]:
+        """
+        Parse a chunk of raw terminal output.
+
+        Args:
+            data: Raw bytes as written by the program in the pane.
+
+        Returns:
+            Marks found in this chunk, in order.
+        """
+        if self._pending:
+            data = self._pending + data
+            self._pending = b""
+
+        marks: List[PromptMark] = []
+        position = 0
+        while True:
+            start = data.find(OSC_133, position)
+            if start < 0:
+                self._keep_partial_prefix(data, position)
+                return marks
+
+            self.line += data.count(b"\n", position, start)
+            body_start = start + len(OSC_133)
+            bel = data.find(b"\x07", body_start)
+            st = data.find(b"\x1b\\", body_start)
+            if bel < 0 and st < 0:
+                if len(data) - start <= MAX_PENDING:
+                    self._pending = data[start:]
+                return marks
+
+            if st < 0 or (0 <= bel < st):
+                end, terminator = bel, 1
+            else:
+                end, terminator = st, 2
+
+            mark = parse_mark(data[body_start:end].decode("utf-8", errors="replace"), self.line)
+            if mark is not None:
+                marks.append(mark)
+            position = end + terminator
+
+    def _keep_partial_prefix(self, data: bytes, position: int) -> None:
+        """Count lines up to the end, holding back a possibly truncated OSC prefix."""
+        escape = data.rfind(b"\x1b", max(position, len(data) - len(OSC_133) + 1))
+        if escape >= 0 and OSC_133.startswith(data[escape:]):
+            self.line += data.count(b"\n", position, escape)
+            self._pending = data[escape:]
+        else:
+            self.line += data.count(b"\n", position)
+
+
+class CommandTracker:
+    """
+    Index of command boundaries, exit statuses and durations for one session.
+
+    Fed either with OSC 133 marks parsed from the raw stream (tmux sessions) or
+    with iTerm2 prompt notifications (iTerm2-only sessions).
+    """
+
+    def __init__(self) -> None:
+        self.commands: Deque[CommandRecord] = deque(maxlen=MAX_COMMANDS)
+        self._current: Optional[CommandRecord] = None
+        self._prompt_line: Optional[int] = None
+
+    def on_mark(self, mark: PromptMark) -> None:
+        """Apply an OSC 133 mark."""
+        if mark.kind == "A":
+            # A new prompt ends a command whose end mark never arrived
+            if self._current is not None:
+                self.finish(None, mark.line)
+            self._prompt_line = mark.line
+        elif mark.kind == "C":
+            # Shells hooking preexec can repeat C for every pipeline of one command line
+            if self._current is None:
+                self.start(None, mark.line, prompt_line=self._prompt_line)
+        elif mark.kind == "D":
+            status: Optional[int] = None
+            if mark.params:
+                try:
+                    status = int(mark.params[0])
+                except ValueError:
+                    status = None
+            self.finish(status, mark.line)
+
+    def start(
+        self,
+        command: Optional[str],
+        output_start_line: Optional[int],
+        prompt_line: Optional[int] = None,
+    ) -> None:
+        """Record that a command started running."""
+        if self._current is not None:
+            self.finish(None, output_start_line)
+        self._current = CommandRecord(
+            command=command,
+            prompt_line=prompt_line,
+            output_start_line=output_start_line,
+            started_at=time.time(),
+        )
+        self.commands.append(self._current)
+
+    def finish(
+        self,
+        exit_status: Optional[int],
+        end_line: Optional[int],
+        output_start_line: Optional[int] = None,
+    ) -> None:
+        """Record that the running command finished."""
+        record = self._current
+        if record is None:
+            return
+        record.exit_status = exit_status
+        record.end_line = end_line
+        if output_start_line is not None:
+            record.output_start_line = output_start_line
+        record.finished_at = time.time()
+        self._current = None
+
+    @property
+    def running(self) -> Optional[CommandRecord]:
+        """The command currently running, if any."""
+        return self._current
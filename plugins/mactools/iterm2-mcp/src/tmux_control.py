@@ -0,0 +1,174 @@
+"""tmux control-mode client for session lifecycle and output notifications."""
+
+import asyncio
+import logging
+import re
+from typing import Callable, Optional
+
+from .tmux_placement import tmux_command
+
+logger = logging.getLogger(__name__)
+
+# Longest notification line accepted from tmux (a burst of output can be large)
+OUTPUT_LINE_LIMIT = 1024 * 1024
+
+_OCTAL_ESCAPE = re.compile(rb"\\([0-7]{3})")
+
+
+def unescape_output(data: bytes) -> bytes:
+    """
+    Decode the payload of a ``%output`` notification.
+
+    tmux replaces characters below ASCII 32 and backslashes with ``\\ooo``
+    octal escapes; everything else is passed through unchanged.
+    """
+    if b"\\" not in data:
+        return data
+    return _OCTAL_ESCAPE.sub(lambda m: bytes((int(m.group(1), 8),)), data)
+
+
+class TmuxControlClient:
+    """
+    Long-lived ``tmux -C`` client attached to a single tmux session.
+
+    tmux pushes notifications to control clients as they happen, so the server
+    learns about a killed session from a ``%exit`` line instead of discovering
+    it through a failed ``send-keys`` or ``capture-pane`` later on, and learns
+    that a pane printed something from ``%output`` without capturing it.
+    """
+
+    def __init__(
+        self,
+        tmux_session: str,
+        on_exit: Callable[[str], None],
+        on_output: Optional[Callable[[str, bytes], None]] = None,
+        socket: Optional[str] = None,
+    ) -> None:
+        self.tmux_session = tmux_session
+        self.socket = socket
+        self._on_exit = on_exit
+        self._on_output = on_output
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def is_running(self) -> bool:
+        """Check if the control client process is alive."""
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self, retries: int = 10, delay: float = 0.2) -> bool:
+        """
+        Attach to the tmux session in control mode.
+
+        The session is usually being created by an iTerm2 tab at the same time,
+        so attaching is retried until it exists.
+
+        Args:
+            retries: Number of attach attempts.
+            delay: Seconds to wait between attempts.
+
+        Returns:
+            bool: True if attached, False otherwise.
+        """
+        for attempt in range(retries):
+            if self._closing:
+                return False
+            if await self._attach():
+                self._reader = asyncio.create_task(self._read_loop())
+                logger.debug(f"Control client attached to tmux session {self.tmux_session}")
+                return True
+            await asyncio.sleep(delay)
+
+        logger.warning(f"Could not attach control client to tmux session {self.tmux_session}")
+        return False
+
+    async def _attach(self) -> bool:
+        """Spawn the control client and wait for the attach reply."""
+        flags = "ignore-size" if self._on_output else "ignore-size,no-output"
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                *tmux_command(self.socket),
+                "-C",
+                "attach-session",
+                "-t",
+                self.tmux_session,
+                "-f",
+                flags,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                limit=OUTPUT_LINE_LIMIT,
+            )
+        except Exception as e:
+            logger.error(f"Error starting tmux control client: {e}")
+            return False
+
+        assert self._process.stdout is not None
+        # The attach command is answered with a %begin/%end (or %error) block
+        while True:
+            line = await self._process.stdout.readline()
+            if not line:
+                break
+            text = line.decode("utf-8", errors="replace").rstrip("\n")
+            if text.startswith("%end"):
+                return True
+            if text.startswith("%error"):
+                break
+
+        await self._reap()
+        return False
+
+    async def _read_loop(self) -> None:
+        """Dispatch notifications until the client exits."""
+        assert self._process is not None and self._process.stdout is not None
+        reason = "tmux control client closed"
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                if line.startswith(b"%output "):
+                    # %output %<pane-id> <octal-escaped data>
+                    if self._on_output is not None:
+                        parts = line.rstrip(b"\n").split(b" ", 2)
+                        data = parts[2] if len(parts) > 2 else b""
+                        self._on_output(parts[1].decode("ascii"), data)
+                    continue
+                text = line.decode("utf-8", errors="replace").rstrip("\n")
+                if text.startswith("%exit"):
+                    reason = text[len("%exit"):].strip() or "tmux session closed"
+                    break
+                if text.startswith("%sessions-changed"):
+                    logger.debug("tmux sessions changed")
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logger.error(f"Error reading tmux control client output: {e}")
+
+        await self._reap()
+        if not self._closing:
+            logger.info(f"tmux session {self.tmux_session} exited: {reason}")
+            self._on_exit(reason)
+
+    async def _reap(self) -> None:
+        """Wait for the control client process to finish."""
+        if self._process is None:
+            return
+        try:
+            await asyncio.wait_for(self._process.wait(), timeout=2)
+        except asyncio.TimeoutError:
+            self._process.kill()
+            await self._process.wait()
+
+    async def stop(self) -> None:
+        """Detach the control client without reporting an exit."""
+        self._closing = True
+        if self._process is not None and self._process.returncode is None:
+            # Closing stdin detaches a control client cleanly
+            if self._process.stdin is not None:
+                self._process.stdin.close()
+            await self._reap()
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
@@ -0,0 +1,100 @@
+"""Placement of tmux sessions on dedicated tmux servers."""
+
+import re
+import shlex
+from typing import Dict, List, Optional
+
+# Placement policies: "default" keeps every session on the user's default tmux server
+PLACEMENT_POLICIES = ("default", "round_robin", "tenant", "workload")
+
+# Characters allowed in generated socket names
+_UNSAFE_SOCKET_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def tmux_command(socket: Optional[str]) -> List[str]:
+    """
+    Base argv for running tmux against a server.
+
+    Args:
+        socket: Socket name (``-L``), socket path (``-S``, contains a slash), or
+            None for the default server.
+
+    Returns:
+        List[str]: ``["tmux"]`` followed by the socket option, if any.
+    """
+    if not socket:
+        return ["tmux"]
+    return ["tmux", "-S" if "/" in socket else "-L", socket]
+
+
+def attach_command(tmux_session: str, socket: Optional[str]) -> str:
+    """Shell command a user runs to attach to a tmux session on its server."""
+    return shlex.join(tmux_command(socket) + ["attach", "-t", tmux_session])
+
+
+class TmuxPlacement:
+    """
+    Chooses the tmux server for each new tmux session.
+
+    Servers are named ``<prefix>-<group>-<n>``, where the group is the tenant or
+    workload (or "rr" for round-robin). Within a group, servers are used in turn
+    and a new one is started once every existing one holds ``max_sessions``.
+    """
+
+    def __init__(self, policy: str, prefix: str, max_sessions: int) -> None:
+        self.policy = policy
+        self.prefix = prefix
+        self.max_sessions = max(1, max_sessions)
+        # Servers per group, in creation order, and the next one to try
+        self._servers: Dict[str, List[str]] = {}
+        self._next: Dict[str, int] = {}
+
+    def place(
+        self,
+        counts: Dict[str, int],
+        tenant: Optional[str] = None,
+        workload: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Pick a server for a new session.
+
+        Args:
+            counts: Tracked sessions per socket.
+            tenant: Tenant of the session ("tenant" policy).
+            workload: Workload class of the session ("workload" policy).
+
+        Returns:
+            Socket name, or None for the default server.
+        """
+        if self.policy == "tenant":
+            group = tenant or "default"
+        elif self.policy == "workload":
+            group = workload or "default"
+        elif self.policy == "round_robin":
+            group = "rr"
+        else:
+            return None
+
+        group = _UNSAFE_SOCKET_CHARS.sub("_", group)
+        servers = self._servers.setdefault(group, [])
+        start = self._next.get(group, 0)
+        for offset in range(len(servers)):
+            index = (start + offset) % len(servers)
+            if counts.get(servers[index], 0) < self.max_sessions:
+                self._next[group] = index + 1
+                return servers[index]
+
+        socket = f"{self.prefix}-{group}-{len(servers)}"
+        servers.append(socket)
+        self._next[group] = len(servers)
+        return socket
+
+    def adopt(self, socket: str) -> None:
+        """Register a server in use by a restored session, so placement reuses it."""
+        head, _, index = socket.rpartition("-")
+        if not index.isdigit() or not head.startswith(self.prefix + "-"):
+            return
+        group = head[len(self.prefix) + 1 :]
+        servers = self._servers.setdefault(group, [])
+        while len(servers) <= int(index):
+            servers.append(f"{head}-{len(servers)}")
@@ -1,16 +1,35 @@
 """MCP tool implementations for iTerm2 control."""
 
 import logging
-from typing import Any, Dict, List
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Type
 from uuid import UUID
 
 from pydantic import BaseModel, Field
 
+from ..condense import BYTES_PER_TOKEN
+from ..fanout import run_on_sessions as fan_out
+from ..interaction import ExpectBranch, ScriptStep, run_interaction
+from ..progress import report_chunks
+from ..scheduler import get_scheduler
 from ..session_manager import get_session_manager
-from ..models import ControlMode
+from ..tmux_placement import attach_command
+from ..models import ControlMode, Job, JobStatus
+from .schemas import load_schemas
 
 logger = logging.getLogger(__name__)
 
+# Argument schemas shipped precomputed; empty when the models have changed since
+_SCHEMAS = load_schemas(Path(__file__))
+
+
+def _input_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """JSON schema of a tool's arguments, precomputed when available."""
+    schema = _SCHEMAS.get(model.__name__)
+    return schema if schema is not None else model.model_json_schema()
+
 
 # Tool Schemas
 class CreateItermTabArgs(BaseModel):
@@ -28,6 +47,28 @@ class CreateItermTabArgs(BaseModel):
         default=None,
         description="Optional iTerm2 profile name to use",
     )
+    tmux_socket: str | None = Field(
+        default=None,
+        description=(
+            "Optional tmux server for the session: a socket name (tmux -L) or a "
+            "socket path (tmux -S). Overrides the server placement policy"
+        ),
+    )
+    tenant: str | None = Field(
+        default=None,
+        description="Optional tenant, to place the session on that tenant's tmux servers",
+    )
+    workload: str | None = Field(
+        default=None,
+        description="Optional workload class, to place the session on that workload's tmux servers",
+    )
+    record: bool | None = Field(
+        default=None,
+        description=(
+            "Record the session's raw output to an asciicast file for later replay "
+            "(tmux sessions only; default: the server setting)"
+        ),
+    )
 
 
 class SendToSessionArgs(BaseModel):
@@ -58,6 +99,84 @@ class ReadSessionOutputArgs(BaseModel):
         default=1000,
         description="Maximum number of lines to return",
     )
+    if_changed_since: int | None = Field(
+        default=None,
+        description=(
+            "Output version from a previous read; if nothing changed since, "
+            "returns a short 'not modified' response instead of the lines"
+        ),
+    )
+    since: float | None = Field(
+        default=None,
+        description=(
+            "Only lines that arrived at or after this time: Unix seconds, or negative "
+            "for seconds before now (e.g. -30 = the last 30 seconds). Replaces offset."
+        ),
+    )
+    until: float | None = Field(
+        default=None,
+        description="Only lines that arrived at or before this time (same format as since)",
+    )
+    include_timestamps: bool = Field(
+        default=False,
+        description="Prefix each line with its arrival time",
+    )
+    max_bytes: int | None = Field(
+        default=None,
+        ge=1,
+        description=(
+            "Budgeted read: condense the whole selected range (length is ignored) to about "
+            "this many bytes, keeping its head and tail and reporting what was elided"
+        ),
+    )
+    max_tokens: int | None = Field(
+        default=None,
+        ge=1,
+        description="Budgeted read with the budget given in approximate tokens",
+    )
+    collapse_repeats: bool = Field(
+        default=True,
+        description=(
+            "In a budgeted read, fold runs of identical or near-identical lines "
+            "(progress bars, spinners) into counted summaries"
+        ),
+    )
+
+
+class SearchSessionOutputArgs(BaseModel):
+    """Arguments for search_session_output tool."""
+
+    session_id: str = Field(
+        description="Session ID to search",
+    )
+    pattern: str = Field(
+        description="Regular expression to search for (or plain text if literal=true)",
+    )
+    literal: bool = Field(
+        default=False,
+        description="Treat pattern as plain text instead of a regular expression",
+    )
+    ignore_case: bool = Field(
+        default=False,
+        description="Case-insensitive search",
+    )
+    context: int = Field(
+        default=2,
+        ge=0,
+        le=50,
+        description="Lines of context to include before and after each match",
+    )
+    max_matches: int = Field(
+        default=50,
+        ge=1,
+        le=1000,
+        description="Maximum number of matching lines to return",
+    )
+    cursor: int = Field(
+        default=0,
+        ge=0,
+        description="Line to start searching from; pass next_cursor to get further matches",
+    )
 
 
 class CreateSharedSessionArgs(BaseModel):
@@ -70,6 +189,28 @@ class CreateSharedSessionArgs(BaseModel):
         default=None,
         description="Optional command to run in the session",
     )
+    tmux_socket: str | None = Field(
+        default=None,
+        description=(
+            "Optional tmux server for the session: a socket name (tmux -L) or a "
+            "socket path (tmux -S). Overrides the server placement policy"
+        ),
+    )
+    tenant: str | None = Field(
+        default=None,
+        description="Optional tenant, to place the session on that tenant's tmux servers",
+    )
+    workload: str | None = Field(
+        default=None,
+        description="Optional workload class, to place the session on that workload's tmux servers",
+    )
+    record: bool | None = Field(
+        default=None,
+        description=(
+            "Record the session's raw output to an asciicast file for later replay "
+            "(tmux sessions only; default: the server setting)"
+        ),
+    )
 
 
 class AttachUserArgs(BaseModel):
@@ -88,6 +229,27 @@ class TerminateSessionArgs(BaseModel):
     )
 
 
+class ReplayRecordingArgs(BaseModel):
+    """Arguments for replay_recording tool."""
+
+    path: str = Field(
+        description="Path of an asciicast v2 recording (.cast)",
+    )
+    speed: float = Field(
+        default=0.0,
+        ge=0,
+        description=(
+            "Playback speed relative to the recording (e.g. 10 = ten times faster); "
+            "0 plays as fast as possible"
+        ),
+    )
+    max_idle: float | None = Field(
+        default=None,
+        gt=0,
+        description="Cap on pauses between output events, in recorded seconds",
+    )
+
+
 class SplitPaneArgs(BaseModel):
     """Arguments for split_pane tools."""
 
@@ -139,12 +301,343 @@ class DetectClaudeArgs(BaseModel):
     )
 
 
+class GetScreenArgs(BaseModel):
+    """Arguments for get_screen tool."""
+
+    session_id: str = Field(
+        description="Session ID to read the screen of",
+    )
+
+
+class GetOutputSummaryArgs(BaseModel):
+    """Arguments for get_output_summary tool."""
+
+    session_id: str = Field(
+        description="Session ID to summarize",
+    )
+    from_line: int | None = Field(
+        default=None,
+        ge=0,
+        description=(
+            "First buffer line to scan, e.g. the line before a new test run was started "
+            "(default: keep the previous scan start, initially 0)"
+        ),
+    )
+
+
+class WaitForIdleArgs(BaseModel):
+    """Arguments for wait_for_idle tool."""
+
+    session_id: str = Field(
+        description="Session ID to wait on",
+    )
+    quiet_seconds: float = Field(
+        default=2.0,
+        gt=0,
+        le=300,
+        description="How long the output must stay unchanged to count as idle",
+    )
+    timeout: float = Field(
+        default=60.0,
+        gt=0,
+        le=3600,
+        description="Maximum seconds to wait",
+    )
+
+
 class GetSessionStateArgs(BaseModel):
     """Arguments for get_session_state tool."""
 
     session_id: str = Field(
         description="Session ID to get state for",
     )
+    if_changed_since: int | None = Field(
+        default=None,
+        description=(
+            "Output version from a previous call; if nothing changed since, "
+            "returns a short 'not modified' response"
+        ),
+    )
+
+
+class ReclaimMemoryArgs(BaseModel):
+    """Arguments for reclaim_memory tool."""
+
+    force: bool = Field(
+        default=False,
+        description="Compress every session's buffer, not only sessions past the idle timeout",
+    )
+
+
+class TagSessionsArgs(BaseModel):
+    """Arguments for tag_sessions tool."""
+
+    session_ids: List[str] = Field(
+        min_length=1,
+        description="Sessions to tag",
+    )
+    add: List[str] = Field(
+        default_factory=list,
+        description="Tags to add (e.g. 'workers')",
+    )
+    remove: List[str] = Field(
+        default_factory=list,
+        description="Tags to remove",
+    )
+
+
+class RunOnSessionsArgs(BaseModel):
+    """Arguments for run_on_sessions tool."""
+
+    command: str = Field(
+        description="Command line to run in every selected session",
+    )
+    session_ids: List[str] | None = Field(
+        default=None,
+        description="Sessions to run in",
+    )
+    tag: str | None = Field(
+        default=None,
+        description="Run in every session with this tag (combined with session_ids)",
+    )
+    max_concurrency: int = Field(
+        default=8,
+        ge=1,
+        le=64,
+        description="Maximum sessions driven at the same time",
+    )
+    timeout: float = Field(
+        default=300.0,
+        gt=0,
+        le=3600,
+        description="Maximum seconds to wait for each session",
+    )
+    detect_exit_status: bool = Field(
+        default=True,
+        description="Append a printf of $? to the command (POSIX shells) to detect "
+        "completion and exit status; otherwise wait for output to go quiet",
+    )
+    quiet_seconds: float = Field(
+        default=2.0,
+        gt=0,
+        le=300,
+        description="Quiet period that counts as done when detect_exit_status is false",
+    )
+    tail_lines: int = Field(
+        default=20,
+        ge=0,
+        le=500,
+        description="Output lines to return per session",
+    )
+
+
+class StartWorkerPoolArgs(BaseModel):
+    """Arguments for start_worker_pool tool."""
+
+    size: int = Field(
+        default=0,
+        ge=0,
+        le=32,
+        description="Number of new tmux-backed worker tabs to create",
+    )
+    session_ids: List[str] | None = Field(
+        default=None,
+        description="Existing sessions to adopt as workers",
+    )
+    tag: str | None = Field(
+        default=None,
+        description="Adopt every session with this tag as a worker",
+    )
+
+
+class SubmitJobsArgs(BaseModel):
+    """Arguments for submit_jobs tool."""
+
+    commands: List[str] = Field(
+        min_length=1,
+        description="Command lines to queue, one job each",
+    )
+    timeout: float = Field(
+        default=600.0,
+        gt=0,
+        le=86400,
+        description="Maximum seconds each job may run before it is interrupted",
+    )
+
+
+class GetJobsArgs(BaseModel):
+    """Arguments for get_jobs tool."""
+
+    job_ids: List[str] | None = Field(
+        default=None,
+        description="Jobs to report on (default: all)",
+    )
+    status: JobStatus | None = Field(
+        default=None,
+        description="Only report jobs in this state",
+    )
+    include_output: bool = Field(
+        default=False,
+        description="Include each finished job's output",
+    )
+    max_output_lines: int = Field(
+        default=50,
+        ge=1,
+        le=500,
+        description="Output lines per job (the last ones are kept)",
+    )
+
+
+class CancelJobArgs(BaseModel):
+    """Arguments for cancel_job tool."""
+
+    job_id: str = Field(
+        description="Job to cancel (running jobs are interrupted with Ctrl-C)",
+    )
+
+
+class GetOutputTimelineArgs(BaseModel):
+    """Arguments for get_output_timeline tool."""
+
+    session_ids: List[str] | None = Field(
+        default=None,
+        description="Sessions to merge (default: all sessions)",
+    )
+    tag: str | None = Field(
+        default=None,
+        description="Merge every session with this tag (combined with session_ids)",
+    )
+    since: float | None = Field(
+        default=-60.0,
+        description="Earliest arrival time: Unix seconds, or negative for seconds before now",
+    )
+    until: float | None = Field(
+        default=None,
+        description="Latest arrival time (same format as since)",
+    )
+    limit: int = Field(
+        default=500,
+        ge=1,
+        le=5000,
+        description="Maximum lines to return (the most recent are kept)",
+    )
+
+
+class GetCommandHistoryArgs(BaseModel):
+    """Arguments for get_command_history tool."""
+
+    session_id: str = Field(
+        description="Session ID to inspect",
+    )
+    failed_only: bool = Field(
+        default=False,
+        description="Only list commands that exited with a non-zero status",
+    )
+    limit: int = Field(
+        default=20,
+        ge=1,
+        le=500,
+        description="Maximum number of commands to list (most recent first)",
+    )
+    include_output: bool = Field(
+        default=False,
+        description="Include the output of the most recent listed command",
+    )
+    max_output_lines: int = Field(
+        default=200,
+        ge=1,
+        le=5000,
+        description="Maximum output lines to include (the last ones are kept)",
+    )
+
+
+class ExpectBranchArgs(BaseModel):
+    """A pattern an interaction step waits for."""
+
+    pattern: str = Field(
+        description="Regular expression to wait for in new output (multiline mode; "
+        "trailing whitespace of lines is not preserved, so match 'Password:$' "
+        "rather than 'Password: $')",
+    )
+    send: str | None = Field(
+        default=None,
+        description="Text to send when this pattern matches first",
+    )
+    submit: bool = Field(
+        default=True,
+        description="Press Enter after the text",
+    )
+    goto: str | None = Field(
+        default=None,
+        description="Label of the step to continue with ('end' stops the script); "
+        "default is the next step",
+    )
+    ignore_case: bool = Field(
+        default=False,
+        description="Match case-insensitively",
+    )
+
+
+class ScriptStepArgs(BaseModel):
+    """One step of an interaction script."""
+
+    label: str | None = Field(
+        default=None,
+        description="Name other steps can jump to",
+    )
+    send: str | None = Field(
+        default=None,
+        description="Text to send before waiting",
+    )
+    submit: bool = Field(
+        default=True,
+        description="Press Enter after the text",
+    )
+    expect: List[ExpectBranchArgs] = Field(
+        default_factory=list,
+        description="Patterns to wait for; the earliest match in the output wins",
+    )
+    timeout: float = Field(
+        default=10.0,
+        gt=0,
+        le=3600,
+        description="Seconds to wait for one of the patterns",
+    )
+    on_timeout: str = Field(
+        default="fail",
+        description="'fail' stops the script, 'continue' goes to the next step, "
+        "or a label to jump to",
+    )
+
+
+class RunInteractionScriptArgs(BaseModel):
+    """Arguments for run_interaction_script tool."""
+
+    session_id: str = Field(
+        description="Session ID to drive",
+    )
+    steps: List[ScriptStepArgs] = Field(
+        min_length=1,
+        description="Script steps, run in order (send, then expect)",
+    )
+    timeout: float = Field(
+        default=120.0,
+        gt=0,
+        le=3600,
+        description="Maximum seconds for the whole script",
+    )
+    max_steps: int = Field(
+        default=200,
+        ge=1,
+        le=10000,
+        description="Maximum steps executed, guarding against goto loops",
+    )
+    max_output_lines: int = Field(
+        default=200,
+        ge=0,
+        le=5000,
+        description="Maximum lines of session output to return (the last ones are kept)",
+    )
 
 
 # Tool Handlers
@@ -158,6 +651,10 @@ async def create_iterm_tab(args: Dict[str, Any]) -> Dict[str, Any]:
             command=parsed.command,
             tmux_session=parsed.tmux_session,
             profile=parsed.profile,
+            tmux_socket=parsed.tmux_socket,
+            tenant=parsed.tenant,
+            workload=parsed.workload,
+            record=parsed.record,
         )
 
         if not session:
@@ -170,15 +667,20 @@ async def create_iterm_tab(args: Dict[str, Any]) -> Dict[str, Any]:
             "success": True,
             "session_id": str(session.session_id),
             "tmux_session": session.tmux_session,
+            "tmux_socket": session.tmux_socket,
             "command": session.command,
             "controlled_by": session.controlled_by.value,
+            "recording_path": session.recording_path,
         }
 
         if session.tmux_session:
+            result["attach_command"] = attach_command(session.tmux_session, session.tmux_socket)
             result["message"] = (
                 f"Created shared session '{session.tmux_session}'. "
-                f"User can attach with: tmux attach -t {session.tmux_session}"
+                f"User can attach with: {result['attach_command']}"
             )
+        elif parsed.record:
+            result["warning"] = "Recording needs a tmux session; this session is not recorded"
 
         return result
 
@@ -216,7 +718,7 @@ async def send_to_session(args: Dict[str, Any]) -> Dict[str, Any]:
             controller = await get_controller()
 
             import iterm2
-            app_session = controller.app.get_session_by_id(session.iterm_session_id)
+            app_session = await controller.get_session(session.iterm_session_id)
             if app_session:
                 try:
                     content = await app_session.async_get_screen_contents()
@@ -251,17 +753,36 @@ async def send_to_session(args: Dict[str, Any]) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+def _format_time(stamp: float) -> str:
+    """Format a Unix timestamp as local HH:MM:SS.mmm."""
+    return datetime.fromtimestamp(stamp).strftime("%H:%M:%S.%f")[:-3]
+
+
+def _stamp_lines(timestamps: List[float], lines: List[str]) -> List[str]:
+    """Prefix each line with its formatted arrival time."""
+    return [f"[{_format_time(stamp)}] {line}" for stamp, line in zip(timestamps, lines)]
+
+
 async def read_session_output(args: Dict[str, Any]) -> Dict[str, Any]:
     """Read session output with pagination."""
     try:
         parsed = ReadSessionOutputArgs(**args)
         manager = get_session_manager()
 
+        max_bytes = parsed.max_bytes
+        if parsed.max_tokens is not None:
+            max_bytes = parsed.max_tokens * BYTES_PER_TOKEN
+
         session_id = UUID(parsed.session_id)
         output = await manager.read_session_output(
             session_id,
             offset=parsed.offset,
             length=parsed.length,
+            if_changed_since=parsed.if_changed_since,
+            since=parsed.since,
+            until=parsed.until,
+            max_bytes=max_bytes,
+            collapse_repeats=parsed.collapse_repeats,
         )
 
         if not output:
@@ -270,16 +791,69 @@ async def read_session_output(args: Dict[str, Any]) -> Dict[str, Any]:
                 "error": "Session not found or output unavailable",
             }
 
-        return {
+        if output.not_modified:
+            return {
+                "success": True,
+                "not_modified": True,
+                "version": output.version,
+                "message": f"Output not modified (version {output.version})",
+            }
+
+        lines = output.lines
+        # Condensed lines do not map one-to-one onto buffer lines, and scrollback
+        # reads of iTerm2-only sessions carry no times
+        if parsed.include_timestamps and output.timestamps and output.condensed is None:
+            # Formatting times is slow enough to be worth a worker on large reads
+            lines = await manager.offloader.run(
+                len(lines), _stamp_lines, output.timestamps, output.lines
+            )
+        result: Dict[str, Any] = {
             "success": True,
             "session_id": parsed.session_id,
-            "output": "\n".join(output.lines),
             "total_lines": output.total_lines,
             "read_from": output.read_from,
             "read_count": output.read_count,
             "remaining": output.remaining,
             "controlled_by": output.controlled_by,
+            "version": output.version,
         }
+        # Stream large reads to clients that asked for progress; the response
+        # then only says how many lines were sent instead of repeating them
+        if await report_chunks(lines):
+            result["streamed_lines"] = len(lines)
+        else:
+            result["output"] = "\n".join(lines)
+        if output.timestamps:
+            result["first_timestamp"] = output.timestamps[0]
+            result["last_timestamp"] = output.timestamps[-1]
+        report = output.condensed
+        if report is not None:
+            result["condensed"] = {
+                "input_lines": report.input_lines,
+                "input_bytes": report.input_bytes,
+                "output_bytes": report.output_bytes,
+                "collapsed_runs": report.collapsed_runs,
+                "collapsed_lines": report.collapsed_lines,
+                "elided_lines": report.elided_lines,
+                "elided_from": report.elided_from,
+                "elided_to": report.elided_to,
+            }
+            summary = (
+                f"Condensed {report.input_lines} lines ({report.input_bytes} bytes) "
+                f"to {len(output.lines)} lines ({report.output_bytes} bytes)"
+            )
+            if report.collapsed_runs:
+                summary += (
+                    f"; {report.collapsed_runs} repeat runs folded "
+                    f"({report.collapsed_lines} lines)"
+                )
+            if report.elided_lines:
+                summary += (
+                    f"; {report.elided_lines} lines elided "
+                    f"({report.elided_from}-{report.elided_to})"
+                )
+            result["message"] = summary
+        return result
 
     except ValueError:
         return {"success": False, "error": "Invalid session_id format"}
@@ -288,6 +862,71 @@ async def read_session_output(args: Dict[str, Any]) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+async def search_session_output(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Search session output server-side and return matches with context."""
+    try:
+        parsed = SearchSessionOutputArgs(**args)
+        manager = get_session_manager()
+
+        session_id = UUID(parsed.session_id)
+        try:
+            result = await manager.search_session_output(
+                session_id,
+                parsed.pattern,
+                literal=parsed.literal,
+                ignore_case=parsed.ignore_case,
+                cursor=parsed.cursor,
+                max_matches=parsed.max_matches,
+                context=parsed.context,
+            )
+        except re.error as e:
+            return {"success": False, "error": f"Invalid pattern: {e}"}
+
+        if not result:
+            return {"success": False, "error": "Session not found"}
+
+        # grep-style listing: "N:" for matches, "N-" for context, "--" between groups
+        matched = {match.line for match in result.matches}
+        output_lines: List[str] = []
+        last_line = -1
+        for match in result.matches:
+            for i, text in enumerate(match.context):
+                line = match.context_start + i
+                if line <= last_line:
+                    continue
+                if output_lines and line > last_line + 1:
+                    output_lines.append("--")
+                marker = ":" if line in matched else "-"
+                output_lines.append(f"{line}{marker} {text}")
+                last_line = line
+
+        if result.next_cursor is not None:
+            message = (
+                f"Found {len(result.matches)} matching lines (more available, "
+                f"continue with cursor={result.next_cursor})"
+            )
+        else:
+            message = f"Found {len(result.matches)} matching lines"
+
+        return {
+            "success": True,
+            "session_id": parsed.session_id,
+            "message": message,
+            "output": "\n".join(output_lines),
+            "matches": [
+                {"line": match.line, "text": match.text} for match in result.matches
+            ],
+            "total_lines": result.total_lines,
+            "next_cursor": result.next_cursor,
+        }
+
+    except ValueError:
+        return {"success": False, "error": "Invalid session_id format"}
+    except Exception as e:
+        logger.error(f"Error in search_session_output: {e}")
+        return {"success": False, "error": str(e)}
+
+
 async def create_shared_session(args: Dict[str, Any]) -> Dict[str, Any]:
     """Create a tmux session for user/Claude sharing."""
     try:
@@ -297,6 +936,10 @@ async def create_shared_session(args: Dict[str, Any]) -> Dict[str, Any]:
         session = await manager.create_session(
             command=parsed.command,
             tmux_session=parsed.tmux_session,
+            tmux_socket=parsed.tmux_socket,
+            tenant=parsed.tenant,
+            workload=parsed.workload,
+            record=parsed.record,
         )
 
         if not session:
@@ -308,14 +951,17 @@ async def create_shared_session(args: Dict[str, Any]) -> Dict[str, Any]:
                 ),
             }
 
+        command = attach_command(parsed.tmux_session, session.tmux_socket)
         return {
             "success": True,
             "session_id": str(session.session_id),
             "tmux_session": session.tmux_session,
-            "attach_command": f"tmux attach -t {session.tmux_session}",
+            "tmux_socket": session.tmux_socket,
+            "recording_path": session.recording_path,
+            "attach_command": command,
             "message": (
                 f"Created shared tmux session '{session.tmux_session}'. "
-                f"User can attach with: tmux attach -t {session.tmux_session}"
+                f"User can attach with: {command}"
             ),
         }
 
@@ -348,14 +994,16 @@ async def attach_user_to_session(args: Dict[str, Any]) -> Dict[str, Any]:
         # Set to shared mode
         manager.set_control_mode(session_id, ControlMode.SHARED)
 
+        command = attach_command(session.tmux_session, session.tmux_socket)
         return {
             "success": True,
             "session_id": parsed.session_id,
             "tmux_session": session.tmux_session,
-            "attach_command": f"tmux attach -t {session.tmux_session}",
+            "tmux_socket": session.tmux_socket,
+            "attach_command": command,
             "message": (
                 f"Session ready for user. They can attach with:\n"
-                f"  tmux attach -t {session.tmux_session}\n\n"
+                f"  {command}\n\n"
                 f"User can detach anytime with Ctrl+B then D"
             ),
         }
@@ -380,10 +1028,14 @@ async def list_sessions(args: Dict[str, Any]) -> Dict[str, Any]:
                 {
                     "session_id": s.session_id,
                     "tmux_session": s.tmux_session,
+                    "tmux_socket": s.tmux_socket,
                     "command": s.command,
                     "controlled_by": s.controlled_by,
                     "runtime_seconds": s.runtime_seconds,
+                    "idle_seconds": s.idle_seconds,
                     "line_count": s.line_count,
+                    "tags": s.tags,
+                    "recording_path": s.recording_path,
                 }
                 for s in sessions
             ],
@@ -419,6 +1071,34 @@ async def terminate_session(args: Dict[str, Any]) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+async def replay_recording(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Play an asciicast recording back as a session."""
+    try:
+        parsed = ReplayRecordingArgs(**args)
+        manager = get_session_manager()
+
+        session = manager.create_replay_session(
+            parsed.path, speed=parsed.speed, max_idle=parsed.max_idle
+        )
+        if not session:
+            return {"success": False, "error": f"Cannot replay {parsed.path}"}
+
+        pace = "as fast as possible" if parsed.speed == 0 else f"at {parsed.speed:g}x speed"
+        return {
+            "success": True,
+            "session_id": str(session.session_id),
+            "command": session.command,
+            "message": (
+                f"Replaying {parsed.path} {pace}. Read it like any session; "
+                "it takes no input"
+            ),
+        }
+
+    except Exception as e:
+        logger.error(f"Error in replay_recording: {e}")
+        return {"success": False, "error": str(e)}
+
+
 async def split_pane_horizontal(args: Dict[str, Any]) -> Dict[str, Any]:
     """Split pane horizontally."""
     try:
@@ -573,32 +1253,21 @@ async def send_and_submit(args: Dict[str, Any]) -> Dict[str, Any]:
 
         # Verify if requested
         if parsed.verify:
-            import asyncio
-            await asyncio.sleep(0.5)
+            # Let the echo of the submitted text settle instead of a fixed sleep
+            await manager.wait_for_idle(session_id, quiet_seconds=0.3, timeout=2.0)
 
             # Read the screen to check if text was submitted
-            from ..iterm_controller import get_controller
-            controller = await get_controller()
-            session = manager.get_session_state(session_id)
-
-            if session and session.iterm_session_id:
-                import iterm2
-                app_session = controller.app.get_session_by_id(session.iterm_session_id)
-                if app_session:
-                    content = await app_session.async_get_screen_contents()
-                    last_lines = []
-                    for i in range(max(0, content.number_of_lines - 5), content.number_of_lines):
-                        line = content.line(i)
-                        last_lines.append(line.string)
-
-                    # Check if the text appears in recent lines
-                    recent_text = "\n".join(last_lines)
-                    if parsed.text[:50] in recent_text:
-                        result["verified"] = True
-                        result["message"] += " (verified)"
-                    else:
-                        result["verified"] = False
-                        result["warning"] = "Could not verify text submission"
+            screen = await manager.get_screen(session_id)
+            if screen:
+                # The lines just above the cursor, or the bottom of the screen
+                end = len(screen.lines) if screen.cursor_row is None else screen.cursor_row + 1
+                recent_text = "\n".join(screen.lines[max(0, end - 5) : end])
+                if parsed.text[:50] in recent_text:
+                    result["verified"] = True
+                    result["message"] += " (verified)"
+                else:
+                    result["verified"] = False
+                    result["warning"] = "Could not verify text submission"
 
         return result
 
@@ -609,32 +1278,66 @@ async def send_and_submit(args: Dict[str, Any]) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
-async def detect_claude_session(args: Dict[str, Any]) -> Dict[str, Any]:
-    """Detect if Claude Code is running in a session."""
+async def wait_for_idle(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Wait until a session stops printing output."""
     try:
-        parsed = DetectClaudeArgs(**args)
+        parsed = WaitForIdleArgs(**args)
         manager = get_session_manager()
 
         session_id = UUID(parsed.session_id)
-        session = manager.get_session_state(session_id)
+        result = await manager.wait_for_idle(
+            session_id,
+            quiet_seconds=parsed.quiet_seconds,
+            timeout=parsed.timeout,
+        )
 
-        if not session or not session.iterm_session_id:
+        if not result:
             return {"success": False, "error": "Session not found"}
 
-        from ..iterm_controller import get_controller
-        controller = await get_controller()
+        if result.idle:
+            message = (
+                f"Session idle: no output for {result.quiet_seconds:.1f}s "
+                f"(busy for {result.busy_seconds:.1f}s, waited {result.waited_seconds:.1f}s)"
+            )
+        else:
+            message = (
+                f"Timed out after {result.waited_seconds:.1f}s; session still producing "
+                f"output (last output {result.quiet_seconds:.1f}s ago)"
+            )
+
+        return {
+            "success": True,
+            "session_id": parsed.session_id,
+            "idle": result.idle,
+            "waited_seconds": result.waited_seconds,
+            "busy_seconds": result.busy_seconds,
+            "quiet_seconds": result.quiet_seconds,
+            "version": result.version,
+            "message": message,
+        }
+
+    except ValueError:
+        return {"success": False, "error": "Invalid session_id format"}
+    except Exception as e:
+        logger.error(f"Error in wait_for_idle: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def detect_claude_session(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Detect if Claude Code is running in a session."""
+    try:
+        parsed = DetectClaudeArgs(**args)
+        manager = get_session_manager()
 
-        import iterm2
-        app_session = controller.app.get_session_by_id(session.iterm_session_id)
-        if not app_session:
-            return {"success": False, "error": "iTerm session not found"}
+        session_id = UUID(parsed.session_id)
+        if not manager.get_session_state(session_id):
+            return {"success": False, "error": "Session not found"}
 
         # Read screen content to detect Claude Code
-        content = await app_session.async_get_screen_contents()
-        screen_text = ""
-        for i in range(content.number_of_lines):
-            line = content.line(i)
-            screen_text += line.string + "\n"
+        screen = await manager.get_screen(session_id)
+        if not screen:
+            return {"success": False, "error": "Screen not available"}
+        screen_text = "".join(line + "\n" for line in screen.lines)
 
         # Look for Claude Code indicators
         is_claude = False
@@ -668,6 +1371,133 @@ async def detect_claude_session(args: Dict[str, Any]) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+async def get_screen(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the visible screen and cursor position of a session."""
+    try:
+        parsed = GetScreenArgs(**args)
+        manager = get_session_manager()
+
+        screen = await manager.get_screen(UUID(parsed.session_id))
+        if not screen:
+            return {"success": False, "error": "Session not found or screen unavailable"}
+
+        if screen.cursor_row is None:
+            message = f"Screen from {screen.source} (cursor unknown)"
+        else:
+            message = (
+                f"Screen from {screen.source}, cursor at row {screen.cursor_row}, "
+                f"column {screen.cursor_col}"
+            )
+        if screen.alternate_screen:
+            message += " (alternate screen: a full-screen program is running)"
+
+        return {
+            "success": True,
+            "session_id": parsed.session_id,
+            "message": message,
+            "output": "\n".join(screen.lines),
+            "cursor_row": screen.cursor_row,
+            "cursor_col": screen.cursor_col,
+            "alternate_screen": screen.alternate_screen,
+            "source": screen.source,
+        }
+
+    except ValueError:
+        return {"success": False, "error": "Invalid session_id format"}
+    except Exception as e:
+        logger.error(f"Error in get_screen: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def get_output_summary(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize test and build runs in a session's output."""
+    try:
+        parsed = GetOutputSummaryArgs(**args)
+        manager = get_session_manager()
+
+        summary = await manager.get_output_summary(UUID(parsed.session_id), parsed.from_line)
+        if not summary:
+            return {"success": False, "error": "Session not found"}
+
+        output_lines = []
+        runs = []
+        for run in summary.runs:
+            counts = ", ".join(
+                f"{value} {label}"
+                for value, label in (
+                    (run.failed, "failed"),
+                    (run.passed, "passed"),
+                    (run.skipped, "skipped"),
+                    (run.errors, "errors"),
+                    (run.warnings, "warnings"),
+                )
+                if value
+            )
+            state = "finished" if run.finished else "running or incomplete"
+            output_lines.append(
+                f"{run.kind}: {counts or 'no results yet'} ({state}, "
+                f"lines {run.first_line}-{run.last_line})"
+            )
+            output_lines.extend(f"  FAILED {name}" for name in run.failures)
+            error = run.first_error
+            if error:
+                where = ""
+                if error.file:
+                    where = f"{error.file}:{error.line_number}"
+                    if error.column is not None:
+                        where += f":{error.column}"
+                    where += ": "
+                output_lines.append(f"  first error (line {error.line}): {where}{error.message}")
+
+            runs.append(
+                {
+                    "kind": run.kind,
+                    "first_line": run.first_line,
+                    "last_line": run.last_line,
+                    "finished": run.finished,
+                    "result_line": run.result_line,
+                    "passed": run.passed,
+                    "failed": run.failed,
+                    "skipped": run.skipped,
+                    "errors": run.errors,
+                    "warnings": run.warnings,
+                    "failures": run.failures,
+                    "first_error": (
+                        {
+                            "message": error.message,
+                            "line": error.line,
+                            "file": error.file,
+                            "line_number": error.line_number,
+                            "column": error.column,
+                        }
+                        if error
+                        else None
+                    ),
+                }
+            )
+
+        if runs:
+            message = f"{len(runs)} run(s) recognized in {summary.lines_scanned} lines"
+        else:
+            message = f"No test or build output recognized in {summary.lines_scanned} lines"
+
+        return {
+            "success": True,
+            "session_id": parsed.session_id,
+            "message": message,
+            "output": "\n".join(output_lines),
+            "from_line": summary.from_line,
+            "lines_scanned": summary.lines_scanned,
+            "runs": runs,
+        }
+
+    except ValueError:
+        return {"success": False, "error": "Invalid session_id format"}
+    except Exception as e:
+        logger.error(f"Error in get_output_summary: {e}")
+        return {"success": False, "error": str(e)}
+
+
 async def get_session_state(args: Dict[str, Any]) -> Dict[str, Any]:
     """Get current state and recent output of a session."""
     try:
@@ -680,35 +1510,47 @@ async def get_session_state(args: Dict[str, Any]) -> Dict[str, Any]:
         if not session or not session.iterm_session_id:
             return {"success": False, "error": "Session not found"}
 
-        from ..iterm_controller import get_controller
-        controller = await get_controller()
+        # Recent output comes from the session buffer, refreshed only if it changed
+        if not await manager.refresh_output(session):
+            return {"success": False, "error": "Session not found"}
 
-        import iterm2
-        app_session = controller.app.get_session_by_id(session.iterm_session_id)
-        if not app_session:
-            return {"success": False, "error": "iTerm session not found"}
+        version = session.output_buffer.version
+        if parsed.if_changed_since is not None and parsed.if_changed_since == version:
+            return {
+                "success": True,
+                "not_modified": True,
+                "version": version,
+                "message": f"Session state not modified (version {version})",
+            }
 
-        # Get current working directory
-        path = await app_session.async_get_variable("path")
+        # Kept current by variable monitors; read from iTerm2 only if not watched yet
+        path, job_name, job_pid, tty, hostname = [
+            await manager.get_session_variable(session, name)
+            for name in ("path", "jobName", "jobPid", "tty", "hostname")
+        ]
 
-        # Get recent screen content
-        content = await app_session.async_get_screen_contents()
-        recent_lines = []
-        for i in range(max(0, content.number_of_lines - 10), content.number_of_lines):
-            line = content.line(i)
-            if line.string.strip():
-                recent_lines.append(line.string)
+        recent_lines = [line for line in session.output_buffer[-10:] if line.strip()]
 
-        return {
+        result: Dict[str, Any] = {
             "success": True,
             "session_id": parsed.session_id,
             "path": path,
+            "job_name": job_name,
+            "job_pid": job_pid,
+            "tty": tty,
+            "hostname": hostname,
             "recent_output": recent_lines,
+            "version": version,
             "pane_position": session.pane_position,
             "parent_session_id": str(session.parent_session_id) if session.parent_session_id else None,
             "child_count": len(session.child_session_ids),
             "message": "Session state retrieved",
         }
+        # Answered by the local screen model, no capture needed
+        if session.screen is not None:
+            result["cursor"] = list(session.screen.cursor_position)
+            result["alternate_screen"] = session.screen.alternate_screen
+        return result
 
     except ValueError:
         return {"success": False, "error": "Invalid session_id format"}
@@ -717,6 +1559,463 @@ async def get_session_state(args: Dict[str, Any]) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+async def tag_sessions(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Add or remove tags on sessions."""
+    try:
+        parsed = TagSessionsArgs(**args)
+        manager = get_session_manager()
+
+        tagged: Dict[str, List[str]] = {}
+        missing: List[str] = []
+        for raw_id in parsed.session_ids:
+            tags = manager.tag_session(UUID(raw_id), parsed.add, parsed.remove)
+            if tags is None:
+                missing.append(raw_id)
+            else:
+                tagged[raw_id] = sorted(tags)
+
+        if not tagged:
+            return {"success": False, "error": "Session not found"}
+
+        result: Dict[str, Any] = {
+            "success": True,
+            "tags": tagged,
+            "message": f"Updated tags of {len(tagged)} sessions",
+        }
+        if missing:
+            result["warning"] = f"Sessions not found: {', '.join(missing)}"
+        return result
+
+    except ValueError:
+        return {"success": False, "error": "Invalid session_id format"}
+    except Exception as e:
+        logger.error(f"Error in tag_sessions: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def run_on_sessions(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a command in many sessions concurrently and aggregate the results."""
+    try:
+        parsed = RunOnSessionsArgs(**args)
+        manager = get_session_manager()
+
+        sessions = []
+        missing: List[str] = []
+        for raw_id in parsed.session_ids or []:
+            session = manager.get_session_state(UUID(raw_id))
+            if session:
+                sessions.append(session)
+            else:
+                missing.append(raw_id)
+        if parsed.tag:
+            selected = {session.session_id for session in sessions}
+            sessions.extend(
+                session
+                for session in manager.find_sessions(parsed.tag)
+                if session.session_id not in selected
+            )
+
+        if not sessions:
+            return {"success": False, "error": "No matching sessions"}
+
+        results = await fan_out(
+            manager,
+            sessions,
+            parsed.command,
+            max_concurrency=parsed.max_concurrency,
+            timeout=parsed.timeout,
+            detect_exit_status=parsed.detect_exit_status,
+            quiet_seconds=parsed.quiet_seconds,
+            tail_lines=parsed.tail_lines,
+        )
+
+        completed = sum(1 for r in results if r.completed)
+        failed = sum(1 for r in results if r.exit_status not in (None, 0))
+        output_lines: List[str] = []
+        for r in results:
+            if r.completed:
+                status = "done" if r.exit_status is None else f"exit {r.exit_status}"
+            else:
+                status = f"incomplete: {r.error}"
+            output_lines.append(f"=== {r.session_id} ({status}, {r.elapsed_seconds:.1f}s)")
+            output_lines.extend(r.output_tail)
+
+        result: Dict[str, Any] = {
+            "success": True,
+            "message": (
+                f"Ran in {len(results)} sessions: {completed} completed, "
+                f"{failed} failed, {len(results) - completed} incomplete"
+            ),
+            "output": "\n".join(output_lines),
+            "results": [
+                {
+                    "session_id": r.session_id,
+                    "completed": r.completed,
+                    "exit_status": r.exit_status,
+                    "elapsed_seconds": round(r.elapsed_seconds, 3),
+                    "output_tail": r.output_tail,
+                    "error": r.error,
+                }
+                for r in results
+            ],
+        }
+        if missing:
+            result["warning"] = f"Sessions not found: {', '.join(missing)}"
+        return result
+
+    except ValueError:
+        return {"success": False, "error": "Invalid session_id format"}
+    except Exception as e:
+        logger.error(f"Error in run_on_sessions: {e}")
+        return {"success": False, "error": str(e)}
+
+
+def _job_summary(job: Job) -> Dict[str, Any]:
+    """Serialize a job without its output."""
+    duration = job.duration_seconds
+    return {
+        "job_id": job.job_id,
+        "command": job.command,
+        "status": job.status.value,
+        "session_id": job.session_id,
+        "exit_status": job.exit_status,
+        "duration_seconds": round(duration, 3) if duration is not None else None,
+        "error": job.error,
+    }
+
+
+async def start_worker_pool(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Create or adopt worker sessions for the job scheduler."""
+    try:
+        parsed = StartWorkerPoolArgs(**args)
+        scheduler = get_scheduler()
+
+        added = await scheduler.start_pool(
+            size=parsed.size,
+            session_ids=[UUID(raw_id) for raw_id in parsed.session_ids or []],
+            tag=parsed.tag,
+        )
+        if not added and not scheduler.worker_ids:
+            return {"success": False, "error": "No workers available"}
+
+        return {
+            "success": True,
+            "message": (
+                f"Added {len(added)} workers; pool has {len(scheduler.worker_ids)} workers"
+            ),
+            "worker_session_ids": [str(session_id) for session_id in scheduler.worker_ids],
+        }
+
+    except ValueError:
+        return {"success": False, "error": "Invalid session_id format"}
+    except Exception as e:
+        logger.error(f"Error in start_worker_pool: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def submit_jobs(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Queue commands for the worker pool."""
+    try:
+        parsed = SubmitJobsArgs(**args)
+        scheduler = get_scheduler()
+
+        jobs = [scheduler.submit(command, timeout=parsed.timeout) for command in parsed.commands]
+        result: Dict[str, Any] = {
+            "success": True,
+            "message": (
+                f"Queued {len(jobs)} jobs ({scheduler.queued_count} waiting, "
+                f"{len(scheduler.worker_ids)} workers)"
+            ),
+            "job_ids": [job.job_id for job in jobs],
+        }
+        if not scheduler.worker_ids:
+            result["warning"] = "No workers yet: jobs wait until start_worker_pool is called"
+        return result
+
+    except Exception as e:
+        logger.error(f"Error in submit_jobs: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def get_jobs(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Report job status and output."""
+    try:
+        parsed = GetJobsArgs(**args)
+        scheduler = get_scheduler()
+
+        if parsed.job_ids:
+            jobs = [scheduler.get_job(job_id) for job_id in parsed.job_ids]
+            missing = [job_id for job_id, job in zip(parsed.job_ids, jobs) if job is None]
+            if missing:
+                return {"success": False, "error": f"Job not found: {', '.join(missing)}"}
+            found = [job for job in jobs if job is not None]
+        else:
+            found = scheduler.list_jobs()
+        if parsed.status:
+            found = [job for job in found if job.status == parsed.status]
+
+        counts: Dict[str, int] = {}
+        for job in found:
+            counts[job.status.value] = counts.get(job.status.value, 0) + 1
+        summaries = []
+        output_lines: List[str] = []
+        for job in found:
+            summary = _job_summary(job)
+            if parsed.include_output and job.is_finished:
+                summary["output"] = job.output[-parsed.max_output_lines:]
+                output_lines.append(f"=== {job.job_id} {job.command!r} ({job.status.value})")
+                output_lines.extend(summary["output"])
+            summaries.append(summary)
+
+        result: Dict[str, Any] = {
+            "success": True,
+            "message": f"{len(found)} jobs: "
+            + ", ".join(f"{count} {status}" for status, count in counts.items()),
+            "jobs": summaries,
+        }
+        if output_lines:
+            result["output"] = "\n".join(output_lines)
+        return result
+
+    except Exception as e:
+        logger.error(f"Error in get_jobs: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def cancel_job(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Cancel a queued or running job."""
+    try:
+        parsed = CancelJobArgs(**args)
+        scheduler = get_scheduler()
+
+        if not await scheduler.cancel(parsed.job_id):
+            return {"success": False, "error": "Job not found or already finished"}
+        return {"success": True, "message": f"Cancelled job {parsed.job_id}"}
+
+    except Exception as e:
+        logger.error(f"Error in cancel_job: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def run_interaction_script(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Run an expect/send script against a session in one call."""
+    try:
+        parsed = RunInteractionScriptArgs(**args)
+        manager = get_session_manager()
+
+        session_id = UUID(parsed.session_id)
+        steps = [
+            ScriptStep(
+                label=step.label,
+                send=step.send,
+                submit=step.submit,
+                expect=[ExpectBranch(**branch.model_dump()) for branch in step.expect],
+                timeout=step.timeout,
+                on_timeout=step.on_timeout,
+            )
+            for step in parsed.steps
+        ]
+        try:
+            result = await run_interaction(
+                manager,
+                session_id,
+                steps,
+                timeout=parsed.timeout,
+                max_steps=parsed.max_steps,
+                max_output_lines=parsed.max_output_lines,
+            )
+        except (ValueError, re.error) as e:
+            return {"success": False, "error": f"Invalid script: {e}"}
+
+        if not result:
+            return {"success": False, "error": "Session not found"}
+
+        transcript = [
+            {
+                "step": entry.step,
+                "action": entry.action,
+                "detail": entry.detail,
+                "elapsed_seconds": round(entry.elapsed_seconds, 3),
+            }
+            for entry in result.transcript
+        ]
+        if result.completed:
+            message = (
+                f"Script completed: {result.steps_run} steps in {result.elapsed_seconds:.1f}s"
+            )
+        else:
+            message = (
+                f"Script stopped after {result.steps_run} steps "
+                f"in {result.elapsed_seconds:.1f}s"
+            )
+
+        response: Dict[str, Any] = {
+            "success": True,
+            "session_id": parsed.session_id,
+            "message": message,
+            "completed": result.completed,
+            "steps_run": result.steps_run,
+            "transcript": transcript,
+            "output": "\n".join(result.output),
+        }
+        # A stopped script is still reported with its transcript and output
+        if result.error:
+            response["warning"] = result.error
+        return response
+
+    except ValueError:
+        return {"success": False, "error": "Invalid session_id format"}
+    except Exception as e:
+        logger.error(f"Error in run_interaction_script: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def get_output_timeline(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge output of several sessions into one time-ordered view."""
+    try:
+        parsed = GetOutputTimelineArgs(**args)
+        manager = get_session_manager()
+
+        session_ids = [UUID(raw_id) for raw_id in parsed.session_ids or []]
+        if parsed.tag:
+            session_ids.extend(
+                session.session_id
+                for session in manager.find_sessions(parsed.tag)
+                if session.session_id not in session_ids
+            )
+        if not parsed.session_ids and not parsed.tag:
+            session_ids = list(manager.sessions)
+        if not session_ids:
+            return {"success": False, "error": "No matching sessions"}
+
+        entries = await manager.get_timeline(
+            session_ids, since=parsed.since, until=parsed.until, limit=parsed.limit
+        )
+
+        # Short labels: tmux session name when there is one, else the UUID prefix
+        labels: Dict[str, str] = {}
+        for session_id in session_ids:
+            session = manager.get_session_state(session_id)
+            if session:
+                labels[str(session_id)] = session.tmux_session or str(session_id)[:8]
+
+        return {
+            "success": True,
+            "message": f"{len(entries)} lines from {len(labels)} sessions",
+            "output": "\n".join(
+                f"{_format_time(entry.timestamp)} [{labels.get(entry.session_id, '?')}] "
+                f"{entry.text}"
+                for entry in entries
+            ),
+            "labels": labels,
+        }
+
+    except ValueError:
+        return {"success": False, "error": "Invalid session_id format"}
+    except Exception as e:
+        logger.error(f"Error in get_output_timeline: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def get_command_history(args: Dict[str, Any]) -> Dict[str, Any]:
+    """List commands recorded from shell-integration marks."""
+    try:
+        parsed = GetCommandHistoryArgs(**args)
+        manager = get_session_manager()
+
+        session_id = UUID(parsed.session_id)
+        session = manager.get_session_state(session_id)
+        if not session:
+            return {"success": False, "error": "Session not found"}
+        session.touch()
+
+        records = list(session.commands.commands)
+        if parsed.failed_only:
+            records = [r for r in records if r.exit_status not in (None, 0)]
+        records = records[-parsed.limit:][::-1]
+
+        commands: List[Dict[str, Any]] = []
+        for record in records:
+            command = record.command
+            if command is None and record.output_start_line:
+                # Marks carry no command text; the prompt line just above the output has it
+                prompt = await manager.read_lines(
+                    session, record.output_start_line - 1, record.output_start_line
+                )
+                command = prompt[1][0].strip() if prompt and prompt[1] else None
+            commands.append(
+                {
+                    "command": command,
+                    "exit_status": record.exit_status,
+                    "running": record.finished_at is None,
+                    "duration_seconds": record.duration_seconds,
+                    "output_start_line": record.output_start_line,
+                    "end_line": record.end_line,
+                }
+            )
+
+        result: Dict[str, Any] = {
+            "success": True,
+            "session_id": parsed.session_id,
+            "pid": session.pid,
+            "commands": commands,
+        }
+
+        if not commands:
+            result["message"] = (
+                "No commands recorded (shell integration may not be installed in this session)"
+            )
+            return result
+
+        latest = commands[0]
+        status = "running" if latest["running"] else f"exit status {latest['exit_status']}"
+        result["message"] = (
+            f"{len(commands)} commands listed, most recent: {latest['command']!r} ({status})"
+        )
+        if parsed.include_output:
+            lines = await manager.get_command_output(
+                session, records[0], max_lines=parsed.max_output_lines
+            )
+            result["output"] = "\n".join(lines)
+
+        return result
+
+    except ValueError:
+        return {"success": False, "error": "Invalid session_id format"}
+    except Exception as e:
+        logger.error(f"Error in get_command_history: {e}")
+        return {"success": False, "error": str(e)}
+
+
+async def reclaim_memory(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply the idle policy and memory budget now."""
+    try:
+        parsed = ReclaimMemoryArgs(**args)
+        manager = get_session_manager()
+
+        report = await manager.reap(force=parsed.force)
+
+        return {
+            "success": True,
+            "reclaimed_bytes": report.reclaimed_bytes,
+            "resident_bytes": report.resident_bytes,
+            "compressed_session_ids": report.compressed_session_ids,
+            "evicted_session_ids": report.evicted_session_ids,
+            "terminated_session_ids": report.terminated_session_ids,
+            "message": (
+                f"Reclaimed {report.reclaimed_bytes} bytes "
+                f"({len(report.compressed_session_ids)} buffers compressed, "
+                f"{len(report.evicted_session_ids)} buffers evicted, "
+                f"{len(report.terminated_session_ids)} sessions terminated). "
+                f"{report.resident_bytes} bytes still resident."
+            ),
+        }
+
+    except Exception as e:
+        logger.error(f"Error in reclaim_memory: {e}")
+        return {"success": False, "error": str(e)}
+
+
 # Tool Registry
 TOOLS: List[Dict[str, Any]] = [
     {
@@ -725,7 +2024,7 @@ TOOLS: List[Dict[str, Any]] = [
             "Create a new iTerm2 tab with optional tmux session for persistence. "
             "Returns session_id for future operations."
         ),
-        "inputSchema": CreateItermTabArgs.model_json_schema(),
+        "inputSchema": _input_schema(CreateItermTabArgs),
         "handler": create_iterm_tab,
     },
     {
@@ -735,25 +2034,41 @@ TOOLS: List[Dict[str, Any]] = [
             "Automatically detects Claude Code sessions and submits with Enter (\\r). "
             "For non-Claude sessions, just sends the text without submitting."
         ),
-        "inputSchema": SendToSessionArgs.model_json_schema(),
+        "inputSchema": _input_schema(SendToSessionArgs),
         "handler": send_to_session,
     },
     {
         "name": "read_session_output",
         "description": (
             "Read output from a session with pagination. "
-            "offset=0 reads new output, negative offset reads tail."
+            "offset=0 reads new output, negative offset reads tail. "
+            "Pass the returned version as if_changed_since to poll cheaply. "
+            "since/until select lines by arrival time (e.g. since=-30 for the last 30s). "
+            "max_bytes/max_tokens condense a long range (noisy builds) to a budget. "
+            "With a progress token, reads over 200 lines arrive as progress "
+            "notifications instead of in the response."
         ),
-        "inputSchema": ReadSessionOutputArgs.model_json_schema(),
+        "inputSchema": _input_schema(ReadSessionOutputArgs),
         "handler": read_session_output,
     },
+    {
+        "name": "search_session_output",
+        "description": (
+            "Search a session's full output (including tmux scrollback) server-side "
+            "with a regex or literal pattern. Returns matching line numbers with context; "
+            "pass next_cursor back as cursor to get further matches. Use the line numbers "
+            "as read_session_output offsets to read around a match."
+        ),
+        "inputSchema": _input_schema(SearchSessionOutputArgs),
+        "handler": search_session_output,
+    },
     {
         "name": "create_shared_session",
         "description": (
             "Create a tmux session that both Claude and the user can control. "
             "User can attach/detach freely."
         ),
-        "inputSchema": CreateSharedSessionArgs.model_json_schema(),
+        "inputSchema": _input_schema(CreateSharedSessionArgs),
         "handler": create_shared_session,
     },
     {
@@ -762,7 +2077,7 @@ TOOLS: List[Dict[str, Any]] = [
             "Prepare a session for user attachment. "
             "Returns tmux attach command for the user."
         ),
-        "inputSchema": AttachUserArgs.model_json_schema(),
+        "inputSchema": _input_schema(AttachUserArgs),
         "handler": attach_user_to_session,
     },
     {
@@ -774,9 +2089,20 @@ TOOLS: List[Dict[str, Any]] = [
     {
         "name": "terminate_session",
         "description": "Terminate a session and clean up resources.",
-        "inputSchema": TerminateSessionArgs.model_json_schema(),
+        "inputSchema": _input_schema(TerminateSessionArgs),
         "handler": terminate_session,
     },
+    {
+        "name": "replay_recording",
+        "description": (
+            "Play an asciicast recording (e.g. one made with record=true) back as a "
+            "read-only session, to reproduce a session's output deterministically "
+            "without iTerm2. Returns a session_id for the read, search, wait and "
+            "summary tools."
+        ),
+        "inputSchema": _input_schema(ReplayRecordingArgs),
+        "handler": replay_recording,
+    },
     {
         "name": "split_pane_horizontal",
         "description": (
@@ -784,7 +2110,7 @@ TOOLS: List[Dict[str, Any]] = [
             "Creates a new pane below the existing one. "
             "Returns new pane's session_id."
         ),
-        "inputSchema": SplitPaneArgs.model_json_schema(),
+        "inputSchema": _input_schema(SplitPaneArgs),
         "handler": split_pane_horizontal,
     },
     {
@@ -794,19 +2120,19 @@ TOOLS: List[Dict[str, Any]] = [
             "Creates a new pane to the right of the existing one. "
             "Returns new pane's session_id."
         ),
-        "inputSchema": SplitPaneArgs.model_json_schema(),
+        "inputSchema": _input_schema(SplitPaneArgs),
         "handler": split_pane_vertical,
     },
     {
         "name": "close_pane",
         "description": "Close a specific pane/session.",
-        "inputSchema": ClosePaneArgs.model_json_schema(),
+        "inputSchema": _input_schema(ClosePaneArgs),
         "handler": close_pane,
     },
     {
         "name": "focus_pane",
         "description": "Focus/activate a specific pane.",
-        "inputSchema": FocusPaneArgs.model_json_schema(),
+        "inputSchema": _input_schema(FocusPaneArgs),
         "handler": focus_pane,
     },
     {
@@ -816,9 +2142,19 @@ TOOLS: List[Dict[str, Any]] = [
             "Optionally verifies the text was actually submitted. "
             "Use this instead of send_to_session when you need to ensure the text is executed."
         ),
-        "inputSchema": SendAndSubmitArgs.model_json_schema(),
+        "inputSchema": _input_schema(SendAndSubmitArgs),
         "handler": send_and_submit,
     },
+    {
+        "name": "wait_for_idle",
+        "description": (
+            "Wait until a session's output has been unchanged for quiet_seconds "
+            "(or until timeout), e.g. to wait for a command to finish printing. "
+            "Reports whether the session went idle and how long it was busy."
+        ),
+        "inputSchema": _input_schema(WaitForIdleArgs),
+        "handler": wait_for_idle,
+    },
     {
         "name": "detect_claude_session",
         "description": (
@@ -827,17 +2163,135 @@ TOOLS: List[Dict[str, Any]] = [
             "'processing', 'waiting_for_input', 'completed', or 'active'. "
             "Essential for monitoring Claude sessions."
         ),
-        "inputSchema": DetectClaudeArgs.model_json_schema(),
+        "inputSchema": _input_schema(DetectClaudeArgs),
         "handler": detect_claude_session,
     },
+    {
+        "name": "get_screen",
+        "description": (
+            "Get the visible screen of a session and its cursor position, e.g. to see "
+            "the state of a full-screen program. tmux sessions are answered from a "
+            "local screen model kept up to date from the output stream."
+        ),
+        "inputSchema": _input_schema(GetScreenArgs),
+        "handler": get_screen,
+    },
+    {
+        "name": "get_output_summary",
+        "description": (
+            "Summarize test and build output in a session (pytest, jest/npm, cargo, "
+            "make/gcc, go test): pass/fail counts, failing test names and the first "
+            "error with file:line. Much cheaper than reading a long log."
+        ),
+        "inputSchema": _input_schema(GetOutputSummaryArgs),
+        "handler": get_output_summary,
+    },
     {
         "name": "get_session_state",
         "description": (
             "Get comprehensive state information about a session including: "
-            "current directory, recent output, pane position, parent/child relationships. "
+            "current directory, foreground job, tty, hostname, recent output, "
+            "pane position, parent/child relationships. "
             "Use this to monitor and verify session state."
         ),
-        "inputSchema": GetSessionStateArgs.model_json_schema(),
+        "inputSchema": _input_schema(GetSessionStateArgs),
         "handler": get_session_state,
     },
+    {
+        "name": "run_interaction_script",
+        "description": (
+            "Drive an interactive program (ssh/sudo prompts, npm init, REPLs, confirmation "
+            "dialogs) with an expect-style script in a single call. Each step optionally "
+            "sends text, then waits for the first of several regex patterns in new output; "
+            "a matching pattern can send a reply and jump to a labelled step. Returns a "
+            "transcript of sends and matches plus the output produced."
+        ),
+        "inputSchema": _input_schema(RunInteractionScriptArgs),
+        "handler": run_interaction_script,
+    },
+    {
+        "name": "tag_sessions",
+        "description": (
+            "Add or remove tags on sessions (e.g. tag worker panes 'workers') so groups "
+            "of sessions can be addressed together by run_on_sessions."
+        ),
+        "inputSchema": _input_schema(TagSessionsArgs),
+        "handler": tag_sessions,
+    },
+    {
+        "name": "run_on_sessions",
+        "description": (
+            "Run the same command in many sessions concurrently (by session_ids and/or tag) "
+            "and aggregate per-session results: completion, exit status and output tail. "
+            "Bounded by max_concurrency with a per-session timeout."
+        ),
+        "inputSchema": _input_schema(RunOnSessionsArgs),
+        "handler": run_on_sessions,
+    },
+    {
+        "name": "start_worker_pool",
+        "description": (
+            "Set up the job scheduler's pool of worker terminals: create `size` new "
+            "tmux-backed tabs and/or adopt existing sessions by ID or tag. Workers run "
+            "queued jobs one at a time."
+        ),
+        "inputSchema": _input_schema(StartWorkerPoolArgs),
+        "handler": start_worker_pool,
+    },
+    {
+        "name": "submit_jobs",
+        "description": (
+            "Queue commands (test shards, lint targets, ...) for the worker pool. Each job "
+            "is dispatched to the next idle worker as soon as its previous job completes. "
+            "Returns job IDs for get_jobs."
+        ),
+        "inputSchema": _input_schema(SubmitJobsArgs),
+        "handler": submit_jobs,
+    },
+    {
+        "name": "get_jobs",
+        "description": (
+            "Report status (queued, running, succeeded, failed, timed_out, cancelled), "
+            "exit status, duration and optionally output of scheduled jobs."
+        ),
+        "inputSchema": _input_schema(GetJobsArgs),
+        "handler": get_jobs,
+    },
+    {
+        "name": "cancel_job",
+        "description": "Cancel a queued job, or interrupt a running one with Ctrl-C.",
+        "inputSchema": _input_schema(CancelJobArgs),
+        "handler": cancel_job,
+    },
+    {
+        "name": "get_output_timeline",
+        "description": (
+            "Merge the output of several sessions (by IDs, tag, or all) into one view "
+            "ordered by arrival time, e.g. to correlate a server log with a client run. "
+            "Defaults to the last 60 seconds."
+        ),
+        "inputSchema": _input_schema(GetOutputTimelineArgs),
+        "handler": get_output_timeline,
+    },
+    {
+        "name": "get_command_history",
+        "description": (
+            "List commands run in a session with their exit status and duration, "
+            "most recent first, using shell-integration prompt marks (OSC 133). "
+            "Use failed_only=true with include_output=true to jump straight to the "
+            "output of the last failing command."
+        ),
+        "inputSchema": _input_schema(GetCommandHistoryArgs),
+        "handler": get_command_history,
+    },
+    {
+        "name": "reclaim_memory",
+        "description": (
+            "Compress output buffers of idle sessions and enforce the server's memory budget "
+            "by evicting buffers least-recently-used first. Returns how many bytes were reclaimed. "
+            "This also runs periodically in the background."
+        ),
+        "inputSchema": _input_schema(ReclaimMemoryArgs),
+        "handler": reclaim_memory,
+    },
 ]
@@ -0,0 +1,141 @@
+"""Precomputed JSON schemas for tool arguments.
+
+Generating a pydantic JSON schema is the most expensive part of importing the
+tool table, and the result only changes when the argument models do. The
+schemas are therefore shipped in ``tool_schemas.json`` together with a
+fingerprint of the module that defines the models and of the pydantic version.
+A stale or missing file is ignored and the schemas are generated as before.
+
+The file also holds the finished tool descriptors, so tools/list can be
+answered without importing the tool module (and the session manager behind it).
+
+Regenerate after changing tool arguments:
+
+    python -m src.tools.schemas
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Type, cast
+
+import pydantic
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Shipped next to this module
+SCHEMA_FILE = Path(__file__).with_name("tool_schemas.json")
+
+# Module that defines the tools and their argument models
+TOOLS_MODULE = Path(__file__).with_name("iterm_tools.py")
+
+
+def fingerprint(source: Path) -> str:
+    """
+    Identify the argument models a schema file was generated from.
+
+    Args:
+        source: Module file that defines the models.
+
+    Returns:
+        Hex digest of the module source and the pydantic version.
+    """
+    digest = hashlib.sha256(source.read_bytes())
+    digest.update(pydantic.VERSION.encode())
+    return digest.hexdigest()
+
+
+def _load(source: Path) -> Dict[str, Any]:
+    """Read the schema file if it matches the current models; empty if missing or stale."""
+    try:
+        data = json.loads(SCHEMA_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("fingerprint") != fingerprint(source):
+        logger.debug(f"{SCHEMA_FILE.name} is stale; generating tool schemas")
+        return {}
+    return data
+
+
+def load_schemas(source: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Load precomputed schemas if they match the current models.
+
+    Args:
+        source: Module file that defines the models.
+
+    Returns:
+        Schemas by model name, or an empty dict if the file is missing or stale.
+    """
+    schemas = _load(source).get("schemas")
+    if not isinstance(schemas, dict):
+        logger.debug(f"{SCHEMA_FILE.name} has no schemas; generating tool schemas")
+        return {}
+    return cast(Dict[str, Dict[str, Any]], schemas)
+
+
+def load_tools(source: Path = TOOLS_MODULE) -> List[Dict[str, Any]]:
+    """
+    Load the precomputed tool descriptors if they match the current tool module.
+
+    Args:
+        source: Module file that defines the tools.
+
+    Returns:
+        Descriptors (name, description, inputSchema) in tool order, or an empty
+        list if the file is missing, stale or malformed.
+    """
+    tools = _load(source).get("tools")
+    if not isinstance(tools, list) or not all(
+        isinstance(tool, dict) and {"name", "description", "inputSchema"} <= tool.keys()
+        for tool in tools
+    ):
+        return []
+    return cast(List[Dict[str, Any]], tools)
+
+
+def write_schemas(
+    source: Path, models: Dict[str, Type[BaseModel]], tools: List[Dict[str, Any]]
+) -> None:
+    """
+    Generate and save the schemas of a module's argument models and its tool descriptors.
+
+    Args:
+        source: Module file that defines the models.
+        models: Models by name.
+        tools: Tool table entries; their handlers are not saved.
+    """
+    data = {
+        "fingerprint": fingerprint(source),
+        "schemas": {name: model.model_json_schema() for name, model in sorted(models.items())},
+        "tools": [
+            {
+                "name": tool["name"],
+                "description": tool["description"],
+                "inputSchema": tool["inputSchema"],
+            }
+            for tool in tools
+        ],
+    }
+    SCHEMA_FILE.write_text(json.dumps(data, indent=1, sort_keys=True) + "\n")
+
+
+def main() -> None:
+    """Regenerate the schema file from the tool module."""
+    from . import iterm_tools
+
+    models = {
+        name: value
+        for name, value in vars(iterm_tools).items()
+        if isinstance(value, type)
+        and issubclass(value, BaseModel)
+        and value.__module__ == iterm_tools.__name__
+    }
+    write_schemas(Path(iterm_tools.__file__), models, iterm_tools.TOOLS)
+    print(f"Wrote {len(models)} schemas to {SCHEMA_FILE}")
+
+
+if __name__ == "__main__":
+    main()
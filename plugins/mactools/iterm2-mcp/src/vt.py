@@ -0,0 +1,484 @@
+"""Virtual terminal screen maintained from a pane's raw output stream."""
+
+import unicodedata
+from typing import List, Optional, Tuple, Union
+
+from .ansi import CONTROL, CSI, ESCAPE, TEXT, TAB_WIDTH, AnsiTokenizer, csi_param
+from .shell_integration import PromptMark, parse_mark
+
+# Screen size assumed until the real pane size is known
+DEFAULT_COLUMNS = 80
+DEFAULT_ROWS = 24
+
+# Private modes that switch to the alternate screen
+_ALTERNATE_MODES = ("1049", "1047", "47")
+
+# Shell-integration prompt mark sequence prefix (OSC 133)
+_OSC_133 = "\x1b]133;"
+
+Grid = List[List[str]]
+
+
+def _char_width(char: str) -> int:
+    """Cells taken by a character: 0 for combining marks, 2 for wide characters."""
+    if unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+class VirtualScreen:
+    """
+    Screen model of one pane, fed with the bytes the program wrote.
+
+    Implements the subset of VT100/xterm that shells and full-screen programs
+    rely on: cursor addressing, erasing, insert/delete of lines and
+    characters, scroll regions, deferred autowrap and the alternate screen.
+    Attributes are not tracked; cells hold characters only, with an empty
+    cell after each wide character.
+    """
+
+    def __init__(
+        self, columns: int = DEFAULT_COLUMNS, rows: int = DEFAULT_ROWS, track_marks: bool = False
+    ) -> None:
+        self.columns = max(1, columns)
+        self.rows = max(1, rows)
+        self.cursor_row = 0
+        self.cursor_col = 0
+        self.cursor_visible = True
+        self.autowrap = True
+        self.insert_mode = False
+        # Lines scrolled off the top of the main screen (into scrollback)
+        self.scrolled_lines = 0
+        # Line number of the top row; scrolling advances it. Set by the owner to
+        # match its own numbering (the output buffer index, for tmux sessions)
+        self.first_line = 0
+        # Collect prompt marks for take_marks(), numbered by the row they were written on
+        self.track_marks = track_marks
+        self._marks: List[PromptMark] = []
+        # Bytes fed so far; changes whenever the screen may have changed
+        self.bytes_fed = 0
+        self._tokenizer = AnsiTokenizer(drop_sgr=True)
+        self._main = self._blank_grid()
+        self._alternate: Optional[Grid] = None
+        self._saved_main: Optional[Tuple[int, int]] = None
+        self._saved_cursor = (0, 0)
+        self._top = 0
+        self._bottom = self.rows - 1
+        self._wrap_pending = False
+        self._last_char = " "
+
+    @property
+    def grid(self) -> Grid:
+        """The screen being displayed (alternate screen while a full-screen app runs)."""
+        return self._alternate if self._alternate is not None else self._main
+
+    @property
+    def cursor_position(self) -> Tuple[int, int]:
+        """
+        Cursor (row, column) as tmux reports it.
+
+        After printing in the last column the column is ``columns``: the
+        cursor waits there until the next character wraps the line.
+        """
+        if self._wrap_pending:
+            return self.cursor_row, self.columns
+        return self.cursor_row, self.cursor_col
+
+    @property
+    def alternate_screen(self) -> bool:
+        """Check if the alternate screen is active."""
+        return self._alternate is not None
+
+    def lines(self) -> List[str]:
+        """Visible rows, with trailing blanks removed."""
+        return ["".join(row).rstrip() for row in self.grid]
+
+    def line(self, row: int) -> str:
+        """One visible row, with trailing blanks removed."""
+        return "".join(self.grid[row]).rstrip()
+
+    def take_marks(self) -> List[PromptMark]:
+        """Shell-integration marks fed since the last call, with the line of the cursor."""
+        marks, self._marks = self._marks, []
+        return marks
+
+    def load(
+        self,
+        lines: List[str],
+        cursor_row: int,
+        cursor_col: int,
+        alternate_screen: bool = False,
+    ) -> None:
+        """
+        Replace the screen contents, e.g. with a capture taken when attaching.
+
+        Args:
+            lines: Visible rows, top to bottom.
+            cursor_row: Cursor row (0-based).
+            cursor_col: Cursor column (0-based); ``columns`` means a wrap is pending.
+            alternate_screen: Load into the alternate screen.
+        """
+        grid = self._blank_grid()
+        for row, text in enumerate(lines[-self.rows :]):
+            cells = self._cells(text)[: self.columns]
+            grid[row][: len(cells)] = cells
+        if alternate_screen:
+            self._alternate = grid
+        else:
+            self._main = grid
+            self._alternate = None
+        self._top, self._bottom = 0, self.rows - 1
+        self._move(cursor_row, cursor_col)
+        self._wrap_pending = self.autowrap and cursor_col >= self.columns
+
+    def resize(self, columns: int, rows: int) -> None:
+        """Change the screen size, keeping the bottom rows and the cursor in bounds."""
+        columns, rows = max(1, columns), max(1, rows)
+        if (columns, rows) == (self.columns, self.rows):
+            return
+        for grid in (self._main, self._alternate):
+            if grid is None:
+                continue
+            for row in grid:
+                del row[columns:]
+                row.extend(" " * (columns - len(row)))
+            if len(grid) > rows:
+                del grid[: len(grid) - rows]
+            grid.extend([" "] * columns for _ in range(rows - len(grid)))
+        shift = max(0, self.rows - rows)
+        self.columns, self.rows = columns, rows
+        self._top, self._bottom = 0, rows - 1
+        self._move(self.cursor_row - shift, self.cursor_col)
+
+    def feed(self, data: Union[bytes, str]) -> None:
+        """
+        Apply a chunk of raw output.
+
+        Args:
+            data: Bytes (or decoded text) as written by the program in the pane.
+        """
+        self.bytes_fed += len(data)
+        for kind, a, b in self._tokenizer.feed(data):
+            if kind == TEXT:
+                self._write(a)
+            elif kind == CONTROL:
+                self._control(a)
+            elif kind == CSI:
+                self._csi(a, b)
+            elif kind == ESCAPE:
+                self._escape(a)
+
+    # Writing
+
+    def _write(self, text: str) -> None:
+        """Print text at the cursor, wrapping at the right margin."""
+        if not text.isascii():
+            for char in text:
+                self._write_char(char)
+            return
+
+        columns = self.columns
+        while text:
+            if self._wrap_pending:
+                self._wrap()
+            row = self.grid[self.cursor_row]
+            col = self.cursor_col
+            part = text[: columns - col]
+            text = text[len(part) :]
+            if self.insert_mode:
+                row[col:col] = part
+                del row[columns:]
+            else:
+                row[col : col + len(part)] = part
+            self._last_char = part[-1]
+            col += len(part)
+            if col >= columns:
+                self.cursor_col = columns - 1
+                if self.autowrap:
+                    self._wrap_pending = True
+                elif text:
+                    # Without autowrap the last column keeps being overwritten
+                    row[columns - 1] = text[-1]
+                    text = ""
+            else:
+                self.cursor_col = col
+
+    def _write_char(self, char: str) -> None:
+        """Print one character of any width."""
+        width = _char_width(char)
+        if width == 0:
+            # Combining mark: attach to the previous cell
+            col = self.cursor_col if self._wrap_pending else max(0, self.cursor_col - 1)
+            self.grid[self.cursor_row][col] += char
+            return
+        if self._wrap_pending:
+            self._wrap()
+        if width == 2 and self.cursor_col == self.columns - 1:
+            if not self.autowrap or self.columns < 2:
+                return
+            self.grid[self.cursor_row][self.cursor_col] = " "
+            self._wrap()
+
+        row = self.grid[self.cursor_row]
+        col = self.cursor_col
+        if self.insert_mode:
+            row[col:col] = [char] + [""] * (width - 1)
+            del row[self.columns :]
+        else:
+            row[col] = char
+            if width == 2:
+                row[col + 1] = ""
+        self._last_char = char
+        if col + width >= self.columns:
+            self.cursor_col = self.columns - 1
+            self._wrap_pending = self.autowrap
+        else:
+            self.cursor_col = col + width
+
+    def _wrap(self) -> None:
+        """Carry the cursor to the start of the next line."""
+        self._wrap_pending = False
+        self.cursor_col = 0
+        self._line_feed()
+
+    # Controls and escapes
+
+    def _control(self, char: str) -> None:
+        if char in "\n\x0b\x0c":
+            self._line_feed()
+        elif char == "\r":
+            self._move(self.cursor_row, 0)
+        elif char == "\b":
+            self._move(self.cursor_row, self.cursor_col - 1)
+        elif char == "\t":
+            self._move(self.cursor_row, self.cursor_col + TAB_WIDTH - self.cursor_col % TAB_WIDTH)
+
+    def _escape(self, sequence: str) -> None:
+        if sequence.startswith(_OSC_133):
+            self._prompt_mark(sequence)
+            return
+        final = sequence[-1]
+        if len(sequence) != 2:
+            return
+        if final == "7":
+            self._saved_cursor = (self.cursor_row, self.cursor_col)
+        elif final == "8":
+            self._move(*self._saved_cursor)
+        elif final == "D":
+            self._line_feed()
+        elif final == "E":
+            self._line_feed()
+            self._move(self.cursor_row, 0)
+        elif final == "M":
+            self._reverse_index()
+        elif final == "c":
+            self._main = self._blank_grid()
+            self._alternate = None
+            self._top, self._bottom = 0, self.rows - 1
+            self.autowrap, self.insert_mode, self.cursor_visible = True, False, True
+            self._move(0, 0)
+
+    def _prompt_mark(self, sequence: str) -> None:
+        """Record an OSC 133 mark at the cursor row of the main screen."""
+        if not self.track_marks or self._alternate is not None:
+            return
+        terminator = 1 if sequence.endswith("\x07") else 2
+        mark = parse_mark(
+            sequence[len(_OSC_133) : -terminator], self.first_line + self.cursor_row
+        )
+        if mark is not None:
+            self._marks.append(mark)
+
+    def _csi(self, params: str, final: str) -> None:
+        row, col = self.cursor_row, self.cursor_col
+        if final in "Hf":
+            self._move(csi_param(params, 0) - 1, csi_param(params, 1) - 1)
+        elif final == "A":
+            top = self._top if row >= self._top else 0
+            self._move(max(top, row - csi_param(params)), col)
+        elif final in "Be":
+            bottom = self._bottom if row <= self._bottom else self.rows - 1
+            self._move(min(bottom, row + csi_param(params)), col)
+        elif final in "Ca":
+            self._move(row, col + csi_param(params))
+        elif final == "D":
+            self._move(row, col - csi_param(params))
+        elif final == "E":
+            self._move(row + csi_param(params), 0)
+        elif final == "F":
+            self._move(row - csi_param(params), 0)
+        elif final in "G`":
+            self._move(row, csi_param(params) - 1)
+        elif final == "d":
+            self._move(csi_param(params) - 1, col)
+        elif final == "J":
+            self._erase_display(csi_param(params, default=0))
+        elif final == "K":
+            self._erase_line(csi_param(params, default=0))
+        elif final == "L":
+            self._insert_lines(csi_param(params))
+        elif final == "M":
+            self._delete_lines(csi_param(params))
+        elif final == "P":
+            line = self.grid[row]
+            del line[col : col + csi_param(params)]
+            line.extend(" " * (self.columns - len(line)))
+        elif final == "@":
+            line = self.grid[row]
+            line[col:col] = " " * csi_param(params)
+            del line[self.columns :]
+        elif final == "X":
+            count = min(csi_param(params), self.columns - col)
+            self.grid[row][col : col + count] = " " * count
+        elif final == "S":
+            self._scroll_up(csi_param(params))
+        elif final == "T" and not params.startswith(">"):
+            self._scroll_down(csi_param(params))
+        elif final == "b":
+            self._write(self._last_char * min(csi_param(params), self.columns * self.rows))
+        elif final == "r" and not params.startswith("?"):
+            top = csi_param(params, 0) - 1
+            bottom = csi_param(params, 1, default=self.rows) - 1
+            if 0 <= top < bottom < self.rows:
+                self._top, self._bottom = top, bottom
+                self._move(0, 0)
+        elif final == "s" and not params:
+            self._saved_cursor = (row, col)
+        elif final == "u" and not params:
+            self._move(*self._saved_cursor)
+        elif final in "hl":
+            self._set_modes(params, final == "h")
+
+    def _set_modes(self, params: str, enable: bool) -> None:
+        """Apply SM/RM (``CSI ... h`` / ``CSI ... l``), private or not."""
+        private = params.startswith("?")
+        for mode in params.lstrip("?").split(";"):
+            if not private:
+                if mode == "4":
+                    self.insert_mode = enable
+            elif mode == "7":
+                self.autowrap = enable
+            elif mode == "25":
+                self.cursor_visible = enable
+            elif mode in _ALTERNATE_MODES:
+                self._switch_screen(enable, save_cursor=mode == "1049")
+
+    def _switch_screen(self, alternate: bool, save_cursor: bool) -> None:
+        """Enter or leave the alternate screen."""
+        if alternate == self.alternate_screen:
+            return
+        if alternate:
+            if save_cursor:
+                self._saved_main = (self.cursor_row, self.cursor_col)
+            self._alternate = self._blank_grid()
+        else:
+            self._alternate = None
+            if self._saved_main is not None:
+                self._move(*self._saved_main)
+                self._saved_main = None
+        self._top, self._bottom = 0, self.rows - 1
+
+    # Cursor movement and scrolling
+
+    def _move(self, row: int, col: int) -> None:
+        """Place the cursor, clamped to the screen."""
+        self.cursor_row = min(max(row, 0), self.rows - 1)
+        self.cursor_col = min(max(col, 0), self.columns - 1)
+        self._wrap_pending = False
+
+    def _line_feed(self) -> None:
+        """Move down a line, scrolling at the bottom of the scroll region."""
+        if self.cursor_row == self._bottom:
+            self._scroll_up(1)
+        elif self.cursor_row < self.rows - 1:
+            self.cursor_row += 1
+        self._wrap_pending = False
+
+    def _reverse_index(self) -> None:
+        """Move up a line, scrolling down at the top of the scroll region."""
+        if self.cursor_row == self._top:
+            self._scroll_down(1)
+        elif self.cursor_row > 0:
+            self.cursor_row -= 1
+        self._wrap_pending = False
+
+    def _scroll_up(self, count: int) -> None:
+        """Scroll the region up, blank lines entering at the bottom."""
+        grid, top, bottom = self.grid, self._top, self._bottom
+        count = min(count, bottom - top + 1)
+        del grid[top : top + count]
+        grid[bottom - count + 1 : bottom - count + 1] = self._blank_rows(count)
+        if top == 0 and self._alternate is None:
+            self.scrolled_lines += count
+            self.first_line += count
+
+    def _scroll_down(self, count: int) -> None:
+        """Scroll the region down, blank lines entering at the top."""
+        grid, top, bottom = self.grid, self._top, self._bottom
+        count = min(count, bottom - top + 1)
+        del grid[bottom - count + 1 : bottom + 1]
+        grid[top:top] = self._blank_rows(count)
+
+    def _insert_lines(self, count: int) -> None:
+        """Insert blank lines at the cursor row, within the scroll region."""
+        row = self.cursor_row
+        if not self._top <= row <= self._bottom:
+            return
+        count = min(count, self._bottom - row + 1)
+        grid = self.grid
+        del grid[self._bottom - count + 1 : self._bottom + 1]
+        grid[row:row] = self._blank_rows(count)
+        self._move(row, 0)
+
+    def _delete_lines(self, count: int) -> None:
+        """Delete lines at the cursor row, within the scroll region."""
+        row = self.cursor_row
+        if not self._top <= row <= self._bottom:
+            return
+        count = min(count, self._bottom - row + 1)
+        grid = self.grid
+        del grid[row : row + count]
+        grid[self._bottom - count + 1 : self._bottom - count + 1] = self._blank_rows(count)
+        self._move(row, 0)
+
+    def _erase_display(self, mode: int) -> None:
+        grid, row = self.grid, self.cursor_row
+        if mode == 0:
+            self._erase_line(0)
+            grid[row + 1 :] = self._blank_rows(self.rows - row - 1)
+        elif mode == 1:
+            self._erase_line(1)
+            grid[:row] = self._blank_rows(row)
+        elif mode in (2, 3):
+            grid[:] = self._blank_rows(self.rows)
+
+    def _erase_line(self, mode: int) -> None:
+        line, col = self.grid[self.cursor_row], self.cursor_col
+        if mode == 0:
+            line[col:] = " " * (self.columns - col)
+        elif mode == 1:
+            line[: col + 1] = " " * (col + 1)
+        elif mode == 2:
+            line[:] = " " * self.columns
+
+    # Helpers
+
+    def _blank_rows(self, count: int) -> Grid:
+        return [[" "] * self.columns for _ in range(count)]
+
+    def _blank_grid(self) -> Grid:
+        return self._blank_rows(self.rows)
+
+    def _cells(self, text: str) -> List[str]:
+        """Split a captured line into cells, padding after wide characters."""
+        if text.isascii():
+            return list(text)
+        cells: List[str] = []
+        for char in text:
+            width = _char_width(char)
+            if width == 0 and cells:
+                cells[-1] += char
+            elif width:
+                cells.append(char)
+                cells.extend([""] * (width - 1))
+        return cells